@@ -4,10 +4,11 @@ from logging.config import fileConfig
 from pathlib import Path
 
 from dotenv import load_dotenv
-from sqlalchemy import engine_from_config, pool
+from sqlalchemy import Connection, engine_from_config, pool, text
 
 from alembic import context
 
+from app.db.migrations import CONCURRENT_INDEXES
 from app.models import User
 
 BASE_DIR = Path(__file__).parent.parent
@@ -23,6 +24,12 @@ if database_url and database_url.startswith("postgresql+asyncpg://"):
 
 config.set_main_option(SQLALCHEMY_URL, database_url)
 
+# Max wait for a table lock before a DDL statement fails instead of queueing
+# every query behind it, and max duration of a statement (0 disables, so
+# concurrent index builds on large tables can finish)
+MIGRATION_LOCK_TIMEOUT = os.getenv("MIGRATION_LOCK_TIMEOUT", "5s")
+MIGRATION_STATEMENT_TIMEOUT = os.getenv("MIGRATION_STATEMENT_TIMEOUT", "0")
+
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
@@ -43,6 +50,21 @@ def run_migrations_offline() -> None:
         context.run_migrations()
 
 
+def set_timeouts(connection: Connection) -> None:
+    """Apply the migration lock and statement timeouts to a PostgreSQL session."""
+    if connection.dialect.name != "postgresql":
+        return
+    for name, value in (
+        ("lock_timeout", MIGRATION_LOCK_TIMEOUT),
+        ("statement_timeout", MIGRATION_STATEMENT_TIMEOUT),
+    ):
+        connection.execute(
+            text("SELECT set_config(:name, :value, false)"),
+            {"name": name, "value": value},
+        )
+    connection.commit()
+
+
 def run_migrations_online() -> None:
     """Run migrations in 'online' mode."""
     configuration = config.get_section(config.config_ini_section)
@@ -55,7 +77,15 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        set_timeouts(connection)
+        # One transaction per migration, so a migration can leave it to build
+        # indexes concurrently without committing the ones before it early
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            transaction_per_migration=True,
+            **{CONCURRENT_INDEXES: True},
+        )
 
         with context.begin_transaction():
             context.run_migrations()
@@ -0,0 +1,28 @@
+"""Add users (date_joined, id) index
+
+The index is built and dropped concurrently on PostgreSQL, so writes to
+users keep running while it builds.
+
+Revision ID: 3f9a1c2d7b64
+Revises: 7edcb718e436
+Create Date: 2026-10-18 10:12:41.508213
+
+"""
+
+from typing import Sequence, Union
+
+from app.db.migrations import create_index, drop_index
+
+# revision identifiers, used by Alembic.
+revision: str = "3f9a1c2d7b64"
+down_revision: Union[str, None] = "7edcb718e436"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    create_index("ix_users_date_joined_id", "users", ["date_joined", "id"])
+
+
+def downgrade() -> None:
+    drop_index("ix_users_date_joined_id", "users")
@@ -0,0 +1,54 @@
+"""Add unique users lower(email) index
+
+Replaces the case-sensitive unique index on users.email with a unique index
+on lower(email), which case-insensitive lookups use. Both indexes are built
+and dropped concurrently on PostgreSQL, so logins and sign-ups keep running.
+The upgrade fails early if existing emails differ only in case; those users
+must be merged or renamed first.
+
+Revision ID: b52e8d1f0c9a
+Revises: 3f9a1c2d7b64
+Create Date: 2026-10-18 15:04:27.118562
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+from app.db.migrations import create_index, drop_index
+
+# revision identifiers, used by Alembic.
+revision: str = "b52e8d1f0c9a"
+down_revision: Union[str, None] = "3f9a1c2d7b64"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not op.get_context().as_sql:
+        duplicates = (
+            op.get_bind()
+            .execute(
+                sa.text(
+                    "SELECT lower(email) FROM users "
+                    "GROUP BY lower(email) HAVING count(*) > 1 LIMIT 10"
+                )
+            )
+            .scalars()
+            .all()
+        )
+        if duplicates:
+            raise RuntimeError(
+                f"Emails differing only in case must be resolved first: {duplicates}"
+            )
+    create_index(
+        "ix_users_email_lower", "users", [sa.text("lower(email)")], unique=True
+    )
+    drop_index("ix_users_email", "users")
+
+
+def downgrade() -> None:
+    create_index("ix_users_email", "users", ["email"], unique=True)
+    drop_index("ix_users_email_lower", "users")
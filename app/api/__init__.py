@@ -1,9 +1,11 @@
 from fastapi import APIRouter
 
-from app.api import auth, healthcheck, users
+from app.api import auth, healthcheck, profiling, stats, users
 
 router = APIRouter()
 
 router.include_router(auth.router, tags=["authentication"], prefix="/auth")
 router.include_router(healthcheck.router, tags=["healthcheck"], prefix="/healthcheck")
+router.include_router(profiling.router, tags=["profiling"], prefix="/profiling")
+router.include_router(stats.router, tags=["stats"], prefix="/stats")
 router.include_router(users.router, tags=["users"], prefix="/users")
@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.security import HTTPAuthorizationCredentials
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_active_user, get_db
+from app.api.deps import DBSession, get_current_active_user, security
+from app.core.rate_limit import throttle_login
 from app.models.user import User
 from app.schemas.auth import (
     LoginRequest,
+    LogoutRequest,
     RefreshTokenRequest,
     RegisterRequest,
     RegisterResponse,
@@ -19,7 +24,7 @@ router = APIRouter()
 
 @router.post("/register", response_model=RegisterResponse)
 async def register(
-    register_data: RegisterRequest, db: AsyncSession = Depends(get_db)
+    register_data: RegisterRequest, db: AsyncSession = DBSession
 ) -> User:
     """Register a new user."""
     auth_service = AuthService(db)
@@ -28,16 +33,19 @@ async def register(
 
 @router.post("/login", response_model=TokenResponse)
 async def login(
-    login_data: LoginRequest, db: AsyncSession = Depends(get_db)
+    request: Request, login_data: LoginRequest, db: AsyncSession = DBSession
 ) -> TokenResponse:
     """Login user and return access token."""
+    await throttle_login(
+        request.client.host if request.client else None, str(login_data.email)
+    )
     auth_service = AuthService(db)
     return await auth_service.login(login_data)
 
 
 @router.post("/refresh", response_model=TokenResponse)
 async def refresh_token(
-    refresh_data: RefreshTokenRequest, db: AsyncSession = Depends(get_db)
+    refresh_data: RefreshTokenRequest, db: AsyncSession = DBSession
 ) -> TokenResponse:
     """Refresh access token."""
     auth_service = AuthService(db)
@@ -46,12 +54,18 @@ async def refresh_token(
 
 @router.post("/logout")
 async def logout(
+    logout_data: Optional[LogoutRequest] = None,
     current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = DBSession,
 ) -> dict:
-    """Logout current user."""
+    """Logout current user and revoke the presented tokens."""
     auth_service = AuthService(db)
-    return await auth_service.logout(current_user)
+    return await auth_service.logout(
+        current_user,
+        token.credentials,
+        logout_data.refresh_token if logout_data else None,
+    )
 
 
 @router.get("/me")
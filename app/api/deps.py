@@ -6,6 +6,7 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import verify_token
+from app.db.routing import READ_YOUR_WRITES_KEY
 from app.db.session import AsyncSessionLocal
 from app.errors.exception import (
     NotSuperuserError,
@@ -19,40 +20,79 @@ security = HTTPBearer()
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    """Get database session."""
+    """Get database session.
+
+    The session checks out a pooled connection on its first statement, not
+    when it is created, and returns it on commit, rollback or close. Requests
+    that never touch the database, e.g. those served from caches, do not use
+    a connection at all.
+    """
     async with AsyncSessionLocal() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
+        yield session
 
 
-async def get_current_user(
-    session: AsyncSession = Depends(get_db),
-    token: HTTPAuthorizationCredentials = Depends(security),
+# Close the session as soon as the path operation returns, so the connection
+# is back in the pool before the response is serialized, sent and logged
+DBSession = Depends(get_db, scope="function")
+
+
+async def authenticate(
+    session: AsyncSession,
+    token: str,
+    *,
+    active: bool = False,
+    superuser: bool = False,
 ) -> User:
-    """Get current user from token."""
-    user_id = verify_token(token.credentials, "access")
+    """Get the user an access token was issued to.
+
+    Shared by the dependencies below and by middleware authorizing requests
+    outside of the dependency system.
+
+    Args:
+        session: Database session
+        token: Encoded access token
+        active: Require an active user
+        superuser: Require an active superuser
+
+    Raises:
+        UserNotFoundError: If the user does not exist
+        UserIsInactiveError: If an active user is required and it is not
+        NotSuperuserError: If a superuser is required and it is not
+
+    """
+    user_id = verify_token(token, "access")
+    # Writes made for this user keep its next reads on the primary
+    session.info[READ_YOUR_WRITES_KEY] = user_id
     user_service = UserService(session)
-    user = await user_service.get_by_id(user_id)
+    user = await user_service.get_by_id_cached(user_id)
     if not user:
         raise UserNotFoundError
+    if (active or superuser) and not user.is_active:
+        raise UserIsInactiveError
+    if superuser and not user.is_superuser:
+        raise NotSuperuserError
     return user
 
 
+async def get_current_user(
+    session: AsyncSession = DBSession,
+    token: HTTPAuthorizationCredentials = Depends(security),
+) -> User:
+    """Get current user from token."""
+    return await authenticate(session, token.credentials)
+
+
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user),
+    session: AsyncSession = DBSession,
+    token: HTTPAuthorizationCredentials = Depends(security),
 ) -> User:
     """Get current active user."""
-    if not current_user.is_active:
-        raise UserIsInactiveError
-    return current_user
+    return await authenticate(session, token.credentials, active=True)
 
 
 async def get_current_active_superuser(
-    current_user: User = Depends(get_current_active_user),
+    session: AsyncSession = DBSession,
+    token: HTTPAuthorizationCredentials = Depends(security),
 ) -> User:
     """Get current active superuser."""
-    if not current_user.is_superuser:
-        raise NotSuperuserError
-    return current_user
+    return await authenticate(session, token.credentials, superuser=True)
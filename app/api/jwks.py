@@ -0,0 +1,18 @@
+from typing import Any
+
+from fastapi import APIRouter, Response
+
+from app.core import security
+
+router = APIRouter()
+
+
+@router.get(
+    "/jwks.json",
+    summary="Get JSON Web Key Set",
+    description="Public keys that verify tokens issued by this service.",
+)
+async def get_jwks(response: Response) -> dict[str, Any]:
+    """Return the public keys of the JWT key ring."""
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return security.key_ring.jwks()
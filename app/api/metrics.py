@@ -0,0 +1,44 @@
+import asyncio
+
+from fastapi import APIRouter, Response
+
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from app.core.metrics import record_pool_stats, render
+from app.db.pool import pool_stats
+from app.db.session import async_engine, replica_router
+
+router = APIRouter()
+
+
+def publish_pool_metrics() -> None:
+    """Publish the connection pool statistics of this process."""
+    record_pool_stats("primary", pool_stats(async_engine))
+    for index, replica in enumerate(replica_router.replicas if replica_router else []):
+        record_pool_stats(f"replica-{index}", pool_stats(replica))
+
+
+async def publish_pool_metrics_periodically(interval: float) -> None:
+    """Publish the pool statistics until cancelled.
+
+    A scrape reaches one worker, which can only read its own pools; every
+    worker publishes its pools in the background so the scrape sees all.
+    """
+    while True:
+        publish_pool_metrics()
+        await asyncio.sleep(interval)
+
+
+@router.get(
+    "",
+    summary="Get Prometheus metrics",
+    description="Metrics of all worker processes in the Prometheus text format.",
+    response_class=Response,
+)
+def get_metrics() -> Response:
+    """Return the metrics of all workers.
+
+    A plain function, so reading the workers' files runs in the thread pool.
+    """
+    publish_pool_metrics()
+    return Response(render(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,41 @@
+from typing import Any, Union
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
+
+from app.api.deps import get_current_active_superuser
+from app.core.constants import ProfileFormat
+from app.core.profiling import stack_sampler
+from app.errors.exception import NotFoundError
+from app.models.user import User
+
+router = APIRouter()
+
+
+@router.get(
+    "/stacks",
+    summary="Get sampled stacks",
+    description="Get the stacks of busy threads sampled in the background by this "
+    "process, as collapsed stacks or speedscope JSON. "
+    "Only superuser can access this endpoint.",
+    response_model=None,
+)
+async def get_stacks(
+    profile_format: str = Query(
+        ProfileFormat.COLLAPSED, alias="format", pattern="^(collapsed|speedscope)$"
+    ),
+    reset: bool = Query(False, description="Clear the stacks after reading them"),
+    _current_user: User = Depends(get_current_active_superuser),
+) -> Union[PlainTextResponse, dict[str, Any]]:
+    """Return the stacks sampled by the continuous profiler."""
+    if not stack_sampler.running:
+        raise NotFoundError(message="Continuous profiling is disabled.")
+    if profile_format == ProfileFormat.SPEEDSCOPE:
+        body: Union[PlainTextResponse, dict[str, Any]] = stack_sampler.table.speedscope(
+            "Sampled stacks"
+        )
+    else:
+        body = PlainTextResponse(stack_sampler.table.collapsed())
+    if reset:
+        stack_sampler.table.clear()
+    return body
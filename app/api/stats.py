@@ -0,0 +1,50 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends
+
+from app.api.deps import get_current_active_superuser
+from app.core.hashing import password_hasher
+from app.core.profiling import stack_sampler
+from app.core.rate_limit import login_rate_limiter
+from app.core.revocation import revocation_store
+from app.core.security import token_cache
+from app.db.pool import pool_stats
+from app.db.session import async_engine, replica_router, slow_query_logs
+from app.models.user import User
+from app.services.last_login import last_login_buffer
+from app.services.users import user_cache
+from app.utils import logging_config
+
+router = APIRouter()
+
+
+@router.get(
+    "",
+    summary="Get runtime statistics",
+    description="Get worker pool, connection pool and cache statistics of this "
+    "process. Only superuser can access this endpoint.",
+)
+async def get_stats(
+    _current_user: User = Depends(get_current_active_superuser),
+) -> dict[str, Any]:
+    """Return runtime statistics."""
+    return {
+        "password_hasher": password_hasher.stats(),
+        "token_cache": token_cache.stats(),
+        "revoked_tokens": revocation_store.stats(),
+        "login_rate_limit": login_rate_limiter.stats(),
+        "user_cache": user_cache.stats(),
+        "last_login_buffer": last_login_buffer.stats(),
+        "read_replicas": replica_router.stats() if replica_router else None,
+        "db_pool": {
+            "primary": pool_stats(async_engine),
+            "replicas": [pool_stats(replica) for replica in replica_router.replicas]
+            if replica_router
+            else [],
+        },
+        "slow_queries": [slow_query_log.stats() for slow_query_log in slow_query_logs],
+        "stack_sampler": stack_sampler.stats() if stack_sampler.running else None,
+        "log_queue": logging_config.log_sink.stats()
+        if logging_config.log_sink
+        else None,
+    }
@@ -1,16 +1,33 @@
-from typing import Any
+from typing import Any, AsyncIterator, List, Optional
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.responses import StreamingResponse
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_active_superuser, get_current_active_user, get_db
-from app.errors.exception import UserNotFoundError
+from app.api.deps import (
+    DBSession,
+    get_current_active_superuser,
+    get_current_active_user,
+)
+from app.core.config import settings
+from app.core.constants import BatchStatus, CountMode, ExportFormat
+from app.db.routing import RoutingSession
+from app.errors.exception import UserNotFoundError, ValidationError
 from app.models.user import User
 from app.schemas.common import PaginatedResponse
 from app.schemas.user import User as UserSchema
-from app.schemas.user import UserCreate, UserUpdate
-from app.services.users import UserService
+from app.schemas.user import (
+    UserBatchDelete,
+    UserBatchResult,
+    UserBatchUpdate,
+    UserCreate,
+    UserImportResult,
+    UserUpdate,
+)
+from app.services.user_import import UserImporter
+from app.services.users import EXPORT_FIELDS, UserService
+from app.utils.records import MEDIA_TYPES, decode_rows, encode_rows
 
 router = APIRouter()
 
@@ -25,7 +42,7 @@ router = APIRouter()
 )
 async def create_user(
     user_in: UserCreate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = DBSession,
     _current_user: User = Depends(get_current_active_superuser),
 ) -> UserSchema:
     """Create a new user."""
@@ -55,13 +72,136 @@ async def read_user_me(
 async def update_user_me(
     user_in: UserUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = DBSession,
 ) -> UserSchema:
     """Update current user information."""
     user_service = UserService(db)
     return await user_service.update(current_user.id, user_in)
 
 
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    summary="Export users",
+    description="Stream all users as NDJSON or CSV. "
+    "Only superuser can access this endpoint.",
+)
+async def export_users(
+    db: AsyncSession = DBSession,
+    _current_user: User = Depends(get_current_active_superuser),
+    export_format: str = Query(
+        ExportFormat.NDJSON, alias="format", pattern="^(ndjson|csv)$"
+    ),
+    sort: str = Query(
+        "id",
+        pattern="^-?(id|date_joined|username|email)$",
+        description="Sort key, prefix with - for descending order",
+    ),
+) -> StreamingResponse:
+    """Export all users."""
+
+    async def content() -> AsyncIterator[str]:
+        # The export owns its session, which lives as long as the stream
+        async with AsyncSession(
+            db.bind,
+            sync_session_class=RoutingSession,
+            router=getattr(db.sync_session, "router", None),
+        ) as session:
+            rows = UserService(session).stream_rows(
+                sort=sort, batch_size=settings.USER_EXPORT_BATCH_SIZE
+            )
+            async for chunk in encode_rows(
+                rows,
+                EXPORT_FIELDS,
+                export_format,
+                chunk_size=settings.USER_EXPORT_BATCH_SIZE,
+            ):
+                yield chunk
+
+    return StreamingResponse(
+        content(),
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="users.{export_format}"'
+        },
+    )
+
+
+@router.post(
+    "/import",
+    response_model=UserImportResult,
+    summary="Import users",
+    description="Create users from an NDJSON or CSV body with one user per line. "
+    "Rows that fail are reported and do not abort the import. "
+    "Only superuser can access this endpoint.",
+)
+async def import_users(
+    request: Request,
+    db: AsyncSession = DBSession,
+    _current_user: User = Depends(get_current_active_superuser),
+    import_format: str = Query(
+        ExportFormat.NDJSON, alias="format", pattern="^(ndjson|csv)$"
+    ),
+) -> dict[str, Any]:
+    """Import users."""
+    importer = UserImporter(db, batch_size=settings.USER_IMPORT_BATCH_SIZE)
+    return await importer.run(decode_rows(request.stream(), import_format))
+
+
+def batch_result(user_ids: List[int], done: List[int], status: str) -> dict[str, Any]:
+    """Build the outcome of every requested user of a batch."""
+    done_ids = set(done)
+    return {
+        "results": [
+            {
+                "id": user_id,
+                "status": status if user_id in done_ids else BatchStatus.NOT_FOUND,
+            }
+            for user_id in dict.fromkeys(user_ids)
+        ]
+    }
+
+
+@router.patch(
+    ":batch",
+    response_model=UserBatchResult,
+    summary="Update users in batch",
+    description="Apply the same changes to many users in one statement. "
+    "Only superuser can access this endpoint.",
+)
+async def update_users_batch(
+    batch_in: UserBatchUpdate,
+    db: AsyncSession = DBSession,
+    _current_user: User = Depends(get_current_active_superuser),
+) -> dict[str, Any]:
+    """Update users in batch."""
+    # An explicit null leaves a field as it is, like an omitted one
+    changes = batch_in.changes.model_dump(exclude_none=True)
+    if not changes:
+        raise ValidationError("No changes given")
+    user_service = UserService(db)
+    updated = await user_service.update_many(batch_in.ids, changes)
+    return batch_result(batch_in.ids, updated, BatchStatus.UPDATED)
+
+
+@router.delete(
+    ":batch",
+    response_model=UserBatchResult,
+    summary="Delete users in batch",
+    description="Delete many users in one statement. "
+    "Only superuser can access this endpoint.",
+)
+async def delete_users_batch(
+    batch_in: UserBatchDelete,
+    db: AsyncSession = DBSession,
+    _current_user: User = Depends(get_current_active_superuser),
+) -> dict[str, Any]:
+    """Delete users in batch."""
+    user_service = UserService(db)
+    deleted = await user_service.delete_many(batch_in.ids)
+    return batch_result(batch_in.ids, deleted, BatchStatus.DELETED)
+
+
 @router.get(
     "/{user_id}",
     response_model=UserSchema,
@@ -71,7 +211,7 @@ async def update_user_me(
 )
 async def read_user_by_id(
     user_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = DBSession,
     _current_user: User = Depends(get_current_active_superuser),
 ) -> UserSchema:
     """Read user by ID."""
@@ -87,23 +227,39 @@ async def read_user_by_id(
     response_model=PaginatedResponse[UserSchema],
     summary="Get all users",
     description="Get list of users with pagination. "
+    "Pass `next_cursor` of a page as `cursor` to get the next one; "
+    "`skip` is kept for offset pagination. "
     "Only superuser can access this endpoint.",
 )
 async def read_users(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = DBSession,
     _current_user: User = Depends(get_current_active_superuser),
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1),
+    cursor: Optional[str] = Query(None, description="Cursor of the previous page"),
+    sort: str = Query(
+        "id",
+        pattern="^-?(id|date_joined|username|email)$",
+        description="Sort key, prefix with - for descending order",
+    ),
+    count: str = Query(
+        CountMode.EXACT,
+        pattern="^(exact|estimated|none)$",
+        description="Compute the total exactly, from planner statistics, or not",
+    ),
 ) -> dict[str, Any]:
     """Read all users with pagination."""
     user_service = UserService(db)
-    users, total = await user_service.get_multi(skip=skip, limit=limit)
+    users, next_cursor, total = await user_service.get_multi(
+        skip=skip, limit=limit, cursor=cursor, sort=sort, count=count
+    )
     return {
         "items": users,
         "total": total,
         "skip": skip,
         "limit": limit,
-        "has_more": total > (skip + limit),
+        "has_more": next_cursor is not None,
+        "next_cursor": next_cursor,
     }
 
 
@@ -113,7 +269,7 @@ async def read_users(
 )
 async def delete_user(
     user_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = DBSession,
     _current_user: User = Depends(get_current_active_superuser),
 ) -> None:
     """Delete user by ID."""
@@ -3,3 +3,70 @@ class TokenType:
 
     ACCESS_TOKEN = "access"
     REFRESH_TOKEN = "refresh"
+
+
+class HasherExecutor:
+    """Password hasher executor type."""
+
+    THREAD = "thread"
+    PROCESS = "process"
+    INLINE = "inline"
+
+
+class StoreBackend:
+    """Shared state backend type."""
+
+    MEMORY = "memory"
+    REDIS = "redis"
+
+
+class CountMode:
+    """How list endpoints compute the total number of rows."""
+
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+    NONE = "none"
+
+
+class ReplicaSelection:
+    """Read replica selection strategy."""
+
+    ROUND_ROBIN = "round_robin"
+    LEAST_CONNECTIONS = "least_connections"
+
+
+class PrePing:
+    """When pooled connections are pinged before use."""
+
+    ALWAYS = "always"
+    IDLE = "idle"
+    NEVER = "never"
+
+
+class LogDropPolicy:
+    """Which log records are dropped when the log queue is full."""
+
+    DROP_NEW = "drop_new"
+    DROP_OLDEST = "drop_oldest"
+
+
+class ExportFormat:
+    """Export file format."""
+
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class BatchStatus:
+    """Outcome of one item of a batch operation."""
+
+    UPDATED = "updated"
+    DELETED = "deleted"
+    NOT_FOUND = "not_found"
+
+
+class ProfileFormat:
+    """Output format of a request profile."""
+
+    COLLAPSED = "collapsed"
+    SPEEDSCOPE = "speedscope"
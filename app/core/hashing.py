@@ -0,0 +1,187 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, TypeVar
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+from app.core.constants import HasherExecutor
+from app.core.metrics import password_hash_duration
+from app.errors.exception import ServiceUnavailableError
+
+T = TypeVar("T")
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def hash_password(password: str) -> str:
+    """Hash a password with the configured password context.
+
+    Args:
+        password: Plain text password
+
+    Returns:
+        Hashed password
+
+    """
+    return pwd_context.hash(password)
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    """Verify a password against a hash.
+
+    Args:
+        password: Plain text password
+        hashed_password: Hashed password to check against
+
+    Returns:
+        True if password matches, False otherwise
+
+    """
+    return pwd_context.verify(password, hashed_password)
+
+
+class PasswordHasher:
+    """Run password hashing off the event loop in a bounded worker pool.
+
+    bcrypt releases the GIL, so a thread pool is enough to keep the event loop
+    responsive; a process pool can be used to spread the work across CPUs.
+    Calls beyond ``max_workers + max_queue_size`` are rejected with
+    ``ServiceUnavailableError`` instead of piling up behind the pool.
+    """
+
+    def __init__(
+        self,
+        executor_type: str = HasherExecutor.THREAD,
+        max_workers: int = 4,
+        max_queue_size: int = 64,
+    ) -> None:
+        """Initialize PasswordHasher.
+
+        Args:
+            executor_type: One of "thread", "process" or "inline"
+            max_workers: Number of pool workers
+            max_queue_size: Number of calls allowed to wait for a free worker
+
+        """
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self._executor: Optional[Executor] = None
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def _get_executor(self) -> Executor:
+        """Create the worker pool on first use."""
+        if self._executor is None:
+            if self.executor_type == HasherExecutor.PROCESS:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="password-hasher",
+                )
+        return self._executor
+
+    async def _run(self, func: Callable[..., T], *args: str) -> T:
+        """Run a hashing function in the pool, enforcing the queue limit."""
+        if self.executor_type == HasherExecutor.INLINE:
+            self._completed += 1
+            return func(*args)
+
+        if self._in_flight >= self.max_workers + self.max_queue_size:
+            self._rejected += 1
+            raise ServiceUnavailableError(message="Password hasher is overloaded.")
+        return await self._submit(func, *args)
+
+    async def _submit(self, func: Callable[..., T], *args: str) -> T:
+        """Run a hashing function in the pool."""
+        self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._in_flight -= 1
+            self._completed += 1
+
+    async def _timed(self, operation: str, func: Callable[..., T], *args: str) -> T:
+        """Run a hashing function, recording how long the caller waited."""
+        start = time.perf_counter()
+        result = await self._run(func, *args)
+        password_hash_duration.labels(operation).observe(time.perf_counter() - start)
+        return result
+
+    async def hash(self, password: str) -> str:
+        """Hash a password without blocking the event loop."""
+        return await self._timed("hash", hash_password, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """Verify a password without blocking the event loop."""
+        return await self._timed("verify", verify_password, password, hashed_password)
+
+    async def hash_many(self, passwords: Sequence[str]) -> List[str]:
+        """Hash many passwords in parallel, e.g. for a bulk import.
+
+        At most ``max_workers`` hashes are submitted at a time, so a request
+        hashing a single password waits behind one hash rather than the whole
+        batch, and the batch is never rejected by the queue limit.
+
+        Args:
+            passwords: Plain text passwords
+
+        Returns:
+            Hashed passwords in the same order
+
+        """
+        if self.executor_type == HasherExecutor.INLINE:
+            self._completed += len(passwords)
+            return [hash_password(password) for password in passwords]
+
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def hash_one(password: str) -> str:
+            async with semaphore:
+                start = time.perf_counter()
+                hashed = await self._submit(hash_password, password)
+            password_hash_duration.labels("hash").observe(time.perf_counter() - start)
+            return hashed
+
+        return list(await asyncio.gather(*(hash_one(p) for p in passwords)))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool utilization statistics.
+
+        Returns:
+            Dictionary with pool size, queue depth and counters
+
+        """
+        busy = min(self._in_flight, self.max_workers)
+        return {
+            "executor": self.executor_type,
+            "max_workers": self.max_workers,
+            "max_queue_size": self.max_queue_size,
+            "busy_workers": busy,
+            "queued": max(self._in_flight - self.max_workers, 0),
+            "utilization": busy / self.max_workers if self.max_workers else 0.0,
+            "completed": self._completed,
+            "rejected": self._rejected,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut down the worker pool; it is recreated on next use."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    executor_type=settings.PASSWORD_HASHER_EXECUTOR,
+    max_workers=settings.PASSWORD_HASHER_MAX_WORKERS,
+    max_queue_size=settings.PASSWORD_HASHER_MAX_QUEUE_SIZE,
+)
@@ -0,0 +1,148 @@
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from jose import jwk
+from jose.backends.base import Key
+from jose.constants import ALGORITHMS
+
+from app.core.config import Settings
+from app.errors.exception import InvalidTokenError
+
+
+class SigningKey:
+    """JWT key parsed once and reused for every sign and verify call."""
+
+    def __init__(self, kid: Optional[str], algorithm: str, key: Key) -> None:
+        """Initialize SigningKey.
+
+        Args:
+            kid: Key ID put in the token header, None for the legacy secret key
+            algorithm: JWS algorithm, e.g. HS256, ES256 or RS256
+            key: Parsed python-jose key, private or public
+
+        """
+        self.kid = kid
+        self.algorithm = algorithm
+        self.key = key
+        self.verify_key = key if self.is_symmetric else key.public_key()
+
+    @classmethod
+    def from_pem(cls, kid: Optional[str], algorithm: str, pem: str) -> "SigningKey":
+        """Parse a PEM encoded (or HMAC secret) key.
+
+        Args:
+            kid: Key ID
+            algorithm: JWS algorithm
+            pem: PEM encoded private or public key, or an HMAC secret
+
+        Returns:
+            Parsed signing key
+
+        """
+        return cls(kid, algorithm, jwk.construct(pem, algorithm))
+
+    @property
+    def is_symmetric(self) -> bool:
+        """Return True for HMAC keys."""
+        return self.algorithm in ALGORITHMS.HMAC
+
+    @property
+    def can_sign(self) -> bool:
+        """Return True if the key holds private material."""
+        return self.is_symmetric or not self.key.is_public()
+
+    def to_public_jwk(self) -> Dict[str, Any]:
+        """Return the public part of an asymmetric key as a JWK.
+
+        Returns:
+            JWK dictionary without private parameters
+
+        """
+        public_jwk = self.verify_key.to_dict()
+        public_jwk.update({"kid": self.kid, "alg": self.algorithm, "use": "sig"})
+        return public_jwk
+
+
+class KeyRing:
+    """Set of JWT keys selected by ``kid``.
+
+    The active key signs new tokens; every key in the ring verifies tokens,
+    so retired keys keep validating tokens until they expire. Tokens without
+    a ``kid`` header are verified with the legacy ``SECRET_KEY``.
+    """
+
+    def __init__(self, keys: Iterable[SigningKey], active_kid: Optional[str]) -> None:
+        """Initialize KeyRing.
+
+        Args:
+            keys: Keys of the ring
+            active_kid: Key ID used to sign new tokens
+
+        Raises:
+            ValueError: If the active key is missing or cannot sign
+
+        """
+        self._keys = {key.kid: key for key in keys}
+        active = self._keys.get(active_kid)
+        if active is None or not active.can_sign:
+            raise ValueError(f"JWT key {active_kid!r} cannot be used for signing")
+        self.active = active
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "KeyRing":
+        """Build the key ring from application settings.
+
+        Args:
+            settings: Application settings
+
+        Returns:
+            Key ring with the legacy secret key and all configured keys
+
+        """
+        keys = [
+            SigningKey.from_pem(
+                None,
+                settings.SECURITY_ALGORITHM,
+                settings.SECRET_KEY.get_secret_value(),
+            )
+        ]
+        for kid, config in settings.JWT_KEYS.items():
+            if config.key is not None:
+                pem = config.key.get_secret_value()
+            else:
+                pem = Path(config.key_file).read_text()
+            keys.append(SigningKey.from_pem(kid, config.algorithm, pem))
+        return cls(keys, settings.JWT_ACTIVE_KID or None)
+
+    def get(self, kid: Optional[str]) -> SigningKey:
+        """Get the key for a token's ``kid`` header.
+
+        Args:
+            kid: Key ID from the token header
+
+        Returns:
+            Matching key
+
+        Raises:
+            InvalidTokenError: If the key ID is unknown
+
+        """
+        try:
+            return self._keys[kid]
+        except KeyError as e:
+            raise InvalidTokenError("Unknown signing key") from e
+
+    def jwks(self) -> Dict[str, Any]:
+        """Return the public keys of the ring as a JWK Set.
+
+        Returns:
+            JWK Set with all asymmetric keys
+
+        """
+        return {
+            "keys": [
+                key.to_public_jwk()
+                for key in self._keys.values()
+                if not key.is_symmetric
+            ]
+        }
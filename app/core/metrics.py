@@ -0,0 +1,126 @@
+import os
+from typing import Any, Dict, Tuple
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Directory the worker processes share for their metrics, read by
+# prometheus_client when it is imported; unset reports this process only
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+# Upper bounds in seconds of the request latency buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Upper bounds in bytes of the response size buckets
+SIZE_BUCKETS = (100, 1000, 10_000, 100_000, 1_000_000, 10_000_000)
+# Upper bounds in seconds of the password hashing buckets
+HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+# Upper bounds in seconds of the JWT signing and verification buckets
+JWT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05)
+
+request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Time to serve a request, by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+response_size = Histogram(
+    "http_response_size_bytes",
+    "Size of response bodies, by route template",
+    ["method", "route"],
+    buckets=SIZE_BUCKETS,
+)
+# Gauges of exited workers are left out once they are marked dead
+requests_in_progress = Gauge(
+    "http_requests_in_progress",
+    "Requests being served",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+password_hash_duration = Histogram(
+    "password_hash_duration_seconds",
+    "Time to hash or verify a password, including the wait for a worker",
+    ["operation"],
+    buckets=HASH_BUCKETS,
+)
+jwt_duration = Histogram(
+    "jwt_duration_seconds",
+    "Time to sign or verify a JWT, cached verifications excluded",
+    ["operation"],
+    buckets=JWT_BUCKETS,
+)
+db_pool_connections = Gauge(
+    "db_pool_connections",
+    "Connections of the pool by state",
+    ["engine", "state"],
+    multiprocess_mode="livesum",
+)
+db_pool_checkouts = Counter(
+    "db_pool_checkouts_total", "Connections checked out of the pool", ["engine"]
+)
+db_pool_timeouts = Counter(
+    "db_pool_timeouts_total",
+    "Checkouts that found no free connection in time",
+    ["engine"],
+)
+db_pool_wait = Counter(
+    "db_pool_wait_seconds_total", "Time checkouts waited for a connection", ["engine"]
+)
+
+# Pool totals already added to the counters, by counter and engine
+_published: Dict[Tuple[Counter, str], float] = {}
+
+
+def _publish_total(counter: Counter, engine: str, total: float) -> None:
+    """Add to a counter what a pool's own total grew by since last published."""
+    key = (counter, engine)
+    previous = _published.get(key, 0.0)
+    # A smaller total comes from a new pool, which counts from zero
+    counter.labels(engine).inc(total - previous if total >= previous else total)
+    _published[key] = total
+
+
+def record_pool_stats(engine: str, stats: Dict[str, Any]) -> None:
+    """Publish the statistics of a connection pool.
+
+    The pool keeps its own counters, so publishing adds what they grew by
+    instead of recording every checkout twice.
+
+    Args:
+        engine: Engine label, e.g. "primary" or "replica-0"
+        stats: Statistics returned by ``pool_stats``
+
+    """
+    if not stats:
+        return
+    for state in ("checked_out", "idle", "overflow"):
+        db_pool_connections.labels(engine, state).set(stats.get(state, 0))
+    _publish_total(db_pool_checkouts, engine, stats["checkouts"])
+    _publish_total(db_pool_timeouts, engine, stats["timeouts"])
+    wait = stats["wait"]
+    _publish_total(db_pool_wait, engine, wait["avg_ms"] * wait["count"] / 1000)
+
+
+def render() -> bytes:
+    """Render the metrics in the Prometheus text format.
+
+    With ``PROMETHEUS_MULTIPROC_DIR`` set, the files of every worker in the
+    directory are merged, so a scrape reaching any worker sees them all.
+    """
+    if MULTIPROC_DIR_ENV not in os.environ:
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
+def mark_process_dead() -> None:
+    """Drop the live gauges of this process from the shared directory."""
+    if MULTIPROC_DIR_ENV in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,75 @@
+import asyncio
+import os
+import signal
+import time
+from pathlib import Path
+
+from loguru import logger
+
+from app.core.config import settings
+from app.utils.profiling import ThreadSampler
+
+stack_sampler = ThreadSampler(
+    interval=settings.CONTINUOUS_PROFILING_INTERVAL_SECONDS,
+    max_stacks=settings.CONTINUOUS_PROFILING_MAX_STACKS,
+)
+
+
+def dump_stacks(directory: Path) -> Path:
+    """Write the sampled stacks of this process to a file.
+
+    Args:
+        directory: Directory of the dump
+
+    Returns:
+        Path of the collapsed-stack file, named after the process and time
+
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"stacks-{os.getpid()}-{time.strftime('%Y%m%dT%H%M%S')}.txt"
+    path.write_text(stack_sampler.table.collapsed())
+    return path
+
+
+def _dump_in_background() -> None:
+    """Dump the stacks off the event loop, on the dump signal."""
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(
+        None, dump_stacks, settings.CONTINUOUS_PROFILING_DUMP_DIR
+    )
+
+    def log_dump(done: asyncio.Future) -> None:
+        if done.exception() is not None:
+            logger.error(f"Failed to dump stacks: {str(done.exception())}")
+        else:
+            logger.info(f"Dumped sampled stacks to {done.result()}")
+
+    future.add_done_callback(log_dump)
+
+
+def start_stack_sampler() -> None:
+    """Start the continuous sampler and its dump signal handler.
+
+    Must be called from the event loop thread, which the sampler labels as
+    the event loop.
+    """
+    stack_sampler.start()
+    signal_name = settings.CONTINUOUS_PROFILING_DUMP_SIGNAL
+    if not signal_name:
+        return
+    try:
+        asyncio.get_running_loop().add_signal_handler(
+            getattr(signal, signal_name), _dump_in_background
+        )
+    except (AttributeError, NotImplementedError, RuntimeError, ValueError) as e:
+        logger.warning(f"Cannot dump stacks on {signal_name}: {str(e)}")
+
+
+def stop_stack_sampler() -> None:
+    """Stop the continuous sampler and remove its signal handler."""
+    if not stack_sampler.running:
+        return
+    stack_sampler.stop()
+    signal_name = settings.CONTINUOUS_PROFILING_DUMP_SIGNAL
+    if signal_name and hasattr(signal, signal_name):
+        asyncio.get_running_loop().remove_signal_handler(getattr(signal, signal_name))
@@ -0,0 +1,203 @@
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.core.constants import StoreBackend
+from app.errors.exception import RateLimitExceededError
+
+
+class RateLimitBackend(ABC):
+    """Storage of rate limit state.
+
+    Limits use GCRA, a token bucket kept as one timestamp per key: ``limit``
+    requests may burst, then they are allowed at ``window / limit`` intervals.
+    """
+
+    @abstractmethod
+    async def hit(self, key: str, limit: int, window: float) -> float:
+        """Record a request for key.
+
+        Args:
+            key: Rate limit key
+            limit: Requests allowed per window
+            window: Window length in seconds
+
+        Returns:
+            0 if the request is allowed, otherwise seconds until it would be
+
+        """
+
+    def stats(self) -> Dict[str, Any]:
+        """Return backend statistics."""
+        return {"backend": type(self).__name__}
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Per-process rate limit state in sharded LRU dictionaries.
+
+    Keys are spread over shards so each dictionary stays small and the least
+    recently used key of a full shard is evicted in O(1).
+    """
+
+    def __init__(
+        self,
+        max_keys: int = 100000,
+        shards: int = 16,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize MemoryRateLimitBackend.
+
+        Args:
+            max_keys: Maximum number of tracked keys over all shards
+            shards: Number of shards
+            timer: Monotonic clock
+
+        """
+        self._shards = [OrderedDict() for _ in range(shards)]
+        self._max_keys_per_shard = max(max_keys // shards, 1)
+        self.timer = timer
+        self.evictions = 0
+
+    async def hit(self, key: str, limit: int, window: float) -> float:
+        """Record a request for key."""
+        shard: OrderedDict[str, float] = self._shards[hash(key) % len(self._shards)]
+        now = self.timer()
+        # Theoretical arrival time: when the bucket will be full again
+        tat = max(shard.get(key, now), now)
+        new_tat = tat + window / limit
+        allow_at = new_tat - window
+        if allow_at > now:
+            return allow_at - now
+
+        shard[key] = new_tat
+        shard.move_to_end(key)
+        if len(shard) > self._max_keys_per_shard:
+            shard.popitem(last=False)
+            self.evictions += 1
+        return 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return backend statistics."""
+        return {
+            **super().stats(),
+            "keys": sum(len(shard) for shard in self._shards),
+            "evictions": self.evictions,
+        }
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Rate limit state shared between processes in Redis.
+
+    The GCRA update runs as one Lua script, so it is atomic and costs a single
+    round trip. Requires the ``redis`` extra.
+    """
+
+    SCRIPT = """
+    local time = redis.call('TIME')
+    local now = tonumber(time[1]) + tonumber(time[2]) / 1e6
+    local limit = tonumber(ARGV[1])
+    local window = tonumber(ARGV[2])
+    local tat = math.max(tonumber(redis.call('GET', KEYS[1])) or now, now)
+    local new_tat = tat + window / limit
+    local allow_at = new_tat - window
+    if allow_at > now then
+        return tostring(allow_at - now)
+    end
+    redis.call('SET', KEYS[1], new_tat, 'PX', math.ceil((new_tat - now) * 1000))
+    return '0'
+    """
+
+    def __init__(self, url: str) -> None:
+        """Initialize RedisRateLimitBackend.
+
+        Args:
+            url: Redis connection URL
+
+        """
+        from redis import asyncio as redis
+
+        self._redis = redis.from_url(url, decode_responses=True)
+        self._script = self._redis.register_script(self.SCRIPT)
+
+    async def hit(self, key: str, limit: int, window: float) -> float:
+        """Record a request for key."""
+        return float(
+            await self._script(keys=[f"rate-limit:{key}"], args=[limit, window])
+        )
+
+
+class RateLimiter:
+    """Reject requests over a limit with ``RateLimitExceededError``."""
+
+    def __init__(self, backend: RateLimitBackend) -> None:
+        """Initialize RateLimiter.
+
+        Args:
+            backend: Rate limit state storage
+
+        """
+        self.backend = backend
+        self.rejected = 0
+
+    async def check(self, key: str, limit: int, window: float) -> None:
+        """Record a request and raise if it is over the limit.
+
+        Args:
+            key: Rate limit key
+            limit: Requests allowed per window
+            window: Window length in seconds
+
+        Raises:
+            RateLimitExceededError: With a Retry-After header if over the limit
+
+        """
+        retry_after = await self.backend.hit(key, limit, window)
+        if retry_after > 0:
+            self.rejected += 1
+            raise RateLimitExceededError(
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        """Return rate limiter statistics."""
+        return {**self.backend.stats(), "rejected": self.rejected}
+
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    """Build the login rate limit backend from settings."""
+    if settings.LOGIN_RATE_LIMIT_BACKEND == StoreBackend.REDIS:
+        return RedisRateLimitBackend(settings.REDIS_URL)
+    return MemoryRateLimitBackend(max_keys=settings.LOGIN_RATE_LIMIT_MAX_KEYS)
+
+
+login_rate_limiter = RateLimiter(get_rate_limit_backend())
+
+
+async def throttle_login(client_host: Optional[str], email: str) -> None:
+    """Limit login attempts per client IP and per email.
+
+    Runs before the user lookup and password hash, so rejected attempts
+    cost no database or bcrypt work.
+
+    Args:
+        client_host: Client IP address, that of the proxy unless
+            FORWARDED_ALLOW_IPS trusts it
+        email: Email the client tries to log in with
+
+    Raises:
+        RateLimitExceededError: If either limit is exceeded
+
+    """
+    if not settings.LOGIN_RATE_LIMIT_ENABLED:
+        return
+    window = settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS
+    if client_host:
+        await login_rate_limiter.check(
+            f"login:ip:{client_host}", settings.LOGIN_RATE_LIMIT_PER_IP, window
+        )
+    await login_rate_limiter.check(
+        f"login:email:{email.lower()}", settings.LOGIN_RATE_LIMIT_PER_EMAIL, window
+    )
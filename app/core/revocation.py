@@ -0,0 +1,240 @@
+import asyncio
+import contextlib
+import heapq
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.constants import StoreBackend
+
+RevokeCallback = Callable[[str, float], None]
+
+
+class RevocationBackend(ABC):
+    """Shared tier that propagates revocations between processes."""
+
+    @abstractmethod
+    async def publish(self, jti: str, expires_at: float) -> None:
+        """Store a revocation and notify every subscribed process."""
+
+    @abstractmethod
+    async def subscribe(self, callback: RevokeCallback) -> List[Tuple[str, float]]:
+        """Subscribe to revocations and return the ones already stored."""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Release backend resources."""
+
+
+class LocalRevocationBackend(RevocationBackend):
+    """In-memory stand-in for a shared backend, e.g. in tests.
+
+    Stores sharing one instance behave like processes sharing one Redis.
+    """
+
+    def __init__(self) -> None:
+        """Initialize LocalRevocationBackend."""
+        self._revoked: Dict[str, float] = {}
+        self._subscribers: Set[RevokeCallback] = set()
+
+    async def publish(self, jti: str, expires_at: float) -> None:
+        """Store a revocation and notify every subscriber."""
+        self._revoked[jti] = expires_at
+        for callback in list(self._subscribers):
+            callback(jti, expires_at)
+
+    async def subscribe(self, callback: RevokeCallback) -> List[Tuple[str, float]]:
+        """Subscribe to revocations and return the ones already stored."""
+        self._subscribers.add(callback)
+        return list(self._revoked.items())
+
+    async def close(self) -> None:
+        """Drop all subscribers."""
+        self._subscribers.clear()
+
+
+class RedisRevocationBackend(RevocationBackend):
+    """Redis backed revocations, propagated with pub/sub.
+
+    Revoked ids are stored as keys that expire with the token, so a process
+    that starts later can load them. Requires the ``redis`` extra.
+    """
+
+    KEY_PREFIX = "revoked-token:"
+    CHANNEL = "revoked-tokens"
+    # Backoff between attempts to restore a failed subscription
+    RECONNECT_MIN_SECONDS = 0.5
+    RECONNECT_MAX_SECONDS = 30.0
+
+    def __init__(self, url: str) -> None:
+        """Initialize RedisRevocationBackend.
+
+        Args:
+            url: Redis connection URL
+
+        """
+        from redis import asyncio as redis
+
+        self._redis = redis.from_url(url, decode_responses=True)
+        self._pubsub = self._redis.pubsub()
+        self._listener: Optional[asyncio.Task] = None
+
+    async def publish(self, jti: str, expires_at: float) -> None:
+        """Store a revocation and notify every subscribed process."""
+        ttl = max(int(expires_at - time.time()) + 1, 1)
+        await self._redis.set(f"{self.KEY_PREFIX}{jti}", expires_at, ex=ttl)
+        await self._redis.publish(self.CHANNEL, f"{jti} {expires_at}")
+
+    async def subscribe(self, callback: RevokeCallback) -> List[Tuple[str, float]]:
+        """Subscribe to revocations and return the ones already stored."""
+        # Subscribe before loading so no revocation falls in between
+        await self._pubsub.subscribe(self.CHANNEL)
+        self._listener = asyncio.create_task(self._listen(callback))
+        return await self._load()
+
+    async def _load(self) -> List[Tuple[str, float]]:
+        """Return the revocations stored in Redis."""
+        revoked = []
+        async for key in self._redis.scan_iter(match=f"{self.KEY_PREFIX}*"):
+            expires_at = await self._redis.get(key)
+            if expires_at is not None:
+                revoked.append((key.removeprefix(self.KEY_PREFIX), float(expires_at)))
+        return revoked
+
+    async def _listen(self, callback: RevokeCallback) -> None:
+        """Forward published revocations to the callback.
+
+        When the subscription fails, it is opened again after a backoff
+        doubling up to RECONNECT_MAX_SECONDS, and the stored revocations are
+        reloaded so none published in between are missed.
+        """
+        delay = self.RECONNECT_MIN_SECONDS
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    delay = self.RECONNECT_MIN_SECONDS
+                    if message["type"] != "message":
+                        continue
+                    jti, expires_at = message["data"].split(" ", 1)
+                    callback(jti, float(expires_at))
+                # listen() ends when the subscription is dropped
+                raise ConnectionError("Subscription closed")
+            except Exception as e:
+                logger.error(
+                    f"Revocation subscription failed, retrying in {delay}s: {str(e)}"
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.RECONNECT_MAX_SECONDS)
+                await self._resubscribe(callback)
+
+    async def _resubscribe(self, callback: RevokeCallback) -> None:
+        """Open a new subscription and replay the stored revocations."""
+        with contextlib.suppress(Exception):
+            await self._pubsub.aclose()
+        self._pubsub = self._redis.pubsub()
+        try:
+            await self._pubsub.subscribe(self.CHANNEL)
+            for jti, expires_at in await self._load():
+                callback(jti, expires_at)
+        except Exception as e:
+            # The next listen() fails too and backs off further
+            logger.error(f"Revocation resubscription failed: {str(e)}")
+        else:
+            logger.info("Revocation subscription restored")
+
+    async def close(self) -> None:
+        """Stop listening and close the connection."""
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        await self._pubsub.aclose()
+        await self._redis.aclose()
+
+
+class RevocationStore:
+    """Per-process set of revoked token ids with expiry-ordered eviction.
+
+    ``is_revoked`` only reads a local dict, so the common not-revoked path
+    costs a hash lookup; an optional backend pushes revocations made by other
+    processes into the local set.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[RevocationBackend] = None,
+        timer: Callable[[], float] = time.time,
+    ) -> None:
+        """Initialize RevocationStore.
+
+        Args:
+            backend: Optional shared tier
+            timer: Wall clock used to compare with token expiry
+
+        """
+        self.backend = backend
+        self.timer = timer
+        self._revoked: Dict[str, float] = {}
+        self._expiry: List[Tuple[float, str]] = []
+
+    def add(self, jti: str, expires_at: float) -> None:
+        """Mark a token id as revoked in this process until it expires."""
+        if expires_at <= self.timer() or jti in self._revoked:
+            return
+        self._revoked[jti] = expires_at
+        heapq.heappush(self._expiry, (expires_at, jti))
+
+    def _evict_expired(self) -> None:
+        """Drop revocations of tokens that have expired anyway."""
+        now = self.timer()
+        while self._expiry and self._expiry[0][0] <= now:
+            _expires_at, jti = heapq.heappop(self._expiry)
+            self._revoked.pop(jti, None)
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        """Check whether a token id has been revoked."""
+        if self._expiry and self._expiry[0][0] <= self.timer():
+            self._evict_expired()
+        return jti is not None and jti in self._revoked
+
+    async def revoke(self, jti: str, expires_at: float) -> None:
+        """Revoke a token id in this process and in the shared backend."""
+        self.add(jti, expires_at)
+        if self.backend is not None:
+            await self.backend.publish(jti, expires_at)
+
+    async def start(self) -> None:
+        """Load existing revocations and subscribe to new ones."""
+        if self.backend is not None:
+            for jti, expires_at in await self.backend.subscribe(self.add):
+                self.add(jti, expires_at)
+            logger.info(f"Loaded {len(self._revoked)} revoked tokens")
+
+    async def stop(self) -> None:
+        """Close the shared backend."""
+        if self.backend is not None:
+            await self.backend.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return revocation store statistics.
+
+        Returns:
+            Dictionary with backend type and number of revoked tokens
+
+        """
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "size": len(self._revoked),
+        }
+
+
+def get_revocation_backend() -> Optional[RevocationBackend]:
+    """Build the shared revocation backend from settings."""
+    if settings.TOKEN_REVOCATION_BACKEND == StoreBackend.REDIS:
+        return RedisRevocationBackend(settings.REDIS_URL)
+    return None
+
+
+revocation_store = RevocationStore(get_revocation_backend())
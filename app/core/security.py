@@ -1,11 +1,26 @@
+import hashlib
+import time
+import uuid
 from datetime import UTC, datetime, timedelta
-from typing import Optional, Union
+from typing import Optional, Tuple, Union
 
 from jose import JWTError, jwt
 
 from app.core.config import settings
 from app.core.constants import TokenType
+from app.core.keys import KeyRing
+from app.core.metrics import jwt_duration
+from app.core.revocation import revocation_store
 from app.errors.exception import InvalidTokenError, TokenExpiredError
+from app.utils.cache import TTLCache
+
+key_ring = KeyRing.from_settings(settings)
+
+# Verified tokens: sha256(token) -> (user_id, token_type, exp, jti)
+token_cache: TTLCache[bytes, Tuple[int, str, int, Optional[str]]] = TTLCache(
+    maxsize=settings.TOKEN_CACHE_MAX_SIZE,
+    ttl=settings.TOKEN_CACHE_TTL_SECONDS,
+)
 
 
 def create_token(
@@ -36,16 +51,74 @@ def create_token(
             else timedelta(seconds=settings.REFRESH_TOKEN_EXPIRE_SECONDS)
         )
 
-    to_encode = {"exp": expire, "sub": str(subject), "type": token_type}
+    to_encode = {
+        "exp": expire,
+        "sub": str(subject),
+        "type": token_type,
+        "jti": uuid.uuid4().hex,
+    }
+    signing_key = key_ring.active
 
+    start = time.perf_counter()
     try:
-        return jwt.encode(
+        token = jwt.encode(
             to_encode,
-            settings.SECRET_KEY.get_secret_value(),
-            algorithm=settings.SECURITY_ALGORITHM,
+            signing_key.key,
+            algorithm=signing_key.algorithm,
+            headers={"kid": signing_key.kid} if signing_key.kid else None,
         )
     except JWTError as e:
         raise InvalidTokenError(message=str(e)) from e
+    jwt_duration.labels("sign").observe(time.perf_counter() - start)
+    return token
+
+
+def _verify_claims(token: str) -> Tuple[int, str, int, Optional[str]]:
+    """Verify a token's signature and revocation state.
+
+    Successfully verified tokens are cached by digest until their expiry, so
+    a token presented again skips the signature check. The revocation check
+    is a local set lookup and runs on every call.
+
+    Args:
+        token: JWT token to verify
+
+    Returns:
+        Tuple of user ID, token type, expiry timestamp and token ID
+
+    Raises:
+        TokenExpiredError: If token has expired
+        InvalidTokenError: If token is invalid or revoked
+
+    """
+    digest = hashlib.sha256(token.encode()).digest()
+    claims = token_cache.get(digest)
+    if claims is None:
+        start = time.perf_counter()
+        try:
+            verifying_key = key_ring.get(jwt.get_unverified_header(token).get("kid"))
+            payload = jwt.decode(
+                token, verifying_key.verify_key, algorithms=[verifying_key.algorithm]
+            )
+        except jwt.ExpiredSignatureError as e:
+            raise TokenExpiredError from e
+        except JWTError as e:
+            raise InvalidTokenError(message=str(e)) from e
+        jwt_duration.labels("verify").observe(time.perf_counter() - start)
+
+        subject = payload.get("sub")
+        if not subject:
+            raise InvalidTokenError("Token missing user ID")
+        if not subject.isdigit():
+            raise InvalidTokenError("Invalid user ID")
+
+        exp = payload["exp"]
+        claims = (int(subject), payload.get("type"), exp, payload.get("jti"))
+        token_cache.set(digest, claims, ttl=exp - time.time())
+
+    if revocation_store.is_revoked(claims[3]):
+        raise InvalidTokenError("Token has been revoked")
+    return claims
 
 
 def verify_token(
@@ -65,21 +138,31 @@ def verify_token(
         InvalidTokenError: If token is invalid
 
     """
-    try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY.get_secret_value(),
-            algorithms=[settings.SECURITY_ALGORITHM],
-        )
-        if payload.get("type") != token_type:
-            raise InvalidTokenError("Invalid token type")
+    user_id, claimed_type, _exp, _jti = _verify_claims(token)
+    if claimed_type != token_type:
+        raise InvalidTokenError("Invalid token type")
+    return user_id
 
-        user_id = payload.get("sub")
-        if not user_id:
-            raise InvalidTokenError("Token missing user ID")
 
-        return int(user_id)
-    except jwt.ExpiredSignatureError as e:
-        raise TokenExpiredError from e
-    except JWTError as e:
-        raise InvalidTokenError(message=str(e)) from e
+async def revoke_token(token: str, token_type: str = TokenType.ACCESS_TOKEN) -> int:
+    """Revoke a JWT token until it expires.
+
+    Args:
+        token: JWT token to revoke
+        token_type: Type of token ("access" or "refresh")
+
+    Returns:
+        User ID of the revoked token
+
+    Raises:
+        TokenExpiredError: If token has expired
+        InvalidTokenError: If token is invalid, already revoked or has no ID
+
+    """
+    user_id, claimed_type, exp, jti = _verify_claims(token)
+    if claimed_type != token_type:
+        raise InvalidTokenError("Invalid token type")
+    if not jti:
+        raise InvalidTokenError("Token cannot be revoked")
+    await revocation_store.revoke(jti, exp)
+    return user_id
@@ -0,0 +1,265 @@
+import asyncio
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional, Set
+
+from loguru import logger
+from sqlalchemy import Connection, event
+from sqlalchemy.engine.interfaces import DBAPICursor, ExecutionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+
+
+class QueryStats:
+    """SQL statements executed while serving one request."""
+
+    def __init__(self, n_plus_one_threshold: int = 10) -> None:
+        """Initialize QueryStats.
+
+        Args:
+            n_plus_one_threshold: Executions of one statement after which a
+                possible N+1 query is reported, 0 disables the check
+
+        """
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter[str] = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        """Record an executed statement.
+
+        Statements are compared as SQL with placeholders, so the same query
+        with different parameters has one shape.
+        """
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement] += 1
+        threshold = self.n_plus_one_threshold
+        if threshold and self.shapes[statement] == threshold + 1:
+            logger.warning(
+                f"Possible N+1 query: statement executed more than "
+                f"{threshold} times in one request",
+                extra={"statement": statement[:500]},
+            )
+
+    def server_timing(self) -> str:
+        """Return the database time as a ``Server-Timing`` header entry."""
+        return f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries"'
+
+
+# Statements of the request being served, None outside requests
+query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Collect the statements executed in the current context.
+
+    Yields:
+        Statistics filled in as statements run
+
+    """
+    stats = QueryStats(settings.SQL_N_PLUS_ONE_THRESHOLD)
+    token = query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        query_stats.reset(token)
+
+
+def redact(parameters: object) -> object:
+    """Replace parameter values with their type names.
+
+    Keeps the shape of the parameters, which helps tell which query ran,
+    without logging emails, password hashes or tokens.
+    """
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact(value) for value in parameters]
+    return type(parameters).__name__
+
+
+class SlowQueryLog:
+    """Log statements slower than a threshold, optionally with their plan.
+
+    Plans are captured with ``EXPLAIN`` (without ANALYZE, so the statement is
+    not run again) in a background task on a separate pooled connection, at
+    most once per ``explain_interval`` so a slow database is not flooded
+    with EXPLAINs. Logs made while serving a request carry its request ID.
+    """
+
+    # EXPLAIN prefix per dialect; other dialects are not explained
+    EXPLAIN_PREFIXES = {
+        "postgresql": "EXPLAIN (ANALYZE off, FORMAT JSON) ",
+        "sqlite": "EXPLAIN QUERY PLAN ",
+    }
+    EXPLAINABLE = {"SELECT", "WITH", "INSERT", "UPDATE", "DELETE"}
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        threshold: float,
+        explain: bool = False,
+        explain_interval: float = 60.0,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize SlowQueryLog.
+
+        Args:
+            engine: Engine the statements run on, used for EXPLAIN
+            threshold: Seconds after which a statement is slow
+            explain: Whether to capture plans of slow statements
+            explain_interval: Min seconds between two captured plans
+            timer: Monotonic clock
+
+        """
+        self.engine = engine
+        self.threshold = threshold
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self.timer = timer
+        self._next_explain = 0.0
+        self._tasks: Set[asyncio.Task] = set()
+        self.logged = 0
+        self.explained = 0
+
+    def record(
+        self, statement: str, parameters: object, duration: float, executemany: bool
+    ) -> None:
+        """Log a statement if it was slow and schedule its plan capture."""
+        if duration < self.threshold:
+            return
+        self.logged += 1
+        logger.warning(
+            f"Slow query: {duration:.3f}s",
+            extra={
+                "duration": f"{duration:.4f}s",
+                "statement": statement[:2000],
+                "parameters": redact(parameters),
+            },
+        )
+        if self._should_explain(statement, executemany):
+            task = asyncio.get_running_loop().create_task(
+                self._explain(statement, parameters)
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _should_explain(self, statement: str, executemany: bool) -> bool:
+        """Check whether a plan should be captured now, consuming the slot."""
+        if (
+            not self.explain
+            or executemany
+            or self.engine.dialect.name not in self.EXPLAIN_PREFIXES
+            or statement.split(None, 1)[0].upper() not in self.EXPLAINABLE
+        ):
+            return False
+        now = self.timer()
+        if now < self._next_explain:
+            return False
+        self._next_explain = now + self.explain_interval
+        return True
+
+    async def _explain(self, statement: str, parameters: object) -> None:
+        """Capture and log the plan of a statement."""
+        # The capture is not part of the request's queries
+        query_stats.set(None)
+        prefix = self.EXPLAIN_PREFIXES[self.engine.dialect.name]
+        try:
+            async with self.engine.connect() as connection:
+                result = await connection.exec_driver_sql(
+                    prefix + statement, parameters
+                )
+                if self.engine.dialect.name == "postgresql":
+                    plan = result.scalar_one()
+                else:
+                    plan = [list(row) for row in result]
+        except Exception as e:
+            logger.error(f"Failed to explain slow query: {str(e)}")
+            return
+        self.explained += 1
+        logger.warning(
+            "Slow query plan",
+            extra={"statement": statement[:2000], "plan": plan},
+        )
+
+    async def drain(self) -> None:
+        """Wait for the plan captures in progress."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return slow query statistics.
+
+        Returns:
+            Dictionary with threshold and counters
+
+        """
+        return {
+            "threshold": self.threshold,
+            "logged": self.logged,
+            "explained": self.explained,
+        }
+
+
+def get_slow_query_log(engine: AsyncEngine) -> Optional[SlowQueryLog]:
+    """Build the slow query log of an engine from settings."""
+    if settings.SLOW_QUERY_THRESHOLD_SECONDS <= 0:
+        return None
+    return SlowQueryLog(
+        engine,
+        threshold=settings.SLOW_QUERY_THRESHOLD_SECONDS,
+        explain=settings.SLOW_QUERY_EXPLAIN,
+        explain_interval=settings.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS,
+    )
+
+
+def instrument_queries(
+    engine: AsyncEngine, slow_query_log: Optional[SlowQueryLog] = None
+) -> None:
+    """Time the statements an engine executes.
+
+    Durations are added to the current request's ``QueryStats`` and passed
+    to the slow query log. The hooks cost two clock reads and a context
+    variable lookup per statement.
+
+    Args:
+        engine: Instrumented engine
+        slow_query_log: Log of the engine's slow statements
+
+    """
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(
+        conn: Connection,
+        _cursor: DBAPICursor,
+        _statement: str,
+        _parameters: object,
+        _context: Optional[ExecutionContext],
+        _executemany: bool,
+    ) -> None:
+        conn.info["query_start"] = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(
+        conn: Connection,
+        _cursor: DBAPICursor,
+        statement: str,
+        parameters: object,
+        _context: Optional[ExecutionContext],
+        executemany: bool,
+    ) -> None:
+        start = conn.info.pop("query_start", None)
+        if start is None:
+            return
+        duration = time.perf_counter() - start
+        stats = query_stats.get()
+        if stats is not None:
+            stats.record(statement, duration)
+        if slow_query_log is not None:
+            slow_query_log.record(statement, parameters, duration, executemany)
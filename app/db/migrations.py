@@ -0,0 +1,70 @@
+from typing import List, Union
+
+from sqlalchemy import ClauseElement, text
+
+from alembic import op
+
+# Name of the option that marks a migration run as able to build indexes
+# concurrently, set by alembic/env.py on PostgreSQL
+CONCURRENT_INDEXES = "concurrent_indexes"
+
+
+def concurrently() -> bool:
+    """Check whether indexes can be built without blocking writes.
+
+    ``CREATE INDEX CONCURRENTLY`` only exists on PostgreSQL and cannot run in
+    a transaction block, so it also needs a live connection with one
+    transaction per migration; offline SQL scripts use plain statements.
+    """
+    context = op.get_context()
+    return (
+        context.dialect.name == "postgresql"
+        and not context.as_sql
+        and context.opts.get(CONCURRENT_INDEXES, False)
+    )
+
+
+def create_index(
+    name: str,
+    table: str,
+    columns: List[Union[str, ClauseElement]],
+    unique: bool = False,
+) -> None:
+    """Create an index, concurrently on PostgreSQL.
+
+    A concurrent build that fails, e.g. on duplicates or a lock timeout,
+    leaves an INVALID index behind; it is dropped first so the migration can
+    simply be rerun.
+
+    Args:
+        name: Index name
+        table: Table name
+        columns: Column names or expressions
+        unique: Whether the index is unique
+
+    """
+    if not concurrently():
+        op.create_index(name, table, columns, unique=unique)
+        return
+    with op.get_context().autocommit_block():
+        op.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+        op.create_index(
+            name, table, columns, unique=unique, postgresql_concurrently=True
+        )
+
+
+def drop_index(name: str, table: str) -> None:
+    """Drop an index, concurrently on PostgreSQL.
+
+    Args:
+        name: Index name
+        table: Table name
+
+    """
+    if not concurrently():
+        op.drop_index(name, table_name=table)
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            name, table_name=table, postgresql_concurrently=True, if_exists=True
+        )
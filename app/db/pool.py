@@ -0,0 +1,275 @@
+import bisect
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy import event, exc, make_url
+from sqlalchemy.engine.interfaces import DBAPIConnection
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import (
+    AsyncAdaptedQueuePool,
+    ConnectionPoolEntry,
+    PoolProxiedConnection,
+)
+
+from app.core.config import settings
+from app.core.constants import PrePing
+
+# Upper bounds in milliseconds of the checkout wait histogram buckets
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class PoolMetrics:
+    """Checkout statistics of a connection pool.
+
+    Wait times and timeouts are measured around ``Pool.connect``; checkouts,
+    checkins and invalidations are counted through pool events. Wait times
+    go into fixed buckets, so recording one is a bisect and an increment.
+    """
+
+    def __init__(self) -> None:
+        """Initialize PoolMetrics."""
+        self.checkouts = 0
+        self.checkins = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.timeouts = 0
+        self.invalidations = 0
+        self.pings = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_buckets: List[int] = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def observe_wait(self, seconds: float) -> None:
+        """Record the time a checkout waited for a connection."""
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+        self.wait_buckets[bisect.bisect_left(WAIT_BUCKETS_MS, seconds * 1000)] += 1
+
+    def on_checkout(
+        self,
+        _dbapi_connection: DBAPIConnection,
+        _record: ConnectionPoolEntry,
+        _proxy: PoolProxiedConnection,
+    ) -> None:
+        """Count a connection handed out by the pool."""
+        self.checkouts += 1
+        self.in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def on_checkin(
+        self, _dbapi_connection: Optional[DBAPIConnection], _record: ConnectionPoolEntry
+    ) -> None:
+        """Count a connection returned to the pool."""
+        self.checkins += 1
+        self.in_use = max(self.in_use - 1, 0)
+
+    def on_invalidate(
+        self,
+        _dbapi_connection: DBAPIConnection,
+        _record: ConnectionPoolEntry,
+        _exception: Optional[BaseException],
+    ) -> None:
+        """Count a connection discarded as broken or stale."""
+        self.invalidations += 1
+
+    def listen(self, engine: AsyncEngine) -> None:
+        """Register the pool event listeners on an engine.
+
+        Engine level listeners survive ``dispose()``, which replaces the pool.
+        """
+        event.listen(engine.sync_engine, "checkout", self.on_checkout)
+        event.listen(engine.sync_engine, "checkin", self.on_checkin)
+        event.listen(engine.sync_engine, "invalidate", self.on_invalidate)
+
+    def stats(self, pool: Optional[AsyncAdaptedQueuePool] = None) -> Dict[str, Any]:
+        """Return pool statistics.
+
+        Args:
+            pool: Pool whose current size and usage are included
+
+        Returns:
+            Dictionary with pool usage, counters and checkout wait times
+
+        """
+        waits = sum(self.wait_buckets)
+        labels = [str(bound) for bound in WAIT_BUCKETS_MS] + ["+Inf"]
+        current = (
+            {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+                "idle": pool.checkedin(),
+            }
+            if isinstance(pool, AsyncAdaptedQueuePool)
+            else {}
+        )
+        return {
+            **current,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "peak_checked_out": self.peak_in_use,
+            "timeouts": self.timeouts,
+            "invalidations": self.invalidations,
+            "pings": self.pings,
+            "wait": {
+                "count": waits,
+                "avg_ms": self.wait_total / waits * 1000 if waits else 0.0,
+                "max_ms": self.wait_max * 1000,
+                "buckets_ms": dict(zip(labels, self.wait_buckets, strict=True)),
+            },
+        }
+
+
+class MeteredPool(AsyncAdaptedQueuePool):
+    """Queue pool that reports checkout wait times and timeouts."""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def connect(self) -> PoolProxiedConnection:
+        """Check out a connection, recording how long it took."""
+        if self.metrics is None:
+            return super().connect()
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            logger.warning(
+                f"Connection pool exhausted: {self.checkedout()} connections "
+                f"checked out, none free within {self._timeout}s"
+            )
+            raise
+        finally:
+            self.metrics.observe_wait(time.perf_counter() - start)
+
+    def recreate(self) -> "MeteredPool":
+        """Return a new pool with the same configuration and metrics."""
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def ping_idle_connections(
+    engine: AsyncEngine, idle_seconds: float, metrics: Optional[PoolMetrics] = None
+) -> None:
+    """Ping connections on checkout only after they sat idle in the pool.
+
+    ``pool_pre_ping`` costs a round trip on every checkout; connections that
+    were in use moments ago are almost never stale, so only those idle for
+    longer than idle_seconds are pinged. A failed ping makes the pool
+    discard the connection and check out another one.
+
+    Args:
+        engine: Engine whose checkouts are pinged
+        idle_seconds: Idle time after which a connection is pinged
+        metrics: Metrics counting the pings
+
+    """
+    dialect = engine.sync_engine.dialect
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def on_checkin(
+        _dbapi_connection: Optional[DBAPIConnection], record: ConnectionPoolEntry
+    ) -> None:
+        record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def on_checkout(
+        dbapi_connection: DBAPIConnection,
+        record: ConnectionPoolEntry,
+        _proxy: PoolProxiedConnection,
+    ) -> None:
+        checked_in_at = record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+        if metrics is not None:
+            metrics.pings += 1
+        try:
+            dialect.do_ping(dbapi_connection)
+        except Exception as e:
+            raise exc.DisconnectionError(f"Idle connection failed ping: {e}") from e
+
+
+def asyncpg_connect_args(
+    prepared_statement_cache_size: int, pgbouncer: bool
+) -> Dict[str, Any]:
+    """Build the asyncpg connect arguments for prepared statement caching.
+
+    Each connection keeps up to prepared_statement_cache_size prepared
+    statements, so repeated queries skip the server-side parse and plan.
+    PgBouncer in transaction pooling mode hands every transaction a
+    different server connection, where a cached statement may not exist or
+    its name may clash; there both caches are disabled and every statement
+    gets a unique name.
+
+    Args:
+        prepared_statement_cache_size: Prepared statements cached per connection
+        pgbouncer: Whether connections go through PgBouncer transaction pooling
+
+    Returns:
+        Connect arguments of the asyncpg dialect
+
+    """
+    if pgbouncer:
+        return {
+            "prepared_statement_cache_size": 0,
+            "statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    return {"prepared_statement_cache_size": prepared_statement_cache_size}
+
+
+def create_engine(url: str, **pool_options: object) -> AsyncEngine:
+    """Create an async engine with a metered pool configured from settings.
+
+    Args:
+        url: Async database URL
+        pool_options: Overrides of ``pool_size``, ``max_overflow``,
+            ``pool_timeout``, ``pool_recycle``, ``pre_ping`` and
+            ``pre_ping_idle_seconds``, and for asyncpg URLs of
+            ``prepared_statement_cache_size`` and ``pgbouncer``
+
+    Returns:
+        Engine whose pool metrics are at ``engine.pool.metrics``
+
+    """
+    options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pre_ping": settings.DB_POOL_PRE_PING,
+        "pre_ping_idle_seconds": settings.DB_POOL_PRE_PING_IDLE_SECONDS,
+        "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+        "pgbouncer": settings.DB_PGBOUNCER_TRANSACTION_MODE,
+        **pool_options,
+    }
+    pre_ping = options.pop("pre_ping")
+    idle_seconds = options.pop("pre_ping_idle_seconds")
+    cache_size = options.pop("prepared_statement_cache_size")
+    pgbouncer = options.pop("pgbouncer")
+    if make_url(url).get_driver_name() == "asyncpg":
+        options["connect_args"] = asyncpg_connect_args(cache_size, pgbouncer)
+
+    engine = create_async_engine(
+        url,
+        poolclass=MeteredPool,
+        pool_pre_ping=pre_ping == PrePing.ALWAYS,
+        **options,
+    )
+    metrics = PoolMetrics()
+    engine.sync_engine.pool.metrics = metrics
+    # Ping first: a failed ping retries the checkout before it is counted
+    if pre_ping == PrePing.IDLE:
+        ping_idle_connections(engine, idle_seconds, metrics)
+    metrics.listen(engine)
+    return engine
+
+
+def pool_stats(engine: AsyncEngine) -> Dict[str, Any]:
+    """Return the pool statistics of an engine created by ``create_engine``."""
+    pool = engine.sync_engine.pool
+    metrics = getattr(pool, "metrics", None)
+    return metrics.stats(pool) if metrics is not None else {}
@@ -0,0 +1,243 @@
+import itertools
+import math
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Union
+
+from loguru import logger
+from sqlalchemy import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Mapper, Session
+from sqlalchemy.sql import ClauseElement
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.util import await_only
+
+from app.core.constants import ReplicaSelection
+from app.utils.cache import TTLCache
+
+# Pass as ``bind_arguments`` to run a read-only statement on a replica
+READ_REPLICA = {"replica": True}
+
+# Session.info key of the principal whose writes make later reads sticky
+READ_YOUR_WRITES_KEY = "read_your_writes_key"
+
+
+class StickyBackend(ABC):
+    """Storage of the keys that wrote to the primary within the sticky window.
+
+    Called from ``Session.get_bind``, which is synchronous.
+    """
+
+    @abstractmethod
+    def mark(self, key: Hashable) -> None:
+        """Remember key as a recent writer."""
+
+    @abstractmethod
+    def is_sticky(self, key: Hashable) -> bool:
+        """Check whether key wrote within the sticky window."""
+
+    def stats(self) -> Dict[str, Any]:
+        """Return backend statistics."""
+        return {"backend": type(self).__name__}
+
+
+class MemoryStickyBackend(StickyBackend):
+    """Recent writers of this process only.
+
+    With several workers, a user's next request may reach a worker that did
+    not see the write and read from a replica.
+    """
+
+    def __init__(
+        self,
+        sticky_seconds: float,
+        max_keys: int = 100000,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize MemoryStickyBackend.
+
+        Args:
+            sticky_seconds: Seconds reads stay on the primary after a write
+            max_keys: Max keys remembered as recent writers
+            timer: Monotonic clock
+
+        """
+        self._writers: TTLCache[Hashable, bool] = TTLCache(
+            maxsize=max_keys, ttl=sticky_seconds, timer=timer
+        )
+
+    def mark(self, key: Hashable) -> None:
+        """Remember key as a recent writer."""
+        self._writers.set(key, True)
+
+    def is_sticky(self, key: Hashable) -> bool:
+        """Check whether key wrote within the sticky window."""
+        return self._writers.get(key) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return backend statistics."""
+        return {**super().stats(), "keys": len(self._writers)}
+
+
+class RedisStickyBackend(StickyBackend):
+    """Recent writers shared between processes in Redis.
+
+    Each writer is a key expiring with the sticky window. Sessions call the
+    backend from ``get_bind`` within the greenlet of an ``AsyncSession``
+    operation, so Redis is awaited with SQLAlchemy's ``await_only``. When
+    Redis fails, reads go to the primary. Requires the ``redis`` extra.
+    """
+
+    KEY_PREFIX = "read-your-writes:"
+
+    def __init__(self, url: str, sticky_seconds: float) -> None:
+        """Initialize RedisStickyBackend.
+
+        Args:
+            url: Redis connection URL
+            sticky_seconds: Seconds reads stay on the primary after a write
+
+        """
+        from redis import asyncio as redis
+
+        self._redis = redis.from_url(url, decode_responses=True)
+        self.sticky_ms = max(math.ceil(sticky_seconds * 1000), 1)
+        self.errors = 0
+
+    def mark(self, key: Hashable) -> None:
+        """Remember key as a recent writer."""
+        try:
+            await_only(self._redis.set(f"{self.KEY_PREFIX}{key}", 1, px=self.sticky_ms))
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Cannot mark {key} as a recent writer: {str(e)}")
+
+    def is_sticky(self, key: Hashable) -> bool:
+        """Check whether key wrote within the sticky window."""
+        try:
+            return bool(await_only(self._redis.exists(f"{self.KEY_PREFIX}{key}")))
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Cannot check whether {key} wrote recently: {str(e)}")
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Return backend statistics."""
+        return {**super().stats(), "errors": self.errors}
+
+
+class ReplicaRouter:
+    """Choose read replicas and remember who recently wrote to the primary.
+
+    After a write tagged with a key (e.g. a user ID), reads with the same key
+    stay on the primary for ``sticky_seconds``, so they see their own writes
+    while replicas catch up. The window is tracked by ``sticky_backend``, per
+    process unless it is shared, e.g. in Redis.
+    """
+
+    def __init__(
+        self,
+        replicas: Sequence[AsyncEngine],
+        selection: str = ReplicaSelection.ROUND_ROBIN,
+        sticky_seconds: float = 5.0,
+        max_sticky_keys: int = 100000,
+        timer: Callable[[], float] = time.monotonic,
+        sticky_backend: Optional[StickyBackend] = None,
+    ) -> None:
+        """Initialize ReplicaRouter.
+
+        Args:
+            replicas: Engines of the read replicas
+            selection: "round_robin" or "least_connections"
+            sticky_seconds: Seconds reads stay on the primary after a write
+            max_sticky_keys: Max keys remembered as recent writers
+            timer: Monotonic clock
+            sticky_backend: Storage of the recent writers, those of this
+                process if None
+
+        """
+        self.replicas = list(replicas)
+        self.selection = selection
+        self._cycle = itertools.cycle(self.replicas)
+        self.sticky_backend = sticky_backend or MemoryStickyBackend(
+            sticky_seconds, max_sticky_keys, timer
+        )
+        self.replica_reads = 0
+        self.sticky_reads = 0
+
+    def choose(self) -> Engine:
+        """Return the sync engine of the replica for the next read."""
+        self.replica_reads += 1
+        if self.selection == ReplicaSelection.LEAST_CONNECTIONS:
+            replica = min(
+                self.replicas,
+                key=lambda engine: getattr(engine.pool, "checkedout", int)(),
+            )
+        else:
+            replica = next(self._cycle)
+        return replica.sync_engine
+
+    def mark_write(self, key: Optional[Hashable]) -> None:
+        """Keep reads of key on the primary for the sticky window."""
+        if key is not None:
+            self.sticky_backend.mark(key)
+
+    def is_sticky(self, key: Optional[Hashable]) -> bool:
+        """Check whether key wrote within the sticky window."""
+        return key is not None and self.sticky_backend.is_sticky(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return routing statistics.
+
+        Returns:
+            Dictionary with replica count and read counters
+
+        """
+        return {
+            "replicas": len(self.replicas),
+            "selection": self.selection,
+            "replica_reads": self.replica_reads,
+            "sticky_reads": self.sticky_reads,
+            "sticky": self.sticky_backend.stats(),
+        }
+
+
+class RoutingSession(Session):
+    """Session that runs statements marked with ``READ_REPLICA`` on a replica.
+
+    Everything else, and every read after the session has written, goes to
+    the primary. Without a router all statements go to the primary.
+    """
+
+    def __init__(
+        self, *args: object, router: Optional[ReplicaRouter] = None, **kwargs: object
+    ) -> None:
+        """Initialize RoutingSession.
+
+        Args:
+            args: Positional arguments of ``Session``
+            router: Replica router, None to disable routing
+            kwargs: Keyword arguments of ``Session``
+
+        """
+        super().__init__(*args, **kwargs)
+        self.router = router
+
+    def get_bind(
+        self,
+        mapper: Optional[Union[Mapper, type]] = None,
+        clause: Optional[ClauseElement] = None,
+        replica: bool = False,
+        **kwargs: object,
+    ) -> Engine:
+        """Return the engine a statement runs on."""
+        if self.router is not None:
+            key = self.info.get(READ_YOUR_WRITES_KEY)
+            if self._flushing or isinstance(clause, UpdateBase):
+                self.info["wrote"] = True
+                self.router.mark_write(key)
+            elif replica and not self.info.get("wrote"):
+                if not self.router.is_sticky(key):
+                    return self.router.choose()
+                self.router.sticky_reads += 1
+        return super().get_bind(mapper, clause=clause, **kwargs)
@@ -1,27 +1,72 @@
-from typing import AsyncGenerator
+from typing import Optional
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.core.constants import StoreBackend
+from app.db.instrumentation import (
+    SlowQueryLog,
+    get_slow_query_log,
+    instrument_queries,
+)
+from app.db.pool import create_engine
+from app.db.routing import (
+    RedisStickyBackend,
+    ReplicaRouter,
+    RoutingSession,
+    StickyBackend,
+)
+
+async_engine = create_engine(settings.ASYNC_DATABASE_URL)
+
 
-async_engine = create_async_engine(
-    settings.ASYNC_DATABASE_URL,
-    pool_pre_ping=True,
-    future=True,
+def get_sticky_backend() -> Optional[StickyBackend]:
+    """Build the read-your-writes backend from settings, None for in-process."""
+    if settings.READ_YOUR_WRITES_BACKEND == StoreBackend.REDIS:
+        return RedisStickyBackend(settings.REDIS_URL, settings.READ_YOUR_WRITES_SECONDS)
+    return None
+
+
+replica_router = (
+    ReplicaRouter(
+        [create_engine(url) for url in settings.READ_DATABASE_URLS],
+        selection=settings.READ_REPLICA_SELECTION,
+        sticky_seconds=settings.READ_YOUR_WRITES_SECONDS,
+        sticky_backend=get_sticky_backend(),
+    )
+    if settings.READ_DATABASE_URLS
+    else None
 )
 
+
+def instrument(engine: AsyncEngine) -> Optional[SlowQueryLog]:
+    """Instrument an engine's statements as configured.
+
+    Args:
+        engine: Primary or replica engine
+
+    Returns:
+        Slow query log of the engine, None if disabled
+
+    """
+    slow_query_log = get_slow_query_log(engine)
+    if settings.SQL_INSTRUMENTATION_ENABLED or slow_query_log is not None:
+        instrument_queries(engine, slow_query_log)
+    return slow_query_log
+
+
+# Slow query logs of the primary and replica engines
+slow_query_logs = [
+    slow_query_log
+    for engine in [async_engine, *(replica_router.replicas if replica_router else [])]
+    if (slow_query_log := instrument(engine)) is not None
+]
+
 AsyncSessionLocal = sessionmaker(
     async_engine,
     class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    router=replica_router,
     expire_on_commit=False,
 )
-
-
-async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
-    """Get an async database session."""
-    async with AsyncSessionLocal() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
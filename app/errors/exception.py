@@ -11,6 +11,7 @@ class BaseError(Exception):
         message: Optional[str] = None,
         code: Optional[str] = None,
         status_code: Optional[int] = None,
+        headers: Optional[Dict[str, str]] = None,
     ) -> None:
         """Initialize error.
 
@@ -18,11 +19,13 @@ class BaseError(Exception):
             message: Error message
             code: Error code
             status_code: HTTP status code
+            headers: Extra HTTP response headers, e.g. Retry-After
 
         """
         self.message = message or self.message
         self.code = code or self.code
         self.status_code = status_code or self.status_code
+        self.headers = headers
         super().__init__(self.message)
 
     def to_dict(self) -> Dict[str, Any]:
@@ -1,3 +1,5 @@
+import asyncio
+import contextlib
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
@@ -5,12 +7,19 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from loguru import logger
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 
-from app.api import router
+from app.api import jwks, metrics, router
 from app.core.config import settings
+from app.core.hashing import password_hasher
+from app.core.metrics import mark_process_dead
+from app.core.profiling import start_stack_sampler, stop_stack_sampler
+from app.core.revocation import revocation_store
+from app.db.session import slow_query_logs
 from app.errors.exception import BaseError
 from app.errors.exception_hanlder import http_exception_handler
-from app.middleware import LoggingMiddleware
+from app.middleware import LoggingMiddleware, MetricsMiddleware, ProfilingMiddleware
+from app.services.last_login import last_login_buffer
 from app.utils.logging_config import setup_logging
 
 
@@ -20,11 +29,34 @@ async def lifespan(_app: FastAPI) -> AsyncGenerator[None, None]:
     # Startup
     setup_logging()
     logger.info("Running application startup tasks...")
+    await revocation_store.start()
+    if settings.LAST_LOGIN_WRITE_BEHIND:
+        last_login_buffer.start()
+    if settings.CONTINUOUS_PROFILING_ENABLED:
+        start_stack_sampler()
+    metrics_task = (
+        asyncio.create_task(
+            metrics.publish_pool_metrics_periodically(settings.METRICS_REFRESH_SECONDS)
+        )
+        if settings.METRICS_ENABLED
+        else None
+    )
 
     yield
 
     # Shutdown
     logger.info("Running application shutdown tasks...")
+    await last_login_buffer.stop()
+    for slow_query_log in slow_query_logs:
+        await slow_query_log.drain()
+    password_hasher.shutdown()
+    await revocation_store.stop()
+    if metrics_task is not None:
+        metrics_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await metrics_task
+    mark_process_dead()
+    stop_stack_sampler()
 
 
 def get_application() -> FastAPI:
@@ -37,9 +69,17 @@ def get_application() -> FastAPI:
         lifespan=lifespan,
     )
 
+    # Add Profiling Middleware, innermost so it profiles the app only
+    if settings.PROFILING_ENABLED:
+        application.add_middleware(ProfilingMiddleware)
+
     # Add Logging Middleware
     application.add_middleware(LoggingMiddleware)
 
+    # Add Metrics Middleware, outside logging so it times the whole request
+    if settings.METRICS_ENABLED:
+        application.add_middleware(MetricsMiddleware)
+
     # Set CORS middleware
     if settings.ALLOW_ORIGINS:
         application.add_middleware(
@@ -50,11 +90,21 @@ def get_application() -> FastAPI:
             allow_headers=["*"],
         )
 
+    # Take the client IP from X-Forwarded-For when set by a trusted proxy, so
+    # per-IP login limits apply to clients rather than to the load balancer
+    if settings.FORWARDED_ALLOW_IPS:
+        application.add_middleware(
+            ProxyHeadersMiddleware, trusted_hosts=settings.FORWARDED_ALLOW_IPS
+        )
+
     # Add exception handler
     application.add_exception_handler(BaseError, http_exception_handler)  # type: ignore
 
     # Add routes
     application.include_router(router, prefix=settings.API_V1_STR)
+    application.include_router(jwks.router, tags=["jwks"], prefix="/.well-known")
+    if settings.METRICS_ENABLED:
+        application.include_router(metrics.router, tags=["metrics"], prefix="/metrics")
 
     logger.info("Application startup complete")
     return application
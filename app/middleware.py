@@ -1,59 +1,378 @@
+import asyncio
+import contextlib
+import json
+import random
 import time
 import uuid
-from typing import Callable
+from typing import Any, Dict, Iterable, Optional
+
+from fastapi import Request, Response
+from fastapi.security.utils import get_authorization_scheme_param
 
 from loguru import logger
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
-from starlette.types import ASGIApp
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from app.api.deps import authenticate
+from app.core.config import settings
+from app.core.constants import ProfileFormat
+from app.core.metrics import request_duration, requests_in_progress, response_size
+from app.db.instrumentation import QueryStats, track_queries
+from app.db.session import AsyncSessionLocal
+from app.errors.exception import BadRequestError, BaseError, UnauthorizedError
+from app.errors.exception_hanlder import http_exception_handler
+from app.utils.profiling import TaskSampler
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware for logging requests and responses."""
 
-    def __init__(self, app: ASGIApp) -> None:
-        """Initialize the LoggingMiddleware."""
-        super().__init__(app)
+def query_extra(queries: Optional[QueryStats]) -> Dict[str, Any]:
+    """Return the log fields of the SQL statements a request executed."""
+    if queries is None:
+        return {}
+    return {"db_queries": queries.count, "db_time": f"{queries.duration:.4f}s"}
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """Dispatch the request and log details."""
-        request_id = str(uuid.uuid4())
 
-        with logger.contextualize(request_id=request_id):
-            logger.info(
-                "Request",
-                extra={
-                    "method": request.method,
-                    "url": str(request.url),
-                    "headers": dict(request.headers),
-                    "client_host": request.client.host if request.client else None,
-                },
+class RouteTemplates:
+    """Path templates of the routes that served requests."""
+
+    def __init__(self) -> None:
+        """Initialize RouteTemplates."""
+        # id() of route -> path template; routes define __eq__ and live as
+        # long as the app
+        self._templates: Dict[int, str] = {}
+
+    def __call__(self, scope: Scope) -> Optional[str]:
+        """Return the path template of the route that served a request.
+
+        Routes of included routers may only know their path below the router
+        prefix; the prefix is the part of the request path before the part
+        the route matched. Templates are cached per route.
+        """
+        route = scope.get("route")
+        if route is None:
+            return None
+        template = self._templates.get(id(route))
+        if template is None:
+            path = scope["path"]
+            # Routes at the router root, like "", match the empty remainder
+            prefix_end = next(
+                (
+                    index
+                    for index in range(len(path) + 1)
+                    if path[index : index + 1] in ("/", "")
+                    and route.path_regex.match(path[index:])
+                ),
+                0,
             )
+            template = path[:prefix_end] + route.path_format
+            self._templates[id(route)] = template
+        return template
 
-            start_time = time.time()
 
-            try:
-                response = await call_next(request)
-                process_time = time.time() - start_time
-
-                logger.info(
-                    "Response",
-                    extra={
-                        "status_code": response.status_code,
-                        "processing_time": f"{process_time:.4f}s",
-                    },
-                )
+class LoggingMiddleware:
+    """Middleware for logging requests and responses.
+
+    A plain ASGI middleware: the app runs in the caller's task and messages
+    pass straight through, so streaming responses are not buffered and
+    client disconnects reach the app. ``send`` is wrapped to record the
+    status code and body size.
+
+    Each request is logged once, when it completes. Requests that fail,
+    return an error status or are slow are always logged; successful ones
+    are sampled at the rate of their route.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        headers: Optional[Iterable[str]] = None,
+        sample_rate: Optional[float] = None,
+        route_sample_rates: Optional[Dict[str, float]] = None,
+        slow_request_seconds: Optional[float] = None,
+    ) -> None:
+        """Initialize the LoggingMiddleware.
+
+        Args:
+            app: ASGI application
+            headers: Request headers included in logs
+            sample_rate: Share of successful requests logged
+            route_sample_rates: Sample rates by route template
+            slow_request_seconds: Duration after which requests are always logged
+
+        """
+        self.app = app
+        self.headers = {
+            header.lower().encode("latin-1")
+            for header in (settings.LOG_REQUEST_HEADERS if headers is None else headers)
+        }
+        self.sample_rate = (
+            settings.LOG_SAMPLE_RATE if sample_rate is None else sample_rate
+        )
+        self.route_sample_rates = (
+            settings.LOG_ROUTE_SAMPLE_RATES
+            if route_sample_rates is None
+            else route_sample_rates
+        )
+        self.slow_request_seconds = (
+            settings.LOG_SLOW_REQUEST_SECONDS
+            if slow_request_seconds is None
+            else slow_request_seconds
+        )
+        self.route_template = RouteTemplates()
+
+    def should_log(
+        self, route: Optional[str], status_code: Optional[int], duration: float
+    ) -> bool:
+        """Decide whether a completed request is logged."""
+        if status_code is None or status_code >= 400:
+            return True
+        if duration >= self.slow_request_seconds:
+            return True
+        rate = self.route_sample_rates.get(route, self.sample_rate)
+        return rate >= 1 or random.random() < rate  # noqa: S311
 
-                return response
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handle a request and log details."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
+        request_id = str(uuid.uuid4())
+        status_code: Optional[int] = None
+        body_size = 0
+
+        with logger.contextualize(request_id=request_id), (
+            track_queries()
+            if settings.SQL_INSTRUMENTATION_ENABLED
+            else contextlib.nullcontext()
+        ) as queries:
+
+            async def send_wrapper(message: Message) -> None:
+                nonlocal status_code, body_size
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    if queries is not None and settings.SERVER_TIMING_HEADER:
+                        # Headers are optional in ASGI messages
+                        message.setdefault("headers", [])
+                        headers = MutableHeaders(scope=message)
+                        headers.append("Server-Timing", queries.server_timing())
+                elif message["type"] == "http.response.body":
+                    body_size += len(message.get("body", b""))
+                await send(message)
+
+            start_time = time.perf_counter()
+            error: Optional[Exception] = None
+            try:
+                await self.app(scope, receive, send_wrapper)
             except Exception as e:
-                process_time = time.time() - start_time
-                logger.error(
-                    f"Request failed: {str(e)}",
-                    extra={
-                        "processing_time": f"{process_time:.4f}s",
-                        "error": str(e),
-                    },
-                )
+                error = e
                 raise
+            finally:
+                process_time = time.perf_counter() - start_time
+                route = self.route_template(scope)
+                if error is not None or self.should_log(
+                    route, status_code, process_time
+                ):
+                    self.log(
+                        scope,
+                        route,
+                        status_code,
+                        body_size,
+                        process_time,
+                        queries,
+                        error,
+                    )
+
+    def log(
+        self,
+        scope: Scope,
+        route: Optional[str],
+        status_code: Optional[int],
+        body_size: int,
+        process_time: float,
+        queries: Optional[QueryStats],
+        error: Optional[Exception],
+    ) -> None:
+        """Log a completed request."""
+        client = scope.get("client")
+        extra = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "query": scope["query_string"].decode("latin-1"),
+            "route": route,
+            "headers": {
+                name.decode("latin-1"): value.decode("latin-1")
+                for name, value in scope["headers"]
+                if name in self.headers
+            },
+            "client_host": client[0] if client else None,
+            "status_code": status_code,
+            "response_size": body_size,
+            "processing_time": f"{process_time:.4f}s",
+            **query_extra(queries),
+        }
+        if error is not None:
+            logger.error(
+                f"Request failed: {str(error)}", extra={**extra, "error": str(error)}
+            )
+        else:
+            logger.info("Request", extra=extra)
+
+
+class MetricsMiddleware:
+    """Middleware recording request metrics.
+
+    Latency and response size are labelled by route template rather than
+    URL, so the number of series stays bounded; requests no route matched
+    share the "unmatched" route.
+    """
+
+    # Methods recorded as such, others are recorded as "other"
+    METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Initialize the MetricsMiddleware.
+
+        Args:
+            app: ASGI application
+
+        """
+        self.app = app
+        self.route_template = RouteTemplates()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handle a request and record its metrics."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"] if scope["method"] in self.METHODS else "other"
+        status_code = 500
+        body_size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, body_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                body_size += len(message.get("body", b""))
+            await send(message)
+
+        in_progress = requests_in_progress.labels(method)
+        in_progress.inc()
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start_time
+            in_progress.dec()
+            route = self.route_template(scope) or "unmatched"
+            request_duration.labels(method, route, str(status_code)).observe(duration)
+            response_size.labels(method, route).observe(body_size)
+
+
+class ProfilingMiddleware:
+    """Middleware profiling requests on demand.
+
+    A request sent with ``X-Profile: collapsed`` or ``X-Profile: speedscope``
+    by an active superuser runs under a sampling profiler, and the profile is
+    returned instead of the response, whose status is in ``X-Profile-Status``.
+    Other requests only pay for looking for the header; no profiler runs.
+    """
+
+    HEADER = b"x-profile"
+    FORMATS = {
+        ProfileFormat.COLLAPSED: "text/plain; charset=utf-8",
+        ProfileFormat.SPEEDSCOPE: "application/json",
+    }
+
+    def __init__(self, app: ASGIApp, interval: Optional[float] = None) -> None:
+        """Initialize the ProfilingMiddleware.
+
+        Args:
+            app: ASGI application
+            interval: Seconds between two stack samples
+
+        """
+        self.app = app
+        self.interval = (
+            settings.PROFILING_INTERVAL_SECONDS if interval is None else interval
+        )
+
+    def requested_format(self, scope: Scope) -> Optional[str]:
+        """Return the profile format a request asks for, None if none.
+
+        Only a header asks for one, so query parameters stay the routes' own.
+        """
+        for name, value in scope["headers"]:
+            if name == self.HEADER:
+                return value.decode("latin-1")
+        return None
+
+    async def authorize(self, scope: Scope) -> None:
+        """Check a request comes from an active superuser.
+
+        Raises:
+            UnauthorizedError: If the request has no bearer token
+            BaseError: If ``authenticate`` rejects the user
+
+        """
+        authorization = Headers(scope=scope).get("authorization")
+        scheme, token = get_authorization_scheme_param(authorization)
+        if scheme.lower() != "bearer" or not token:
+            raise UnauthorizedError
+        async with AsyncSessionLocal() as session:
+            await authenticate(session, token, superuser=True)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handle a request, profiling it if asked to."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        profile_format = self.requested_format(scope)
+        if profile_format is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            if profile_format not in self.FORMATS:
+                raise BadRequestError(
+                    message=f"Profile format must be one of {', '.join(self.FORMATS)}"
+                )
+            await self.authorize(scope)
+        except BaseError as e:
+            response = await http_exception_handler(Request(scope), e)
+            await response(scope, receive, send)
+            return
+
+        status_code: Optional[int] = None
+
+        async def discard(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+        sampler = TaskSampler(asyncio.current_task(), self.interval)
+        start_time = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            sampler.stop()
+        duration = time.perf_counter() - start_time
+
+        name = f"{scope['method']} {scope['path']}"
+        body = (
+            json.dumps(sampler.table.speedscope(name))
+            if profile_format == ProfileFormat.SPEEDSCOPE
+            else sampler.table.collapsed()
+        )
+        response = Response(
+            body,
+            media_type=self.FORMATS[profile_format],
+            headers={
+                "X-Profile-Status": str(status_code),
+                "X-Profile-Duration": f"{duration:.4f}",
+                "X-Profile-Samples": str(sampler.samples),
+            },
+        )
+        await response(scope, receive, send)
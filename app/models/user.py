@@ -1,25 +1,25 @@
 from datetime import UTC, datetime
 from typing import Optional
 
-from passlib.context import CryptContext
-from sqlalchemy import Boolean, DateTime, Integer, String
+from sqlalchemy import Boolean, DateTime, Index, Integer, String, func
 from sqlalchemy.orm import Mapped, mapped_column
 
+from app.core.hashing import password_hasher, pwd_context
 from app.db.base import Base
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 class User(Base):
     """User model."""
 
     __tablename__ = "users"
+    # Keyset pagination by date_joined seeks on (date_joined, id)
+    __table_args__ = (Index("ix_users_date_joined_id", "date_joined", "id"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     username: Mapped[str] = mapped_column(String(150), unique=True, index=True)
     first_name: Mapped[Optional[str]] = mapped_column(String(150), default="")
     last_name: Mapped[Optional[str]] = mapped_column(String(150), default="")
-    email: Mapped[str] = mapped_column(String(254), unique=True, index=True)
+    email: Mapped[str] = mapped_column(String(254))
     password: Mapped[str] = mapped_column(String(128))
     is_superuser: Mapped[bool] = mapped_column(Boolean, default=False)
     is_staff: Mapped[bool] = mapped_column(Boolean, default=False)
@@ -120,6 +120,27 @@ class User(Base):
         """
         return pwd_context.verify(password, self.password)
 
+    async def aset_password(self, password: str) -> None:
+        """Set password without blocking the event loop.
+
+        Args:
+            password: Plain text password
+
+        """
+        self.password = await password_hasher.hash(password)
+
+    async def acheck_password(self, password: str) -> bool:
+        """Check if password is correct without blocking the event loop.
+
+        Args:
+            password: Plain text password to check
+
+        Returns:
+            True if password is correct, False otherwise
+
+        """
+        return await password_hasher.verify(password, self.password)
+
     def set_unusable_password(self) -> None:
         """Set a user's password to an unusable value."""
         self.password = self.UNUSUAL_PASSWORD
@@ -127,3 +148,7 @@ class User(Base):
     def has_usable_password(self) -> bool:
         """Return False if set_unusable_password() has been called for this user."""
         return self.password == self.UNUSUAL_PASSWORD
+
+
+# Emails are unique and looked up regardless of case
+Index("ix_users_email_lower", func.lower(User.email), unique=True)
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Optional
 
 from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
 from typing_extensions import Annotated
@@ -34,6 +35,12 @@ class RefreshTokenRequest(BaseModel):
     refresh_token: str = Field(..., description="JWT refresh token")
 
 
+class LogoutRequest(BaseModel):
+    """Schema for logout request."""
+
+    refresh_token: Optional[str] = Field(None, description="JWT refresh token")
+
+
 class RegisterRequest(BaseModel):
     """Schema for user registration request."""
 
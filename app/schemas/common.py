@@ -1,4 +1,4 @@
-from typing import Generic, List, TypeVar
+from typing import Generic, List, Optional, TypeVar
 
 from pydantic import BaseModel
 
@@ -29,7 +29,8 @@ class PaginatedResponse(ResponseSchema, Generic[T]):
     """Schema for paginated response."""
 
     items: List[T]
-    total: int
+    total: Optional[int] = None
     skip: int
     limit: int
     has_more: bool
+    next_cursor: Optional[str] = None
@@ -1,5 +1,5 @@
-from datetime import datetime
-from typing import Optional
+from datetime import UTC, datetime
+from typing import List, Optional
 
 from pydantic import BaseModel, ConfigDict, EmailStr, Field
 from typing_extensions import Annotated
@@ -34,6 +34,30 @@ class UserCreate(UserBase):
     password: Annotated[str, Field(..., min_length=8, max_length=128)]
 
 
+class UserImport(UserCreate):
+    """Schema for a row of a user import."""
+
+    date_joined: datetime = Field(
+        default_factory=lambda: datetime.now(UTC), description="Date user joined"
+    )
+
+
+class UserImportError(BaseModel):
+    """Schema for a row that could not be imported."""
+
+    line: int = Field(..., description="Line of the row in the import body")
+    code: str = Field(..., description="Error code")
+    message: str = Field(..., description="Error message")
+
+
+class UserImportResult(BaseModel):
+    """Schema for the result of a user import."""
+
+    created: int = Field(..., description="Number of users created")
+    failed: int = Field(..., description="Number of rows not imported")
+    errors: List[UserImportError] = Field(..., description="Rows not imported")
+
+
 class UserUpdate(BaseModel):
     """Schema for updating a user."""
 
@@ -46,6 +70,40 @@ class UserUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 
+class UserBatchChanges(BaseModel):
+    """Schema for the changes applied to every user of a batch."""
+
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    is_active: Optional[bool] = None
+
+
+class UserBatchDelete(BaseModel):
+    """Schema for deleting a batch of users."""
+
+    ids: Annotated[List[int], Field(..., min_length=1, max_length=10000)]
+
+
+class UserBatchUpdate(BaseModel):
+    """Schema for updating a batch of users."""
+
+    ids: Annotated[List[int], Field(..., min_length=1, max_length=10000)]
+    changes: UserBatchChanges = Field(..., description="Changes to apply")
+
+
+class UserBatchOutcome(BaseModel):
+    """Schema for the outcome of one user of a batch."""
+
+    id: int = Field(..., description="User ID")
+    status: str = Field(..., description="updated, deleted or not_found")
+
+
+class UserBatchResult(BaseModel):
+    """Schema for the result of a batch operation."""
+
+    results: List[UserBatchOutcome] = Field(..., description="Outcome per user ID")
+
+
 class UserInDBBase(UserBase):
     """Base schema for user in database."""
 
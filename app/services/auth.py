@@ -1,20 +1,20 @@
 from datetime import datetime
+from typing import Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.constants import TokenType
-from app.core.security import create_token, verify_token
+from app.core.security import create_token, revoke_token, verify_token
 from app.errors.exception import (
-    EmailAlreadyExistError,
     InvalidTokenError,
     TokenExpiredError,
     UserIsInactiveError,
-    UsernameAlreadyExistError,
     UsernameOrPasswordIsIncorrectError,
 )
 from app.models.user import User
 from app.schemas.auth import LoginRequest, RegisterRequest, TokenResponse
-from app.services.users import UserService
+from app.services.last_login import last_login_buffer
+from app.services.users import UserService, user_cache
 
 
 class AuthService:
@@ -27,28 +27,17 @@ class AuthService:
 
     async def register(self, register_data: RegisterRequest) -> User:
         """Register a new user."""
-        email = str(register_data.email)
-
-        if await self.user_service.get_by_email(email):
-            raise EmailAlreadyExistError
-        if await self.user_service.get_by_username(register_data.username):
-            raise UsernameAlreadyExistError
-
-        user = User(
-            email=email,
-            username=register_data.username,
-            first_name=register_data.first_name,
-            last_name=register_data.last_name,
-            is_active=True,
-            date_joined=datetime.now(),
+        return await self.user_service.insert_with_password(
+            {
+                "email": str(register_data.email),
+                "username": register_data.username,
+                "first_name": register_data.first_name,
+                "last_name": register_data.last_name,
+                "is_active": True,
+                "date_joined": datetime.now(),
+            },
+            register_data.password,
         )
-        user.set_password(register_data.password)
-
-        self.db.add(user)
-        await self.db.commit()
-        await self.db.refresh(user)
-
-        return user
 
     async def login(self, login_data: LoginRequest) -> TokenResponse:
         """Authenticate user and return tokens."""
@@ -63,8 +52,12 @@ class AuthService:
         if not user.is_active:
             raise UserIsInactiveError
 
-        user.last_login = datetime.now()
-        await self.db.commit()
+        if last_login_buffer.running:
+            last_login_buffer.record(user.id, datetime.now())
+        else:
+            user.last_login = datetime.now()
+            await self.db.commit()
+        user_cache.pop(user.id)
 
         return TokenResponse(
             access_token=create_token(user.id, TokenType.ACCESS_TOKEN),
@@ -91,6 +84,13 @@ class AuthService:
         except Exception as e:
             raise InvalidTokenError from e
 
-    async def logout(self, _user: User) -> dict:
-        """Logout user."""
+    async def logout(
+        self, user: User, access_token: str, refresh_token: Optional[str] = None
+    ) -> dict:
+        """Logout user by revoking the access and optional refresh token."""
+        if refresh_token:
+            if verify_token(refresh_token, TokenType.REFRESH_TOKEN) != user.id:
+                raise InvalidTokenError
+            await revoke_token(refresh_token, TokenType.REFRESH_TOKEN)
+        await revoke_token(access_token, TokenType.ACCESS_TOKEN)
         return {"message": "Successfully logged out"}
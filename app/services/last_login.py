@@ -0,0 +1,185 @@
+import asyncio
+import contextlib
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import DateTime, Integer, column, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.user import User
+from app.services.users import user_cache
+
+
+class LastLoginBuffer:
+    """Write-behind buffer for ``users.last_login``.
+
+    Logins record ``(user_id, last_login)`` in memory and return without a
+    commit. A background task writes the pending values in bulk every
+    ``flush_interval`` seconds, or sooner once ``batch_size`` users are
+    pending, and the buffer is drained on shutdown. After a failed flush the
+    rows stay buffered and the next attempt waits twice as long as the
+    previous one, up to ``max_retry_delay`` seconds.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        flush_interval: float = 1.0,
+        batch_size: int = 500,
+        max_retry_delay: float = 60.0,
+    ) -> None:
+        """Initialize LastLoginBuffer.
+
+        Args:
+            session_factory: Factory of sessions used to write
+            flush_interval: Seconds between flushes
+            batch_size: Pending users that trigger an early flush, and rows
+                per UPDATE statement
+            max_retry_delay: Max seconds between attempts after failed flushes
+
+        """
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_retry_delay = max_retry_delay
+        self._pending: Dict[int, datetime] = {}
+        self._flush_requested = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.flushed = 0
+        self.failed_flushes = 0
+        self.consecutive_failures = 0
+
+    @property
+    def running(self) -> bool:
+        """Return True while the background flusher runs."""
+        return self._task is not None
+
+    def _buffer(self, user_id: int, last_login: datetime) -> None:
+        """Keep the latest login of a user."""
+        current = self._pending.get(user_id)
+        if current is None or last_login > current:
+            self._pending[user_id] = last_login
+
+    def record(self, user_id: int, last_login: datetime) -> None:
+        """Buffer a login; only the latest login per user is written."""
+        self._buffer(user_id, last_login)
+        if len(self._pending) >= self.batch_size:
+            self._flush_requested.set()
+
+    @property
+    def retry_delay(self) -> float:
+        """Return the seconds to wait before retrying failed flushes."""
+        return min(
+            self.flush_interval * 2**self.consecutive_failures, self.max_retry_delay
+        )
+
+    async def _write(
+        self, session: AsyncSession, rows: List[Tuple[int, datetime]]
+    ) -> None:
+        """Write one batch of last logins."""
+        if session.bind.dialect.name == "postgresql":
+            # UPDATE users SET ... FROM (VALUES ...) in a single statement
+            data = values(
+                column("id", Integer),
+                column("last_login", DateTime(timezone=True)),
+                name="last_logins",
+            ).data(rows)
+            await session.execute(
+                update(User)
+                .where(User.id == data.c.id)
+                .values(last_login=data.c.last_login)
+                .execution_options(synchronize_session=False)
+            )
+        else:
+            await session.execute(
+                update(User),
+                [{"id": user_id, "last_login": login} for user_id, login in rows],
+            )
+
+    async def flush(self) -> None:
+        """Write all pending last logins."""
+        self._flush_requested.clear()
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        rows = list(pending.items())
+        try:
+            async with self.session_factory() as session:
+                for start in range(0, len(rows), self.batch_size):
+                    await self._write(session, rows[start : start + self.batch_size])
+                await session.commit()
+        except Exception as e:
+            self.failed_flushes += 1
+            self.consecutive_failures += 1
+            logger.error(
+                f"Failed to write {len(rows)} last logins, "
+                f"retrying in {self.retry_delay}s: {str(e)}"
+            )
+            # Buffered again without requesting a flush, so the retry waits
+            for user_id, last_login in rows:
+                self._buffer(user_id, last_login)
+            return
+
+        self.consecutive_failures = 0
+        self.flushed += len(rows)
+        for user_id, _last_login in rows:
+            user_cache.pop(user_id)
+
+    async def _run(self) -> None:
+        """Flush periodically or when enough logins are pending.
+
+        After a failed flush only stopping cuts the retry delay short; a
+        full buffer does not.
+        """
+        while not self._stopping.is_set():
+            wake_up = (
+                self._stopping if self.consecutive_failures else self._flush_requested
+            )
+            timeout = (
+                self.retry_delay if self.consecutive_failures else self.flush_interval
+            )
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(wake_up.wait(), timeout=timeout)
+            await self.flush()
+
+    def start(self) -> None:
+        """Start the background flusher."""
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background flusher and drain the buffer."""
+        if self._task is not None:
+            # Let an in-progress flush finish instead of cancelling it
+            self._stopping.set()
+            self._flush_requested.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return buffer statistics.
+
+        Returns:
+            Dictionary with pending, written and failure counts
+
+        """
+        return {
+            "running": self.running,
+            "pending": len(self._pending),
+            "flushed": self.flushed,
+            "failed_flushes": self.failed_flushes,
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+last_login_buffer = LastLoginBuffer(
+    AsyncSessionLocal,
+    flush_interval=settings.LAST_LOGIN_FLUSH_INTERVAL_SECONDS,
+    batch_size=settings.LAST_LOGIN_BATCH_SIZE,
+)
@@ -0,0 +1,222 @@
+from datetime import UTC, datetime
+from typing import Any, AsyncIterable, Dict, List, Optional, Set, Tuple
+
+from pydantic import ValidationError as PydanticValidationError
+from sqlalchemy import DateTime, func, insert, or_, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.hashing import password_hasher
+from app.errors.exception import (
+    BaseError,
+    EmailAlreadyExistError,
+    UsernameAlreadyExistError,
+    UsernameOrEmailAlreadyExistError,
+    ValidationError,
+)
+from app.models.user import User
+from app.schemas.user import UserImport
+from app.services.users import UserService, user_count_cache
+
+# Columns written by an import; id and last_login are left to the database
+IMPORT_COLUMNS = [
+    "email",
+    "username",
+    "password",
+    "first_name",
+    "last_name",
+    "is_active",
+    "is_superuser",
+    "is_staff",
+    "date_joined",
+    "created_at",
+    "updated_at",
+]
+
+# Staged as timestamptz like the model declares them, whatever the users table
+# has: COPY binds values without casts, and asyncpg only encodes aware
+# datetimes as timestamptz. INSERT ... SELECT then casts them to the column
+# type as bound ORM parameters are.
+STAGED_COLUMNS = ", ".join(
+    f"{column}::timestamptz AS {column}"
+    if isinstance(User.__table__.c[column].type, DateTime)
+    else column
+    for column in IMPORT_COLUMNS
+)
+
+
+class UserImporter:
+    """Create users in bulk from decoded rows.
+
+    Rows are validated and checked for duplicates against the import and the
+    database one batch at a time. Passwords of a batch are hashed in
+    parallel and the batch is written in one statement (``COPY`` on
+    PostgreSQL). Rows that fail are reported and do not abort the import.
+    """
+
+    def __init__(self, db: AsyncSession, batch_size: int = 1000) -> None:
+        """Initialize UserImporter.
+
+        Args:
+            db: Database session
+            batch_size: Rows checked, hashed and inserted together
+
+        """
+        self.db = db
+        self.batch_size = batch_size
+        self.created = 0
+        self.errors: List[Dict[str, Any]] = []
+        self._emails: Set[str] = set()
+        self._usernames: Set[str] = set()
+
+    def _fail(self, line: int, error: BaseError) -> None:
+        """Report a row that is not imported."""
+        self.errors.append({"line": line, "code": error.code, "message": error.message})
+
+    async def _existing(self, batch: List[Tuple[int, UserImport]]) -> Tuple[Set, Set]:
+        """Return the lowercased emails and usernames of a batch already taken."""
+        emails = [user.email.lower() for _line, user in batch]
+        usernames = [user.username for _line, user in batch]
+        result = await self.db.execute(
+            select(User.email, User.username).where(
+                or_(func.lower(User.email).in_(emails), User.username.in_(usernames))
+            )
+        )
+        rows = result.all()
+        return {row.email.lower() for row in rows}, {row.username for row in rows}
+
+    async def _copy(self, rows: List[Dict[str, Any]]) -> Set[str]:
+        """Insert rows with COPY into a staging table and return new emails.
+
+        ``ON CONFLICT DO NOTHING`` skips rows that were taken concurrently
+        instead of failing the whole COPY.
+        """
+        columns = ", ".join(IMPORT_COLUMNS)
+        await self.db.execute(
+            text(
+                f"CREATE TEMP TABLE users_import ON COMMIT DROP AS "  # noqa: S608
+                f"SELECT {STAGED_COLUMNS} FROM users WITH NO DATA"
+            )
+        )
+        connection = await self.db.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            "users_import",
+            records=[tuple(row[column] for column in IMPORT_COLUMNS) for row in rows],
+            columns=IMPORT_COLUMNS,
+        )
+        result = await self.db.execute(
+            text(
+                f"INSERT INTO users ({columns}) "  # noqa: S608
+                f"SELECT {columns} FROM users_import "
+                f"ON CONFLICT DO NOTHING RETURNING email"
+            )
+        )
+        return set(result.scalars())
+
+    async def _insert(self, batch: List[Tuple[int, Dict[str, Any]]]) -> None:
+        """Insert a batch of rows, reporting rows that conflict."""
+        rows = [row for _line, row in batch]
+        if self.db.bind.dialect.name == "postgresql":
+            inserted = await self._copy(rows)
+            await self.db.commit()
+            for line, row in batch:
+                if row["email"] in inserted:
+                    self.created += 1
+                else:
+                    self._fail(line, UsernameOrEmailAlreadyExistError())
+            return
+
+        try:
+            await self.db.execute(insert(User), rows)
+            await self.db.commit()
+            self.created += len(rows)
+        except IntegrityError:
+            # Taken since the duplicate check: isolate the conflicting rows
+            await self.db.rollback()
+            user_service = UserService(self.db)
+            for line, row in batch:
+                try:
+                    await user_service.insert(row)
+                    self.created += 1
+                except BaseError as e:
+                    self._fail(line, e)
+
+    async def _import_batch(self, batch: List[Tuple[int, UserImport]]) -> None:
+        """Check, hash and insert a batch of valid rows."""
+        emails, usernames = await self._existing(batch)
+        accepted = []
+        for line, user in batch:
+            email = user.email.lower()
+            if email in emails or email in self._emails:
+                self._fail(line, EmailAlreadyExistError())
+            elif user.username in usernames or user.username in self._usernames:
+                self._fail(line, UsernameAlreadyExistError())
+            else:
+                self._emails.add(email)
+                self._usernames.add(user.username)
+                accepted.append((line, user))
+        if not accepted:
+            return
+
+        hashes = await password_hasher.hash_many(
+            [user.password for _line, user in accepted]
+        )
+        now = datetime.now(UTC)
+        await self._insert(
+            [
+                (
+                    line,
+                    {
+                        **user.model_dump(exclude={"password"}),
+                        # Naive dates of the import are taken as UTC
+                        "date_joined": user.date_joined
+                        if user.date_joined.tzinfo
+                        else user.date_joined.replace(tzinfo=UTC),
+                        "password": hashed,
+                        "is_staff": False,
+                        "created_at": now,
+                        "updated_at": now,
+                    },
+                )
+                for (line, user), hashed in zip(accepted, hashes)
+            ]
+        )
+
+    async def run(
+        self, rows: AsyncIterable[Tuple[int, Optional[Dict[str, Any]]]]
+    ) -> Dict[str, Any]:
+        """Import rows.
+
+        Args:
+            rows: Line numbers and decoded rows, None for malformed lines
+
+        Returns:
+            Number of users created and the rows that failed
+
+        """
+        batch: List[Tuple[int, UserImport]] = []
+        async for line, row in rows:
+            if row is None:
+                self._fail(line, ValidationError("Malformed row"))
+                continue
+            try:
+                batch.append((line, UserImport.model_validate(row)))
+            except PydanticValidationError as e:
+                fields = ", ".join(
+                    ".".join(map(str, error["loc"])) for error in e.errors()
+                )
+                self._fail(line, ValidationError(f"Invalid fields: {fields}"))
+                continue
+            if len(batch) >= self.batch_size:
+                await self._import_batch(batch)
+                batch = []
+        if batch:
+            await self._import_batch(batch)
+
+        user_count_cache.clear()
+        return {
+            "created": self.created,
+            "failed": len(self.errors),
+            "errors": self.errors,
+        }
@@ -1,15 +1,175 @@
-from typing import Optional, Tuple
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
 
-from sqlalchemy import func, select
+from sqlalchemy import (
+    ColumnElement,
+    Integer,
+    Row,
+    any_,
+    bindparam,
+    delete,
+    func,
+    insert,
+    inspect,
+    or_,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
+from app.core.config import settings
+from app.core.constants import CountMode
+from app.core.hashing import password_hasher
+from app.db.routing import READ_REPLICA
 from app.errors.exception import (
+    BadRequestError,
+    BaseError,
+    EmailAlreadyExistError,
+    UsernameAlreadyExistError,
     UsernameOrEmailAlreadyExistError,
     UsernameOrPasswordIsIncorrectError,
     UserNotFoundError,
 )
 from app.models.user import User
+from app.schemas.user import User as UserSchema
 from app.schemas.user import UserCreate, UserUpdate
+from app.utils.cache import TTLCache
+from app.utils.pagination import decode_cursor, encode_cursor
+
+# Authenticated principals: user_id -> column values of the users row
+user_cache: TTLCache[int, Dict[str, Any]] = TTLCache(
+    maxsize=settings.USER_CACHE_MAX_SIZE if settings.USER_CACHE_ENABLED else 0,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+)
+
+# Exact number of users, shared by list requests for a few seconds
+user_count_cache: TTLCache[str, int] = TTLCache(
+    maxsize=1, ttl=settings.USER_COUNT_CACHE_TTL_SECONDS
+)
+
+# Keys users can be listed by, each served by an index; ties are broken by id
+SORT_COLUMNS = {
+    "id": User.id,
+    "date_joined": User.date_joined,
+    "username": User.username,
+    # Case-insensitive, as the unique lower(email) index orders emails
+    "email": func.lower(User.email),
+}
+# Sort keys unique on their own, which need no id tie-breaker
+UNIQUE_SORTS = frozenset({"id", "username", "email"})
+# JSON type of each sort key's value in a cursor; dates are ISO strings
+SORT_VALUE_TYPES = {"id": int, "date_joined": str, "username": str, "email": str}
+
+# Columns of exported users, the public fields of the user schema
+EXPORT_FIELDS = list(UserSchema.model_fields)
+
+# Hot lookups, built once so calls skip constructing the statement and
+# computing its cache key; values are bound per call
+USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
+# Emails match regardless of case, through the unique lower(email) index
+USER_BY_EMAIL = select(User).where(
+    func.lower(User.email) == func.lower(bindparam("email"))
+)
+USER_BY_USERNAME = select(User).where(User.username == bindparam("username"))
+# Users holding an email or username, checked before a password is hashed
+USERS_BY_EMAIL_OR_USERNAME = (
+    select(User.email, User.username)
+    .where(
+        or_(
+            func.lower(User.email) == func.lower(bindparam("email")),
+            User.username == bindparam("username"),
+        )
+    )
+    .limit(2)
+)
+
+# SQLSTATE of unique violations, reported by the PostgreSQL drivers
+UNIQUE_VIOLATION = "23505"
+
+# Unique fields of the users table and the error raised when they conflict;
+# each field's indexes are named ix_users_<field>, with a suffix if functional
+UNIQUE_INDEX_ERRORS: Dict[str, type[BaseError]] = {
+    "email": EmailAlreadyExistError,
+    "username": UsernameAlreadyExistError,
+}
+
+
+def sort_order(sort: str) -> List[Any]:
+    """Build the ORDER BY clauses of a sort key, ties broken by id if needed.
+
+    Args:
+        sort: Key in ``SORT_COLUMNS``, prefixed with ``-`` for descending
+
+    Returns:
+        Order by clauses
+
+    """
+    field = sort.removeprefix("-")
+    descending = sort.startswith("-")
+    column = SORT_COLUMNS[field]
+    if field in UNIQUE_SORTS:
+        return [column.desc() if descending else column]
+    if descending:
+        return [column.desc(), User.id.desc()]
+    return [column, User.id]
+
+
+def id_in(user_ids: Sequence[int], dialect: str) -> ColumnElement[bool]:
+    """Match users by id.
+
+    PostgreSQL gets ``id = ANY(:ids)`` with one array parameter, so the
+    statement is the same for any number of ids; other databases get an
+    expanding ``IN``.
+
+    Args:
+        user_ids: User IDs
+        dialect: Database dialect name
+
+    Returns:
+        WHERE clause
+
+    """
+    if dialect == "postgresql":
+        return User.id == any_(
+            bindparam("user_ids", list(user_ids), type_=ARRAY(Integer))
+        )
+    return User.id.in_(user_ids)
+
+
+def unique_violation_error(error: IntegrityError) -> Optional[BaseError]:
+    """Map a unique violation on the users table to an application error.
+
+    Postgres drivers report the violated index name (``ix_users_email_lower``),
+    SQLite reports the column (``users.username``) or the index of an
+    expression.
+
+    Args:
+        error: Integrity error raised by the database
+
+    Returns:
+        Error matching the violated index, None if the error is not a unique
+        violation, e.g. a NOT NULL one
+
+    """
+    orig = error.orig
+    sqlstate = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    if sqlstate != UNIQUE_VIOLATION and "UNIQUE constraint failed" not in str(orig):
+        return None
+    constraint = getattr(orig.__cause__, "constraint_name", None) or getattr(
+        getattr(orig, "diag", None), "constraint_name", None
+    )
+    for field, error_class in UNIQUE_INDEX_ERRORS.items():
+        index = f"ix_users_{field}"
+        if (constraint or "").startswith(index) or any(
+            name in str(orig) for name in (index, f"users.{field}")
+        ):
+            return error_class()
+    return UsernameOrEmailAlreadyExistError()
 
 
 class UserService:
@@ -19,85 +179,407 @@ class UserService:
         """Initialize UserService."""
         self.db = db
 
-    async def get_by_id(self, user_id: int) -> Optional[User]:
-        """Get user by ID."""
-        result = await self.db.execute(select(User).filter(User.id == user_id))
+    async def get_by_id(self, user_id: int, replica: bool = True) -> Optional[User]:
+        """Get user by ID, from a read replica unless ``replica`` is False."""
+        result = await self.db.execute(
+            USER_BY_ID,
+            {"user_id": user_id},
+            bind_arguments=READ_REPLICA if replica else None,
+        )
         return result.scalar_one_or_none()
 
-    async def get_by_email(self, email: str) -> Optional[User]:
-        """Get user by email."""
-        result = await self.db.execute(select(User).filter(User.email == email))
+    async def get_by_id_cached(self, user_id: int) -> Optional[User]:
+        """Get user by ID through the identity cache.
+
+        A cached row is attached to the session with ``merge(load=False)``,
+        so a hit does not touch the database.
+        """
+        values = user_cache.get(user_id)
+        if values is not None:
+            user = User(**values)
+            make_transient_to_detached(user)
+            return await self.db.merge(user, load=False)
+
+        user = await self.get_by_id(user_id)
+        if user:
+            user_cache.set(
+                user_id,
+                {
+                    attr.key: getattr(user, attr.key)
+                    for attr in inspect(User).column_attrs
+                },
+            )
+        return user
+
+    async def get_by_email(self, email: str, replica: bool = True) -> Optional[User]:
+        """Get user by email in any case, from a replica unless ``replica`` is False."""
+        result = await self.db.execute(
+            USER_BY_EMAIL,
+            {"email": email},
+            bind_arguments=READ_REPLICA if replica else None,
+        )
         return result.scalar_one_or_none()
 
     async def get_by_username(self, username: str) -> Optional[User]:
-        """Get user by username."""
-        result = await self.db.execute(select(User).filter(User.username == username))
+        """Get user by username from a read replica."""
+        result = await self.db.execute(
+            USER_BY_USERNAME,
+            {"username": username},
+            bind_arguments=READ_REPLICA,
+        )
         return result.scalar_one_or_none()
 
-    async def create(self, user_in: UserCreate) -> User:
-        """Create a new user."""
-        if await self.get_by_email(str(user_in.email)):
-            raise UsernameOrEmailAlreadyExistError
-        if await self.get_by_username(user_in.username):
-            raise UsernameOrEmailAlreadyExistError
+    async def check_available(self, email: str, username: str) -> None:
+        """Check that no user holds an email or username, on a read replica.
 
-        user = User(**user_in.model_dump(exclude={"password"}))
-        user.set_password(user_in.password)
+        Args:
+            email: Email, matched in any case
+            username: Username
 
-        self.db.add(user)
-        await self.db.commit()
-        await self.db.refresh(user)
+        Raises:
+            EmailAlreadyExistError: If the email is taken
+            UsernameAlreadyExistError: If the username is taken
+
+        """
+        result = await self.db.execute(
+            USERS_BY_EMAIL_OR_USERNAME,
+            {"email": email, "username": username},
+            bind_arguments=READ_REPLICA,
+        )
+        rows = result.all()
+        if any(
+            row.username != username or row.email.lower() == email.lower()
+            for row in rows
+        ):
+            raise EmailAlreadyExistError
+        if rows:
+            raise UsernameAlreadyExistError
+
+    async def insert(self, values: Dict[str, Any]) -> User:
+        """Insert a user row in a single ``INSERT ... RETURNING`` round trip.
+
+        Duplicates are detected by the unique indexes, which also catches
+        inserts racing past ``check_available``.
+
+        Args:
+            values: Column values of the new user
+
+        Returns:
+            Inserted user
+
+        Raises:
+            EmailAlreadyExistError: If the email is taken
+            UsernameAlreadyExistError: If the username is taken
+
+        """
+        try:
+            result = await self.db.execute(
+                insert(User).values(**values).returning(User)
+            )
+            user = result.scalar_one()
+            await self.db.commit()
+        except IntegrityError as e:
+            await self.db.rollback()
+            error = unique_violation_error(e)
+            if error is None:
+                raise
+            raise error from e
+        user_count_cache.clear()
         return user
 
+    async def insert_with_password(self, values: Dict[str, Any], password: str) -> User:
+        """Insert a user, hashing the password only if the user can be inserted.
+
+        Taken emails and usernames are rejected by a cheap SELECT first, so
+        duplicate sign-ups do not spend a bcrypt hash.
+
+        Args:
+            values: Column values of the new user, without the password
+            password: Plain password
+
+        Returns:
+            Inserted user
+
+        Raises:
+            EmailAlreadyExistError: If the email is taken
+            UsernameAlreadyExistError: If the username is taken
+
+        """
+        await self.check_available(values["email"], values["username"])
+        return await self.insert(
+            {**values, "password": await password_hasher.hash(password)}
+        )
+
+    async def create(self, user_in: UserCreate) -> User:
+        """Create a new user."""
+        return await self.insert_with_password(
+            user_in.model_dump(exclude={"password"}), user_in.password
+        )
+
     async def update(self, user_id: int, user_in: UserUpdate) -> User:
-        """Update user information."""
-        user = await self.get_by_id(user_id)
-        if not user:
-            raise UserNotFoundError
+        """Update user information in a single ``UPDATE ... RETURNING``.
 
-        update_data = user_in.model_dump(exclude_unset=True)
+        Duplicate emails and usernames are detected by the unique indexes.
+        The user is only read beforehand when the password changes, so no
+        password is hashed for a missing user.
 
-        if "password" in update_data:
-            user.set_password(update_data.pop("password"))
+        Args:
+            user_id: User ID
+            user_in: Fields to update
 
-        if "email" in update_data and update_data["email"] != user.email:
-            if await self.get_by_email(update_data["email"]):
-                raise UsernameOrEmailAlreadyExistError
+        Returns:
+            Updated user
 
-        if "username" in update_data and update_data["username"] != user.username:
-            if await self.get_by_username(update_data["username"]):
-                raise UsernameOrEmailAlreadyExistError
+        Raises:
+            UserNotFoundError: If the user does not exist
+            EmailAlreadyExistError: If the email is taken
+            UsernameAlreadyExistError: If the username is taken
 
-        for field, value in update_data.items():
-            setattr(user, field, value)
+        """
+        # A null leaves a field as it is, like an omitted one, as most are NOT NULL
+        values = user_in.model_dump(exclude_none=True)
+        if not values:
+            user = await self.get_by_id(user_id, replica=False)
+            if not user:
+                raise UserNotFoundError
+            return user
 
-        await self.db.commit()
-        await self.db.refresh(user)
+        if "password" in values:
+            if not await self.get_by_id(user_id, replica=False):
+                raise UserNotFoundError
+            values["password"] = await password_hasher.hash(values["password"])
+
+        try:
+            result = await self.db.execute(
+                update(User)
+                .where(User.id == user_id)
+                .values(**values)
+                .returning(User)
+                .execution_options(populate_existing=True)
+            )
+            user = result.scalar_one_or_none()
+            await self.db.commit()
+        except IntegrityError as e:
+            await self.db.rollback()
+            error = unique_violation_error(e)
+            if error is None:
+                raise
+            raise error from e
+
+        if not user:
+            raise UserNotFoundError
+        user_cache.pop(user_id)
         return user
 
     async def delete(self, user_id: int) -> None:
         """Delete user."""
-        user = await self.get_by_id(user_id)
+        user = await self.get_by_id(user_id, replica=False)
         if not user:
             raise UserNotFoundError
 
         await self.db.delete(user)
         await self.db.commit()
+        user_cache.pop(user_id)
+        user_count_cache.clear()
+
+    async def update_many(
+        self, user_ids: Sequence[int], values: Dict[str, Any]
+    ) -> List[int]:
+        """Update users in a single ``UPDATE ... RETURNING`` statement.
+
+        Args:
+            user_ids: IDs of the users to update
+            values: Column values set on every user
+
+        Returns:
+            IDs of the users that were updated
+
+        """
+        result = await self.db.execute(
+            update(User)
+            .where(id_in(user_ids, self.db.bind.dialect.name))
+            .values(**values)
+            .returning(User.id)
+            .execution_options(synchronize_session=False)
+        )
+        updated = list(result.scalars())
+        await self.db.commit()
+        for user_id in updated:
+            user_cache.pop(user_id)
+        return updated
+
+    async def delete_many(self, user_ids: Sequence[int]) -> List[int]:
+        """Delete users in a single ``DELETE ... RETURNING`` statement.
+
+        Args:
+            user_ids: IDs of the users to delete
+
+        Returns:
+            IDs of the users that were deleted
+
+        """
+        result = await self.db.execute(
+            delete(User)
+            .where(id_in(user_ids, self.db.bind.dialect.name))
+            .returning(User.id)
+            .execution_options(synchronize_session=False)
+        )
+        deleted = list(result.scalars())
+        await self.db.commit()
+        for user_id in deleted:
+            user_cache.pop(user_id)
+        user_count_cache.clear()
+        return deleted
 
     async def authenticate(self, email: str, password: str) -> Optional[User]:
         """Authenticate user."""
-        user = await self.get_by_email(email)
-        if not user or not user.check_password(password):
+        # Read from the primary so a changed password applies at once
+        user = await self.get_by_email(email, replica=False)
+        if not user or not await user.acheck_password(password):
             raise UsernameOrPasswordIsIncorrectError
         return user
 
+    async def count(self, mode: str = CountMode.EXACT) -> Optional[int]:
+        """Count users.
+
+        Args:
+            mode: ``exact`` counts the table, cached for a few seconds;
+                ``estimated`` reads the planner statistics on PostgreSQL and
+                falls back to the exact count elsewhere; ``none`` skips it
+
+        Returns:
+            Number of users, or None if not requested
+
+        """
+        if mode == CountMode.NONE:
+            return None
+
+        if mode == CountMode.ESTIMATED and self.db.bind.dialect.name == "postgresql":
+            estimate = await self.db.scalar(
+                text(
+                    "SELECT reltuples::bigint FROM pg_class "
+                    "WHERE oid = CAST(:table AS regclass)"
+                ),
+                {"table": User.__tablename__},
+                bind_arguments=READ_REPLICA,
+            )
+            # -1 until the table has been vacuumed or analyzed
+            if estimate is not None and estimate >= 0:
+                return estimate
+
+        total = user_count_cache.get("users")
+        if total is None:
+            total = await self.db.scalar(
+                select(func.count(User.id)), bind_arguments=READ_REPLICA
+            )
+            user_count_cache.set("users", total)
+        return total
+
+    @staticmethod
+    def _decode_cursor(cursor: str, sort: str) -> Tuple[Any, int]:
+        """Decode a cursor into the sort value and id of the last row.
+
+        Raises:
+            BadRequestError: If the cursor is malformed or of another sort
+
+        """
+        try:
+            cursor_sort, value, last_id = decode_cursor(cursor)
+            key = sort.removeprefix("-")
+            # Exact types, as bools are ints too
+            if (
+                cursor_sort != sort
+                or type(value) is not SORT_VALUE_TYPES[key]
+                or type(last_id) is not int
+            ):
+                raise ValueError(cursor_sort)
+            if key == "date_joined":
+                value = datetime.fromisoformat(value)
+        except (TypeError, ValueError) as e:
+            raise BadRequestError("Invalid cursor") from e
+        return value, last_id
+
     async def get_multi(
-        self, skip: int = 0, limit: int = 100
-    ) -> Tuple[list[User], int]:
-        """Get multiple users with pagination."""
-        query = select(User).offset(skip).limit(limit)
-        result = await self.db.execute(query)
-        users = result.scalars().all()
-        total = await self.db.execute(select(func.count(User.id)))
-        total_count = total.scalar()
-        return list(users), total_count
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        sort: str = "id",
+        count: str = CountMode.EXACT,
+    ) -> Tuple[List[User], Optional[str], Optional[int]]:
+        """Get a page of users.
+
+        Pages are addressed by ``skip`` (offset) or by the ``cursor`` of the
+        previous page (keyset). Keyset pages seek on the index of the sort
+        key, ``(sort, id)`` for keys that are not unique, so they cost the
+        same at any depth.
+
+        Args:
+            skip: Number of users to skip, only without cursor
+            limit: Maximum number of users
+            cursor: Cursor of the previous page
+            sort: Key in ``SORT_COLUMNS``, prefixed with ``-`` for descending
+            count: Count mode, see ``count``
+
+        Returns:
+            Users, cursor of the next page or None on the last page, and total
+
+        Raises:
+            BadRequestError: If the cursor is invalid or combined with skip
+
+        """
+        field = sort.removeprefix("-")
+        descending = sort.startswith("-")
+        column = SORT_COLUMNS[field]
+        # The sort value is read back for the cursor, as the database computes it
+        query = (
+            select(User, column.label("sort_value"))
+            .order_by(*sort_order(sort))
+            .limit(limit + 1)
+        )
+
+        if cursor is not None:
+            if skip:
+                raise BadRequestError("Use either skip or cursor")
+            value, last_id = self._decode_cursor(cursor, sort)
+            if field in UNIQUE_SORTS:
+                key, bound = column, value
+            else:
+                key, bound = tuple_(column, User.id), tuple_(value, last_id)
+            query = query.where(key < bound if descending else key > bound)
+        elif skip:
+            query = query.offset(skip)
+
+        rows = (await self.db.execute(query, bind_arguments=READ_REPLICA)).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor([sort, last.sort_value, last.User.id])
+        return [row.User for row in rows], next_cursor, await self.count(count)
+
+    async def stream_rows(
+        self, sort: str = "id", batch_size: int = 1000
+    ) -> AsyncIterator[Row]:
+        """Stream the exported columns of all users.
+
+        Rows are fetched ``batch_size`` at a time from a server-side cursor
+        as plain tuples, without building ORM objects, so memory does not
+        grow with the table.
+
+        Args:
+            sort: Key in ``SORT_COLUMNS``, prefixed with ``-`` for descending
+            batch_size: Rows fetched per round trip
+
+        Yields:
+            Rows with the columns of ``EXPORT_FIELDS``
+
+        """
+        query = (
+            select(*(getattr(User, field) for field in EXPORT_FIELDS))
+            .order_by(*sort_order(sort))
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.db.stream(query, bind_arguments=READ_REPLICA)
+        async for row in result:
+            yield row
@@ -1,10 +1,151 @@
+import atexit
+import contextlib
 import logging
+import queue
 import sys
-from typing import Any, Dict, Optional
+import threading
+from typing import TYPE_CHECKING, Any, BinaryIO, Dict, List, Optional
 
+import orjson
 from loguru import logger
 
 from app.core.config import settings
+from app.core.constants import LogDropPolicy
+
+if TYPE_CHECKING:
+    from loguru import Message
+
+
+def dumps(entry: Dict[str, Any]) -> bytes:
+    """Encode a log entry as a JSON line."""
+    return orjson.dumps(entry, default=str, option=orjson.OPT_APPEND_NEWLINE)
+
+
+class QueuedJSONSink:
+    """Loguru sink that writes JSON lines from a background thread.
+
+    Logging code only turns the record into a small dict and puts it on a
+    bounded queue; encoding and the possibly blocking write to the stream
+    happen on the writer thread, which writes everything queued at once.
+    When the queue is full, records are dropped by the drop policy instead
+    of blocking the event loop, and the writer logs how many were lost.
+    """
+
+    # Max entries written with one call
+    BATCH_SIZE = 512
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        max_size: int = 10000,
+        drop_policy: str = LogDropPolicy.DROP_NEW,
+    ) -> None:
+        """Initialize QueuedJSONSink and start its writer thread.
+
+        Args:
+            stream: Binary stream the JSON lines are written to
+            max_size: Max entries waiting to be written
+            drop_policy: "drop_new" or "drop_oldest" when the queue is full
+
+        """
+        self.stream = stream
+        self.drop_policy = drop_policy
+        self._queue: queue.Queue[Optional[Dict[str, Any]]] = queue.Queue(max_size)
+        # Counted by logging threads and the writer
+        self._dropped_lock = threading.Lock()
+        self.dropped = 0
+        self._reported_dropped = 0
+        self._thread = threading.Thread(
+            target=self._run, name="log-writer", daemon=True
+        )
+        self._thread.start()
+        # Flush what is queued when the interpreter exits
+        atexit.register(self.stop)
+
+    def write(self, message: "Message") -> None:
+        """Queue a log record."""
+        record = message.record
+        extra = dict(record["extra"])
+        entry = {
+            "time": record["time"].isoformat(),
+            "level": record["level"].name,
+            "message": record["message"],
+            "logger": f"{record['name']}:{record['function']}:{record['line']}",
+            # Fields passed as extra={...} are flattened into the entry
+            **extra.pop("extra", {}),
+            **extra,
+        }
+        if record["exception"] is not None:
+            entry["exception"] = str(message)
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+            if self.drop_policy == LogDropPolicy.DROP_OLDEST:
+                with contextlib.suppress(queue.Empty):
+                    self._queue.get_nowait()
+                with contextlib.suppress(queue.Full):
+                    self._queue.put_nowait(entry)
+
+    def _run(self) -> None:
+        """Write queued entries until stopped."""
+        stopping = False
+        while not stopping:
+            entry = self._queue.get()
+            batch: List[Optional[Dict[str, Any]]] = [entry]
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = None in batch
+            lines = [dumps(entry) for entry in batch if entry is not None]
+            dropped = self.dropped
+            if dropped > self._reported_dropped:
+                lines.append(
+                    dumps(
+                        {
+                            "level": "WARNING",
+                            "message": f"Dropped "
+                            f"{dropped - self._reported_dropped} log records, "
+                            f"the log queue was full",
+                        }
+                    )
+                )
+                self._reported_dropped = dropped
+            try:
+                self.stream.write(b"".join(lines))
+                self.stream.flush()
+            except (OSError, ValueError):
+                # Nothing sensible to log to when the log stream fails
+                with self._dropped_lock:
+                    self.dropped += len(lines)
+                    self._reported_dropped = self.dropped
+
+    def stop(self) -> None:
+        """Write the queued entries and stop the writer thread."""
+        atexit.unregister(self.stop)
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return sink statistics.
+
+        Returns:
+            Dictionary with queued and dropped record counts
+
+        """
+        return {
+            "queued": self._queue.qsize(),
+            "max_queued": self._queue.maxsize,
+            "dropped": self.dropped,
+        }
+
+
+# Sink of the JSON stdout log, set up by setup_logging
+log_sink: Optional[QueuedJSONSink] = None
 
 
 class InterceptHandler(logging.Handler):
@@ -28,15 +169,23 @@ class InterceptHandler(logging.Handler):
 
 
 def setup_logging(_logging_config: Optional[Dict[str, Any]] = None) -> None:
-    """Configure logging with loguru."""
+    """Configure logging with loguru.
+
+    Records go to stdout as JSON lines through a background writer; errors
+    are also written to a rotated file, off the event loop as well. Calling
+    it again stops the writer of the previous setup.
+    """
+    global log_sink
     logger.remove()
+    if log_sink is not None:
+        log_sink.stop()
 
-    logger.add(
-        sys.stdout,
-        format=settings.LOG_FORMAT,
-        level=settings.LOG_LEVEL,
-        serialize=True,
+    log_sink = QueuedJSONSink(
+        sys.stdout.buffer,
+        max_size=settings.LOG_QUEUE_SIZE,
+        drop_policy=settings.LOG_QUEUE_DROP_POLICY,
     )
+    logger.add(log_sink, format="{message}", level=settings.LOG_LEVEL)
 
     logger.add(
         "logs/app.log",
@@ -44,6 +193,7 @@ def setup_logging(_logging_config: Optional[Dict[str, Any]] = None) -> None:
         level="ERROR",
         rotation="500 MB",
         retention="10 days",
+        enqueue=True,
     )
 
     logging.basicConfig(handlers=[InterceptHandler()], level=0, force=True)
@@ -0,0 +1,50 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Sequence
+
+from app.errors.exception import BadRequestError
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the keyset of the last row of a page as an opaque cursor.
+
+    Args:
+        values: JSON serializable values; datetimes are sent as ISO strings
+
+    Returns:
+        URL safe cursor
+
+    """
+    payload = json.dumps(
+        [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in values
+        ],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Decode a cursor made by ``encode_cursor``.
+
+    Args:
+        cursor: Cursor received from the client
+
+    Returns:
+        Encoded values
+
+    Raises:
+        BadRequestError: If the cursor is malformed
+
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(payload)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise BadRequestError("Invalid cursor") from e
+    if not isinstance(values, list):
+        raise BadRequestError("Invalid cursor")
+    return values
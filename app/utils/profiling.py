@@ -0,0 +1,403 @@
+import asyncio
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from types import CodeType, FrameType
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Function, file and first line of a sampled function
+Frame = Tuple[str, str, int]
+Stack = Tuple[Frame, ...]
+
+# Leaf of the stacks of a task suspended in an await
+AWAIT_FRAME: Frame = ("<await>", "", 0)
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+# Code object -> frame, shared by all samplers
+_frames: Dict[CodeType, Frame] = {}
+
+
+def _short_path(filename: str) -> str:
+    """Return a file path relative to the longest sys.path entry holding it."""
+    prefixes = [path for path in sys.path if path and filename.startswith(path)]
+    return filename[len(max(prefixes, key=len)) :].lstrip("/") if prefixes else filename
+
+
+def frame_of(code: CodeType) -> Frame:
+    """Return the function, file and first line of a code object."""
+    frame = _frames.get(code)
+    if frame is None:
+        name = getattr(code, "co_qualname", code.co_name)
+        frame = (name, _short_path(code.co_filename), code.co_firstlineno)
+        _frames[code] = frame
+    return frame
+
+
+def running_stack(frame: Optional[FrameType], root: Optional[FrameType]) -> Stack:
+    """Return the stack of a running thread, root first.
+
+    Args:
+        frame: Innermost frame of the thread
+        root: Frame the stack starts at, e.g. that of a task's coroutine;
+            None keeps the whole stack
+
+    """
+    codes: List[CodeType] = []
+    while frame is not None:
+        codes.append(frame.f_code)
+        if frame is root:
+            break
+        frame = frame.f_back
+    return tuple(frame_of(code) for code in reversed(codes))
+
+
+def await_stack(coro: object) -> Stack:
+    """Return the stack of a suspended coroutine, root first.
+
+    Follows the chain of awaited coroutines and generators down to the
+    awaited future, shown as ``AWAIT_FRAME``.
+    """
+    stack: List[Frame] = []
+    while coro is not None:
+        frame = (
+            getattr(coro, "cr_frame", None)
+            or getattr(coro, "gi_frame", None)
+            or getattr(coro, "ag_frame", None)
+        )
+        if frame is None:
+            break
+        stack.append(frame_of(frame.f_code))
+        coro = (
+            getattr(coro, "cr_await", None)
+            or getattr(coro, "gi_yieldfrom", None)
+            or getattr(coro, "ag_await", None)
+        )
+    stack.append(AWAIT_FRAME)
+    return tuple(stack)
+
+
+class StackTable:
+    """Bounded table of sampled stacks and the seconds spent in them.
+
+    Once max_stacks distinct stacks are held, time in new stacks is added
+    to a single "<other>" stack so memory stays bounded.
+    """
+
+    OTHER: Stack = (("<other>", "", 0),)
+
+    def __init__(self, max_stacks: int = 10000) -> None:
+        """Initialize StackTable.
+
+        Args:
+            max_stacks: Max distinct stacks kept
+
+        """
+        self.max_stacks = max_stacks
+        self._seconds: Dict[Stack, float] = {}
+        self._lock = threading.Lock()
+        self.overflowed = 0
+
+    def __len__(self) -> int:
+        """Return the number of distinct stacks."""
+        return len(self._seconds)
+
+    def add(self, stack: Stack, seconds: float) -> None:
+        """Add time spent in a stack."""
+        with self._lock:
+            if stack not in self._seconds and len(self._seconds) >= self.max_stacks:
+                self.overflowed += 1
+                stack = self.OTHER
+            self._seconds[stack] = self._seconds.get(stack, 0.0) + seconds
+
+    def snapshot(self) -> Dict[Stack, float]:
+        """Return a copy of the table."""
+        with self._lock:
+            return dict(self._seconds)
+
+    def clear(self) -> None:
+        """Remove all stacks."""
+        with self._lock:
+            self._seconds = {}
+            self.overflowed = 0
+
+    def collapsed(self) -> str:
+        """Render the table as collapsed stacks, weighted in microseconds.
+
+        One line per stack, ``outer;inner;leaf weight``, heaviest first, as
+        read by flamegraph.pl, speedscope and most flame graph viewers.
+        """
+        lines = [
+            ";".join(f"{name} ({path}:{line})" for name, path, line in stack)
+            + f" {round(seconds * 1e6)}"
+            for stack, seconds in sorted(
+                self.snapshot().items(), key=lambda item: item[1], reverse=True
+            )
+        ]
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def speedscope(self, name: str) -> Dict[str, Any]:
+        """Render the table as a speedscope sampled profile.
+
+        Args:
+            name: Profile name
+
+        Returns:
+            speedscope file contents
+
+        """
+        index: Dict[Frame, int] = {}
+        samples = []
+        weights = []
+        for stack, seconds in self.snapshot().items():
+            samples.append([index.setdefault(frame, len(index)) for frame in stack])
+            weights.append(seconds)
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "shared": {
+                "frames": [
+                    {"name": function, "file": path, "line": line}
+                    for function, path, line in index
+                ]
+            },
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+            "name": name,
+            "activeProfileIndex": 0,
+        }
+
+
+class Sampler(ABC):
+    """Sample thread stacks from a background thread into a stack table.
+
+    Samples are weighted by the time since the previous one, so the table
+    holds seconds even when the GIL delays the sampler past its interval.
+    The time spent sampling, during which the sampler holds the GIL, is
+    measured and reported as the sampler's overhead.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        max_stacks: int = 10000,
+        timer: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        """Initialize Sampler.
+
+        Args:
+            interval: Seconds between two samples
+            max_stacks: Max distinct stacks kept
+            timer: Monotonic clock
+
+        """
+        self.interval = interval
+        self.table = StackTable(max_stacks)
+        self.timer = timer
+        self.samples = 0
+        self.busy = 0.0
+        self.started_at: Optional[float] = None
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """Return True if the sampler thread runs."""
+        return self._thread is not None
+
+    @abstractmethod
+    def sample(self, frames: Dict[int, FrameType], elapsed: float) -> None:
+        """Record the stacks of interest among the current frames.
+
+        Args:
+            frames: Innermost frame by thread ID
+            elapsed: Seconds since the previous sample
+
+        """
+
+    def _run(self) -> None:
+        """Take samples until stopped."""
+        last = self.timer()
+        while not self._stopped.wait(self.interval):
+            now = self.timer()
+            self.sample(sys._current_frames(), now - last)  # noqa: SLF001
+            self.samples += 1
+            last = now
+            self.busy += self.timer() - now
+
+    def start(self) -> None:
+        """Start the sampler thread."""
+        if self._thread is None:
+            self._stopped.clear()
+            self.started_at = self.timer()
+            self._thread = threading.Thread(
+                target=self._run, name="stack-sampler", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the sampler thread."""
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return sampler statistics.
+
+        Returns:
+            Dictionary with sample and stack counts and the share of time
+            spent sampling
+
+        """
+        elapsed = self.timer() - self.started_at if self.started_at else 0.0
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "samples": self.samples,
+            "stacks": len(self.table),
+            "max_stacks": self.table.max_stacks,
+            "overflowed": self.table.overflowed,
+            "overhead": self.busy / elapsed if elapsed else 0.0,
+        }
+
+
+class TaskSampler(Sampler):
+    """Sample the stacks of one asyncio task.
+
+    While the task runs, its event loop thread is sampled from the task's
+    coroutine down; while it is suspended, the chain of awaits it waits in
+    is recorded instead, so the profile covers wall-clock time, including
+    database and pool waits, and not only CPU time on the loop.
+    """
+
+    def __init__(
+        self,
+        task: asyncio.Task,
+        interval: float,
+        max_stacks: int = 10000,
+    ) -> None:
+        """Initialize TaskSampler for a task of the running loop's thread.
+
+        Args:
+            task: Sampled task
+            interval: Seconds between two samples
+            max_stacks: Max distinct stacks kept
+
+        """
+        super().__init__(interval, max_stacks)
+        self.task = task
+        self.loop = task.get_loop()
+        self.thread_id = threading.get_ident()
+
+    def sample(self, frames: Dict[int, FrameType], elapsed: float) -> None:
+        """Record the running or suspended stack of the task."""
+        if self.task.done():
+            return
+        coro = self.task.get_coro()
+        if asyncio.current_task(self.loop) is self.task:
+            stack = running_stack(
+                frames.get(self.thread_id), getattr(coro, "cr_frame", None)
+            )
+        else:
+            stack = await_stack(coro)
+        self.table.add(stack, elapsed)
+
+
+class ThreadSampler(Sampler):
+    """Sample the stacks of the event loop thread and all other threads.
+
+    Meant to run continuously at a low rate. Stacks are rooted at a frame
+    naming their thread, ``<event loop>`` for the thread the sampler was
+    started from, so time the loop spends blocked, e.g. in a synchronous
+    bcrypt call or log write, stands out. Idle threads are skipped: the
+    event loop waiting for events, and other threads waiting on a lock or
+    for work.
+
+    The asyncio loop waits in the stdlib selector, which names its idle
+    leaf. Loops written in C, such as uvloop, wait without a Python frame,
+    so their thread then shows only ``loop_base``, the frames below the task
+    the sampler was started from.
+    """
+
+    LOOP_FRAME: Frame = ("<event loop>", "", 0)
+    # Leaves of idle threads, as (function name, file)
+    LOOP_IDLE = frozenset({("select", "selectors.py")})
+    THREAD_IDLE = frozenset(
+        {
+            ("wait", "threading.py"),
+            ("_worker", "concurrent/futures/thread.py"),
+        }
+    )
+
+    def __init__(
+        self,
+        interval: float,
+        max_stacks: int = 10000,
+        timer: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        """Initialize ThreadSampler.
+
+        Args:
+            interval: Seconds between two samples
+            max_stacks: Max distinct stacks kept
+            timer: Monotonic clock
+
+        """
+        super().__init__(interval, max_stacks, timer)
+        self.loop_thread_id: Optional[int] = None
+        self.loop_base: Stack = ()
+        self._roots: Dict[int, Frame] = {}
+
+    def start(self) -> None:
+        """Start sampling, from the event loop thread."""
+        self.loop_thread_id = threading.get_ident()
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        frame = getattr(task.get_coro(), "cr_frame", None) if task else None
+        # Frames of the loop running the task, left when no callback runs
+        self.loop_base = running_stack(frame.f_back, None) if frame else ()
+        super().start()
+
+    def _root(self, thread_id: int) -> Frame:
+        """Return the frame naming a thread."""
+        root = self._roots.get(thread_id)
+        if root is None:
+            if thread_id == self.loop_thread_id:
+                root = self.LOOP_FRAME
+            else:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                root = (f"<thread {names.get(thread_id, thread_id)}>", "", 0)
+            self._roots[thread_id] = root
+        return root
+
+    def idle(self, thread_id: int, stack: Stack) -> bool:
+        """Check whether a thread's stack shows it waiting for work."""
+        if not stack:
+            return True
+        name, path, _line = stack[-1]
+        leaf = (name.rpartition(".")[2], path)
+        if thread_id == self.loop_thread_id:
+            return leaf in self.LOOP_IDLE or stack == self.loop_base[: len(stack)]
+        return leaf in self.THREAD_IDLE
+
+    def sample(self, frames: Dict[int, FrameType], elapsed: float) -> None:
+        """Record the stacks of the busy threads other than the sampler."""
+        own_id = threading.get_ident()
+        for thread_id, frame in frames.items():
+            if thread_id == own_id:
+                continue
+            stack = running_stack(frame, None)
+            if not self.idle(thread_id, stack):
+                self.table.add((self._root(thread_id), *stack), elapsed)
@@ -0,0 +1,112 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Optional, Sequence, Tuple
+
+from app.core.constants import ExportFormat
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+async def encode_rows(
+    rows: AsyncIterable[Sequence[Any]],
+    fields: Sequence[str],
+    export_format: str,
+    chunk_size: int = 1000,
+) -> AsyncIterator[str]:
+    """Encode rows as NDJSON or CSV.
+
+    Rows are written to a reused buffer and sent ``chunk_size`` at a time,
+    so only one chunk is held in memory.
+
+    Args:
+        rows: Rows with one value per field
+        fields: Field names, keys of NDJSON objects or the CSV header
+        export_format: ``ndjson`` or ``csv``
+        chunk_size: Rows per yielded chunk
+
+    Yields:
+        Encoded chunks
+
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == ExportFormat.CSV else None
+    if writer is not None:
+        writer.writerow(fields)
+
+    pending = 0
+    async for row in rows:
+        values = [
+            value.isoformat() if isinstance(value, datetime) else value for value in row
+        ]
+        if writer is not None:
+            writer.writerow(values)
+        else:
+            buffer.write(json.dumps(dict(zip(fields, values))))
+            buffer.write("\n")
+        pending += 1
+        if pending == chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def _lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """Split a byte stream into lines without their line ending."""
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r")
+    if pending:
+        yield pending.rstrip(b"\r")
+
+
+async def decode_rows(
+    chunks: AsyncIterable[bytes], export_format: str
+) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]]]]:
+    """Decode an NDJSON or CSV body into rows as it is received.
+
+    Each line is one row; CSV values may not contain line breaks, and empty
+    CSV values are left out so that defaults apply. Blank lines are skipped.
+
+    Args:
+        chunks: Body chunks
+        export_format: ``ndjson`` or ``csv``; CSV starts with a header row
+
+    Yields:
+        Line number and row, or None if the line is malformed
+
+    """
+    header: Optional[Sequence[str]] = None
+    number = 0
+    async for raw_line in _lines(chunks):
+        number += 1
+        if not raw_line.strip():
+            continue
+        try:
+            line = raw_line.decode()
+            if export_format == ExportFormat.CSV:
+                values = next(csv.reader([line]))
+                if header is None:
+                    header = values
+                    continue
+                if len(values) != len(header):
+                    raise ValueError(line)
+                row = {key: value for key, value in zip(header, values) if value}
+            else:
+                row = json.loads(line)
+                if not isinstance(row, dict):
+                    raise ValueError(line)
+        except (UnicodeDecodeError, ValueError):
+            row = None
+        yield number, row
@@ -0,0 +1,109 @@
+"""Throughput of the bulk user import in users per second.
+
+Creates users one ``UserService.create`` call at a time (one request per
+user) and through ``UserImporter`` from an NDJSON body, against a temporary
+SQLite database unless ``--database-url`` points elsewhere (COPY is used on
+PostgreSQL). bcrypt dominates both; ``--rounds`` lowers its cost factor to
+show the rest of the pipeline, use 12 for production numbers.
+
+Usage:
+    python -m benchmarks.bulk_import --users 2000 --rounds 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("ALLOW_ORIGINS", "[]")
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.constants import ExportFormat
+from app.core.hashing import password_hasher, pwd_context
+from app.db.base import Base
+from app.schemas.user import UserCreate
+from app.services.user_import import UserImporter
+from app.services.users import UserService
+from app.utils.records import decode_rows
+
+
+def user_row(prefix: str, index: int) -> dict:
+    """Return the fields of a benchmark user."""
+    return {
+        "email": f"{prefix}{index}@example.com",
+        "username": f"{prefix}{index}",
+        "password": f"password-{index}",
+    }
+
+
+async def body(users: int, chunk_size: int = 65536) -> AsyncIterator[bytes]:
+    """Yield an NDJSON import body in chunks, like a streamed request."""
+    data = "".join(json.dumps(user_row("bulk", i)) + "\n" for i in range(users))
+    encoded = data.encode()
+    for start in range(0, len(encoded), chunk_size):
+        yield encoded[start : start + chunk_size]
+
+
+async def run(database_url: Optional[str], users: int, batch_size: int) -> None:
+    """Create users both ways and print users per second."""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(
+            database_url or f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}"
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = sessionmaker(
+            engine, class_=AsyncSession, expire_on_commit=False
+        )
+
+        async with session_factory() as session:
+            service = UserService(session)
+            start = time.perf_counter()
+            for i in range(users):
+                await service.create(
+                    UserCreate(**user_row("single", i), date_joined=datetime.now(UTC))
+                )
+            single = users / (time.perf_counter() - start)
+
+        async with session_factory() as session:
+            importer = UserImporter(session, batch_size=batch_size)
+            start = time.perf_counter()
+            result = await importer.run(decode_rows(body(users), ExportFormat.NDJSON))
+            bulk = users / (time.perf_counter() - start)
+            if result["failed"]:
+                raise RuntimeError(result["errors"][:5])
+
+        print(f"{'mode':<14} {'users/s':>10}")
+        print(f"{'one by one':<14} {single:>10.0f}")
+        print(f"{'bulk import':<14} {bulk:>10.0f}")
+
+        if database_url:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+    password_hasher.shutdown()
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=4)
+    args = parser.parse_args()
+    pwd_context.update(bcrypt__rounds=args.rounds)
+    asyncio.run(run(args.database_url, args.users, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Latency of deep pages of ``UserService.get_multi``.
+
+Seeds a users table (1M rows by default) and times one page at increasing
+depths with offset pagination plus an exact count (the previous behaviour),
+offset pagination without a count, and keyset pagination from a cursor.
+Uses a temporary SQLite database unless ``--database-url`` points elsewhere,
+e.g. at a scratch PostgreSQL database.
+
+Usage:
+    python -m benchmarks.deep_pagination --rows 1000000 --limit 100
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("ALLOW_ORIGINS", "[]")
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.constants import CountMode
+from app.db.base import Base
+from app.models.user import User
+from app.services.users import UserService, user_count_cache
+from app.utils.pagination import encode_cursor
+
+SEED_CHUNK = 10000
+DEPTHS = (0, 1000, 10000, 100000, 500000, 990000)
+
+
+async def seed(session: AsyncSession, rows: int) -> None:
+    """Insert rows users."""
+    joined = datetime(2020, 1, 1, tzinfo=UTC)
+    for start in range(0, rows, SEED_CHUNK):
+        await session.execute(
+            insert(User),
+            [
+                {
+                    "email": f"user{i}@example.com",
+                    "username": f"user{i}",
+                    "password": User.UNUSUAL_PASSWORD,
+                    "date_joined": joined + timedelta(seconds=i),
+                }
+                for i in range(start, min(start + SEED_CHUNK, rows))
+            ],
+        )
+    await session.commit()
+
+
+async def timed(
+    func: Callable[..., Awaitable[object]], repeat: int, **kwargs: object
+) -> float:
+    """Return the median duration of func(**kwargs) in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        # Measure the uncached exact count, as every request did before
+        user_count_cache.clear()
+        start = time.perf_counter()
+        await func(**kwargs)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+async def run(database_url: Optional[str], rows: int, limit: int, repeat: int) -> None:
+    """Seed the database and print page latencies per depth."""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(
+            database_url or f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}"
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = sessionmaker(engine, class_=AsyncSession)
+
+        async with session_factory() as session:
+            start = time.perf_counter()
+            await seed(session, rows)
+            print(f"seeded {rows} users in {time.perf_counter() - start:.1f}s")
+
+            service = UserService(session)
+            print(
+                f"{'depth':>8} {'offset+count ms':>16} {'offset ms':>10} "
+                f"{'keyset ms':>10}"
+            )
+            for depth in DEPTHS:
+                if depth >= rows:
+                    break
+                # The cursor a client would hold after reading depth rows
+                last_id = await session.scalar(
+                    select(User.id).order_by(User.id).offset(max(depth - 1, 0))
+                )
+                cursor = encode_cursor(["id", None, last_id]) if depth else None
+                results = [
+                    await timed(service.get_multi, repeat, skip=depth, limit=limit),
+                    await timed(
+                        service.get_multi,
+                        repeat,
+                        skip=depth,
+                        limit=limit,
+                        count=CountMode.NONE,
+                    ),
+                    await timed(
+                        service.get_multi,
+                        repeat,
+                        cursor=cursor,
+                        limit=limit,
+                        count=CountMode.NONE,
+                    ),
+                ]
+                session.expunge_all()
+                print(
+                    f"{depth:>8} {results[0]:>16.2f} {results[1]:>10.2f} "
+                    f"{results[2]:>10.2f}"
+                )
+
+            if database_url:
+                async with engine.begin() as conn:
+                    await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.database_url, args.rows, args.limit, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Peak memory of the streaming user export.
+
+Seeds users tables of increasing size and reports the Python heap peak
+(tracemalloc) while draining the export stream, next to loading every user
+as ORM objects like a single huge ``GET /users`` page would. The streaming
+peak should stay flat as the table grows.
+
+Usage:
+    python -m benchmarks.export_memory --rows 10000 100000
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Awaitable, Callable
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("ALLOW_ORIGINS", "[]")
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.deep_pagination import seed
+
+from app.core.constants import ExportFormat
+from app.db.base import Base
+from app.models.user import User
+from app.services.users import EXPORT_FIELDS, UserService
+from app.utils.records import encode_rows
+
+
+async def peak_mib(func: Callable[[], Awaitable[object]]) -> float:
+    """Return the heap peak of func in MiB."""
+    tracemalloc.start()
+    try:
+        await func()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+async def run(rows: int) -> None:
+    """Seed rows users and print export memory peaks."""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = sessionmaker(engine, class_=AsyncSession)
+        async with session_factory() as session:
+            await seed(session, rows)
+
+        async def stream() -> None:
+            async with session_factory() as session:
+                rows = UserService(session).stream_rows()
+                async for _chunk in encode_rows(
+                    rows, EXPORT_FIELDS, ExportFormat.NDJSON
+                ):
+                    pass
+
+        async def materialize() -> None:
+            async with session_factory() as session:
+                (await session.scalars(select(User))).all()
+
+        start = time.perf_counter()
+        streamed = await peak_mib(stream)
+        elapsed = time.perf_counter() - start
+        materialized = await peak_mib(materialize)
+        print(f"{rows:>10} {streamed:>14.1f} {materialized:>16.1f} {elapsed:>10.1f}")
+        await engine.dispose()
+
+
+def main() -> None:
+    """Run the benchmark for every table size."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+    print(f"{'rows':>10} {'stream MiB':>14} {'all ORM MiB':>16} {'stream s':>10}")
+    for rows in args.rows:
+        asyncio.run(run(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""JWT sign and verify throughput per algorithm.
+
+Compares building the python-jose key from its PEM or secret on every call
+(the previous behaviour) with the keys parsed once by the key ring. The
+numbers depend on the installed python-jose backend: ``cryptography`` is far
+faster than the pure-Python ``ecdsa`` and ``rsa`` fallbacks.
+
+Usage:
+    python -m benchmarks.jwt_algorithms --seconds 1
+"""
+
+import argparse
+import os
+import time
+from typing import Callable
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("ALLOW_ORIGINS", "[]")
+
+import rsa
+from ecdsa import NIST256p
+from ecdsa import SigningKey as ECDSASigningKey
+from jose import jwt
+
+from app.core.keys import SigningKey
+
+CLAIMS = {"sub": "123", "type": "access", "exp": 4102444800}
+
+
+def throughput(func: Callable[[], object], seconds: float) -> float:
+    """Return calls per second of func over roughly the given duration."""
+    calls = 0
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        func()
+        calls += 1
+    return calls / (time.perf_counter() - start)
+
+
+def main() -> None:
+    """Run the benchmark for every algorithm."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    _public_rsa, private_rsa = rsa.newkeys(2048)
+    secrets = {
+        "HS256": "benchmark-secret-key",
+        "ES256": ECDSASigningKey.generate(curve=NIST256p).to_pem().decode(),
+        "RS256": private_rsa.save_pkcs1().decode(),
+    }
+
+    print(f"{'algorithm':<10} {'mode':<12} {'sign/s':>10} {'verify/s':>10}")
+    for algorithm, secret in secrets.items():
+        key = SigningKey.from_pem("bench", algorithm, secret)
+        token = jwt.encode(CLAIMS, key.key, algorithm=algorithm)
+        # The old code passed the raw secret; asymmetric keys need their public half
+        verify_secret = secret if key.is_symmetric else key.verify_key.to_pem()
+        modes = {
+            "per-call": (
+                lambda s=secret, a=algorithm: jwt.encode(CLAIMS, s, algorithm=a),
+                lambda v=verify_secret, a=algorithm, t=token: jwt.decode(
+                    t, v, algorithms=[a]
+                ),
+            ),
+            "precomputed": (
+                lambda k=key: jwt.encode(CLAIMS, k.key, algorithm=k.algorithm),
+                lambda k=key, t=token: jwt.decode(
+                    t, k.verify_key, algorithms=[k.algorithm]
+                ),
+            ),
+        }
+        for mode, (sign, verify) in modes.items():
+            print(
+                f"{algorithm:<10} {mode:<12} "
+                f"{throughput(sign, args.seconds):>10.0f} "
+                f"{throughput(verify, args.seconds):>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
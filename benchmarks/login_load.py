@@ -0,0 +1,126 @@
+"""Healthcheck latency while the app is serving concurrent logins.
+
+Runs the application in-process against a temporary SQLite database and
+measures ``/api/v1/healthcheck`` latency while ``/api/v1/auth/login`` is being
+hammered, once with password hashing inline on the event loop (the previous
+behaviour) and once with the pool-backed password hasher.
+
+Usage:
+    python -m benchmarks.login_load --logins 64 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import AsyncGenerator, List
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("ALLOW_ORIGINS", "[]")
+os.environ.setdefault("LOGIN_RATE_LIMIT_ENABLED", "false")
+
+from httpx import ASGITransport, AsyncClient
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.deps import get_db
+from app.core.constants import HasherExecutor
+from app.core.hashing import password_hasher
+from app.db.base import Base
+from app.main import app
+from app.models.user import User
+
+EMAIL = "bench@example.com"
+PASSWORD = "benchpass123"
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Return the given percentile of samples."""
+    ordered = sorted(samples)
+    index = min(int(len(ordered) * pct / 100), len(ordered) - 1)
+    return ordered[index]
+
+
+async def run(executor: str, logins: int, concurrency: int) -> List[float]:
+    """Run the login load and return healthcheck latencies in milliseconds."""
+    password_hasher.shutdown()
+    password_hasher.executor_type = executor
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        session_factory = sessionmaker(
+            engine, class_=AsyncSession, expire_on_commit=False
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        async with session_factory() as session:
+            user = User(email=EMAIL, username="bench", date_joined=datetime.now(UTC))
+            user.set_password(PASSWORD)
+            session.add(user)
+            await session.commit()
+
+        async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
+            async with session_factory() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        latencies: List[float] = []
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+
+            async def login_worker(count: int) -> None:
+                for _ in range(count):
+                    await client.post(
+                        "/api/v1/auth/login",
+                        json={"email": EMAIL, "password": PASSWORD},
+                    )
+
+            async def probe(done: asyncio.Event) -> None:
+                while not done.is_set():
+                    start = time.perf_counter()
+                    await client.get("/api/v1/healthcheck")
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    await asyncio.sleep(0.005)
+
+            done = asyncio.Event()
+            probe_task = asyncio.create_task(probe(done))
+            await asyncio.gather(
+                *(login_worker(logins // concurrency) for _ in range(concurrency))
+            )
+            done.set()
+            await probe_task
+
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+    password_hasher.shutdown()
+    return latencies
+
+
+def main() -> None:
+    """Run the benchmark for the inline and the pooled hasher."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    logger.remove()
+
+    print(f"{'executor':<10} {'probes':>7} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for executor in (HasherExecutor.INLINE, HasherExecutor.THREAD):
+        latencies = asyncio.run(run(executor, args.logins, args.concurrency))
+        print(
+            f"{executor:<10} {len(latencies):>7} "
+            f"{statistics.median(latencies):>9.2f} "
+            f"{percentile(latencies, 99):>9.2f} "
+            f"{max(latencies):>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
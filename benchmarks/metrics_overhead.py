@@ -0,0 +1,162 @@
+"""Cost of recording Prometheus metrics on the request path.
+
+Times the recording primitives of prometheus_client and the per-request
+overhead of ``MetricsMiddleware``, measured by calling a trivial ASGI app
+and the FastAPI healthcheck directly, with and without the middleware, so
+server and client costs do not hide it. Finally times a scrape merging the
+files of several workers.
+
+Usage:
+    python -m benchmarks.metrics_overhead --calls 200000
+    # Recording into the files shared by the workers
+    PROMETHEUS_MULTIPROC_DIR=$(mktemp -d) python -m benchmarks.metrics_overhead
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import Callable, Dict
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("ALLOW_ORIGINS", "[]")
+
+from fastapi import FastAPI
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api import healthcheck
+from app.core.metrics import MULTIPROC_DIR_ENV, render
+from app.middleware import MetricsMiddleware
+
+SCOPE = {
+    "type": "http",
+    "http_version": "1.1",
+    "method": "GET",
+    "scheme": "http",
+    "server": ("bench", 80),
+    "path": "/api/v1/healthcheck",
+    "raw_path": b"/api/v1/healthcheck",
+    "root_path": "",
+    "query_string": b"",
+    "headers": [],
+}
+
+
+def per_call_us(func: Callable[..., object], calls: int, *args: object) -> float:
+    """Return the mean microseconds per call of func with args."""
+    start = time.perf_counter()
+    for _ in range(calls):
+        func(*args)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+async def app(_scope: Scope, _receive: Receive, send: Send) -> None:
+    """Answer with an empty 200 response."""
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive() -> Message:
+    """Return an empty request body."""
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(_message: Message) -> None:
+    """Drop a response message."""
+
+
+async def per_request_us(asgi_app: ASGIApp, calls: int, repeat: int = 5) -> float:
+    """Return the best mean microseconds per request served by an ASGI app."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            await asgi_app(dict(SCOPE), receive, send)
+        best = min(best, (time.perf_counter() - start) / calls * 1e6)
+    return best
+
+
+def record_in_worker(series: int) -> None:
+    """Fill the files of a fake worker process."""
+    latency = Histogram("latency_seconds", "Latency", ["route"])
+    for index in range(series):
+        latency.labels(f"/route/{index}").observe(0.01)
+
+
+def recording_us(calls: int) -> Dict[str, float]:
+    """Return the mean microseconds per call of the recording primitives."""
+    registry = CollectorRegistry()
+    counter = Counter("events_total", "Events", ["kind"], registry=registry)
+    gauge = Gauge("in_progress", "In progress", ["method"], registry=registry)
+    histogram = Histogram("latency_seconds", "Latency", ["route"], registry=registry)
+    child = histogram.labels("/users/{user_id}")
+
+    def observe_route(value: float) -> None:
+        histogram.labels("/users/{user_id}").observe(value)
+
+    cases = {
+        "counter inc": (counter.labels("a").inc,),
+        "gauge inc": (gauge.labels("GET").inc,),
+        "histogram observe": (child.observe, 0.02),
+        "labels() + histogram observe": (observe_route, 0.02),
+    }
+    return {
+        name: per_call_us(func, calls, *func_args)
+        for name, (func, *func_args) in cases.items()
+    }
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--series", type=int, default=50)
+    args = parser.parse_args()
+
+    mode = "multiprocess" if MULTIPROC_DIR_ENV in os.environ else "single process"
+    print(f"recording, us/call, {mode}")
+    for name, value in recording_us(args.calls).items():
+        print(f"{name:<32} {value:>8.3f}")
+
+    fastapi_app = FastAPI()
+    fastapi_app.include_router(healthcheck.router, prefix="/api/v1/healthcheck")
+    requests = args.calls // 10
+    print("\nrequest, us/request")
+    print(f"{'app':<12} {'bare':>10} {'metered':>10} {'overhead':>10}")
+    for name, asgi_app in (("trivial", app), ("healthcheck", fastapi_app)):
+        bare = asyncio.run(per_request_us(asgi_app, requests))
+        metered = asyncio.run(per_request_us(MetricsMiddleware(asgi_app), requests))
+        print(
+            f"{name:<12} {bare:>10.2f} {metered:>10.2f} "
+            f"{metered - bare:>9.2f} ({(metered - bare) / bare:.1%})"
+        )
+
+    previous = os.environ.get(MULTIPROC_DIR_ENV)
+    with tempfile.TemporaryDirectory() as directory:
+        # Read by prometheus_client when the spawned workers import it
+        os.environ[MULTIPROC_DIR_ENV] = directory
+        context = multiprocessing.get_context("spawn")
+        for _ in range(args.workers):
+            worker = context.Process(target=record_in_worker, args=(args.series,))
+            worker.start()
+            worker.join()
+        start = time.perf_counter()
+        render()
+        scrape_ms = (time.perf_counter() - start) * 1000
+        print(
+            f"\nscrape of {args.workers} workers x {args.series} histogram series: "
+            f"{scrape_ms:.2f} ms"
+        )
+    if previous is None:
+        del os.environ[MULTIPROC_DIR_ENV]
+    else:
+        os.environ[MULTIPROC_DIR_ENV] = previous
+
+
+if __name__ == "__main__":
+    main()
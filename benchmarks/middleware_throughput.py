@@ -0,0 +1,113 @@
+"""Healthcheck requests/sec through the logging middleware.
+
+Serves ``/api/v1/healthcheck`` in-process behind the previous
+``BaseHTTPMiddleware`` based logging middleware, reproduced below, and
+behind the pure ASGI ``LoggingMiddleware``. Log records go to a discarding
+sink, so the numbers show the middleware machinery rather than log I/O.
+
+Usage:
+    python -m benchmarks.middleware_throughput --seconds 3 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from typing import Callable, Type
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("ALLOW_ORIGINS", "[]")
+
+from fastapi import FastAPI
+
+from httpx import ASGITransport, AsyncClient
+from loguru import logger
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.api import healthcheck
+from app.db.instrumentation import track_queries
+from app.middleware import LoggingMiddleware, query_extra
+
+URL = "/api/v1/healthcheck"
+
+
+class BaseHTTPLoggingMiddleware(BaseHTTPMiddleware):
+    """The logging middleware before it was rewritten as pure ASGI."""
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        """Dispatch the request and log details."""
+        request_id = str(uuid.uuid4())
+        with logger.contextualize(request_id=request_id), track_queries() as queries:
+            logger.info(
+                "Request",
+                extra={
+                    "method": request.method,
+                    "url": str(request.url),
+                    "headers": dict(request.headers),
+                    "client_host": request.client.host if request.client else None,
+                },
+            )
+            start_time = time.time()
+            response = await call_next(request)
+            response.headers.append("Server-Timing", queries.server_timing())
+            logger.info(
+                "Response",
+                extra={
+                    "status_code": response.status_code,
+                    "processing_time": f"{time.time() - start_time:.4f}s",
+                    **query_extra(queries),
+                },
+            )
+            return response
+
+
+def build_app(middleware: Type) -> FastAPI:
+    """Build an app serving the healthcheck behind middleware."""
+    application = FastAPI()
+    application.add_middleware(middleware)
+    application.include_router(healthcheck.router, prefix=URL)
+    return application
+
+
+async def throughput(application: FastAPI, seconds: float, concurrency: int) -> float:
+    """Return healthcheck requests per second over roughly the given duration."""
+    transport = ASGITransport(app=application)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get(URL)
+        deadline = time.perf_counter() + seconds
+        requests = 0
+
+        async def worker() -> None:
+            nonlocal requests
+            while time.perf_counter() < deadline:
+                response = await client.get(URL)
+                response.raise_for_status()
+                requests += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return requests / (time.perf_counter() - start)
+
+
+async def main(seconds: float, concurrency: int) -> None:
+    """Run the benchmark for both middlewares."""
+    logger.remove()
+    logger.add(lambda _message: None, level="INFO")
+    print(f"{'middleware':<20} {'req/s':>10}")
+    for name, middleware in (
+        ("BaseHTTPMiddleware", BaseHTTPLoggingMiddleware),
+        ("pure ASGI", LoggingMiddleware),
+    ):
+        rate = await throughput(build_app(middleware), seconds, concurrency)
+        print(f"{name:<20} {rate:>10.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.seconds, args.concurrency))
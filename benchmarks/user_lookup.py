@@ -0,0 +1,113 @@
+"""Python overhead of the user lookups by id, email and username.
+
+Compares building ``select(User).filter(...)`` on every call (the previous
+behaviour) with the statements built once in ``app.services.users``. The
+first table times statement construction and cache key generation alone,
+the second a full ORM lookup on an in-memory SQLite database, where the
+query itself costs microseconds and the Python work dominates.
+
+Usage:
+    python -m benchmarks.user_lookup --calls 20000
+"""
+
+import argparse
+import os
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("ALLOW_ORIGINS", "[]")
+
+from sqlalchemy import Executable, create_engine, select
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.models.user import User
+from app.services.users import USER_BY_EMAIL, USER_BY_ID, USER_BY_USERNAME
+
+EMAIL = "bench@example.com"
+USERNAME = "bench"
+
+# Lookup name -> (statement built per call, prebuilt statement and parameters)
+LOOKUPS: Dict[str, Tuple[Callable[[], Executable], Executable, Dict[str, object]]] = {
+    "id": (
+        lambda: select(User).filter(User.id == 1),
+        USER_BY_ID,
+        {"user_id": 1},
+    ),
+    "email": (
+        lambda: select(User).filter(User.email == EMAIL),
+        USER_BY_EMAIL,
+        {"email": EMAIL},
+    ),
+    "username": (
+        lambda: select(User).filter(User.username == USERNAME),
+        USER_BY_USERNAME,
+        {"username": USERNAME},
+    ),
+}
+
+
+def per_call_us(func: Callable[..., object], calls: int, *args: object) -> float:
+    """Return the mean microseconds per call of func with args."""
+    start = time.perf_counter()
+    for _ in range(calls):
+        func(*args)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def cache_key(statement: Executable) -> object:
+    """Generate the key SQLAlchemy looks compiled statements up by."""
+    return statement._generate_cache_key()  # noqa: SLF001
+
+
+def built_cache_key(build: Callable[[], Executable]) -> object:
+    """Build a statement and generate its cache key."""
+    return cache_key(build())
+
+
+def lookup(
+    session: Session, statement: Executable, params: Optional[Dict[str, object]]
+) -> None:
+    """Load a user, expunged so the next lookup does not hit the identity map."""
+    session.execute(statement, params).scalar_one()
+    session.expunge_all()
+
+
+def built_lookup(session: Session, build: Callable[[], Executable]) -> None:
+    """Build a statement and load a user with it."""
+    lookup(session, build(), None)
+
+
+def main() -> None:
+    """Run the benchmark for every lookup."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(
+            User(id=1, email=EMAIL, username=USERNAME, password=User.UNUSUAL_PASSWORD)
+        )
+        session.commit()
+
+    print("statement construction and cache key, us/call")
+    print(f"{'lookup':<10} {'per call':>10} {'prebuilt':>10}")
+    for name, (build, statement, _params) in LOOKUPS.items():
+        before = per_call_us(built_cache_key, args.calls, build)
+        after = per_call_us(cache_key, args.calls, statement)
+        print(f"{name:<10} {before:>10.2f} {after:>10.2f}")
+
+    print("\nORM lookup on in-memory SQLite, us/call")
+    print(f"{'lookup':<10} {'per call':>10} {'prebuilt':>10}")
+    with Session(engine) as session:
+        for name, (build, statement, params) in LOOKUPS.items():
+            before = per_call_us(built_lookup, args.calls, session, build)
+            after = per_call_us(lookup, args.calls, session, statement, params)
+            print(f"{name:<10} {before:>10.2f} {after:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
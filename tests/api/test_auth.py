@@ -3,10 +3,13 @@ from datetime import timedelta
 from fastapi import status
 
 import pytest
-from httpx import AsyncClient
+from httpx import ASGITransport, AsyncClient
 
+from app.core.config import settings
+from app.core.hashing import password_hasher
 from app.core.security import create_token
 from app.errors.error_code import ErrorCode
+from app.main import app, get_application
 from app.models.user import User
 
 API_REGISTER_ENDPOINT = "/api/v1/auth/register"
@@ -58,6 +61,18 @@ async def test_login(client: AsyncClient, normal_user: User):
     assert "refresh_token" in tokens
 
 
+@pytest.mark.asyncio
+async def test_login_email_ignores_case(client: AsyncClient, normal_user: User):
+    """Test logging in with the email in a different case."""
+    login_data = {
+        "email": normal_user.email.upper(),
+        "password": "testpass123",  # NOSONAR
+    }
+    response = await client.post(API_LOGIN_ENDPOINT, json=login_data)
+    assert response.status_code == status.HTTP_200_OK
+    assert "access_token" in response.json()
+
+
 @pytest.mark.asyncio
 async def test_logout(client: AsyncClient, normal_user_token_headers: dict):
     """Test user logout."""
@@ -66,6 +81,29 @@ async def test_logout(client: AsyncClient, normal_user_token_headers: dict):
     data = response.json()
     assert data["message"] == "Successfully logged out"
 
+    response = await client.get(API_ME_ENDPOINT, headers=normal_user_token_headers)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json()["code"] == ErrorCode.INVALID_TOKEN_CODE
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_refresh_token(
+    client: AsyncClient, normal_user: User, normal_user_token_headers: dict
+):
+    """Test logout revokes the refresh token sent in the body."""
+    refresh_token = create_token(str(normal_user.id), "refresh")
+    response = await client.post(
+        API_LOGOUT_ENDPOINT,
+        headers=normal_user_token_headers,
+        json={"refresh_token": refresh_token},
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    response = await client.post(
+        API_REFRESH_TOKEN_ENDPOINT, json={"refresh_token": refresh_token}
+    )
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
 
 @pytest.mark.asyncio
 async def test_get_me(
@@ -153,3 +191,132 @@ async def test_refresh_token_expired(client: AsyncClient, normal_user: User):
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
     data = response.json()
     assert data["code"] == ErrorCode.TOKEN_EXPIRED_CODE
+
+
+@pytest.mark.asyncio
+async def test_login_rate_limited(client: AsyncClient, normal_user: User):
+    """Test login attempts over the per-email limit are rejected early."""
+    login_data = {"email": normal_user.email, "password": "wrongpass"}  # NOSONAR
+    for _ in range(settings.LOGIN_RATE_LIMIT_PER_EMAIL):
+        response = await client.post(API_LOGIN_ENDPOINT, json=login_data)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    response = await client.post(API_LOGIN_ENDPOINT, json=login_data)
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(response.headers["Retry-After"]) > 0
+    assert response.json()["code"] == ErrorCode.RATE_LIMIT_EXCEEDED_CODE
+
+
+@pytest.mark.asyncio
+async def test_login_rate_limited_per_forwarded_ip(
+    monkeypatch, client: AsyncClient, normal_user: User
+):
+    """Test clients behind a trusted proxy get their own per-IP limit."""
+    monkeypatch.setattr(settings, "FORWARDED_ALLOW_IPS", ["127.0.0.1"])
+    monkeypatch.setattr(settings, "LOGIN_RATE_LIMIT_PER_IP", 1)
+    proxied_app = get_application()
+    proxied_app.dependency_overrides = app.dependency_overrides
+    login_data = {"email": normal_user.email, "password": "wrongpass"}  # NOSONAR
+
+    async with AsyncClient(
+        transport=ASGITransport(app=proxied_app, client=("127.0.0.1", 123)),
+        base_url=client.base_url,
+    ) as proxied_client:
+        for forwarded_for in ("203.0.113.1", "203.0.113.2"):
+            response = await proxied_client.post(
+                API_LOGIN_ENDPOINT,
+                json=login_data,
+                headers={"X-Forwarded-For": forwarded_for},
+            )
+            assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        response = await proxied_client.post(
+            API_LOGIN_ENDPOINT,
+            json=login_data,
+            headers={"X-Forwarded-For": "203.0.113.1"},
+        )
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+
+@pytest.mark.asyncio
+async def test_register_round_trips(client: AsyncClient, statements: list):
+    """Test registration checks availability, then inserts the user."""
+    register_data = {
+        "email": "newuser@example.com",
+        "username": "newuser",
+        "password": "newpass123",  # NOSONAR
+    }
+    statements.clear()
+    response = await client.post(API_REGISTER_ENDPOINT, json=register_data)
+    assert response.status_code == status.HTTP_200_OK
+    assert len(statements) == 2
+    assert statements[0].startswith("SELECT users.email, users.username")
+    assert statements[1].startswith("INSERT INTO users")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("email", "username", "message"),
+    [
+        ("USER@example.com", "different", ErrorCode.EMAIL_ALREADY_EXISTS_MESSAGE),
+        ("other@example.com", "testuser", ErrorCode.USERNAME_ALREADY_EXISTS_MESSAGE),
+    ],
+)
+async def test_register_duplicate_skips_hashing(
+    monkeypatch, client: AsyncClient, normal_user: User, email, username, message
+):
+    """Test duplicate registrations are rejected before the password is hashed."""
+
+    async def fail_hash(_password: str) -> str:
+        raise AssertionError("Password hashed for a duplicate user")
+
+    monkeypatch.setattr(password_hasher, "hash", fail_hash)
+    register_data = {
+        "email": email,
+        "username": username,
+        "password": "newpass123",  # NOSONAR
+    }
+    response = await client.post(API_REGISTER_ENDPOINT, json=register_data)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json()["message"] == message
+
+
+@pytest.mark.asyncio
+async def test_register_existing_email(client: AsyncClient, normal_user: User):
+    """Test registration with an existing email."""
+    register_data = {
+        "email": normal_user.email,
+        "username": "different",
+        "password": "newpass123",  # NOSONAR
+    }
+    response = await client.post(API_REGISTER_ENDPOINT, json=register_data)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json()["message"] == ErrorCode.EMAIL_ALREADY_EXISTS_MESSAGE
+
+
+@pytest.mark.asyncio
+async def test_register_existing_email_other_case(
+    client: AsyncClient, normal_user: User
+):
+    """Test registration with an existing email in a different case."""
+    register_data = {
+        "email": normal_user.email.upper(),
+        "username": "different",
+        "password": "newpass123",  # NOSONAR
+    }
+    response = await client.post(API_REGISTER_ENDPOINT, json=register_data)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json()["message"] == ErrorCode.EMAIL_ALREADY_EXISTS_MESSAGE
+
+
+@pytest.mark.asyncio
+async def test_register_existing_username(client: AsyncClient, normal_user: User):
+    """Test registration with an existing username."""
+    register_data = {
+        "email": "different@example.com",
+        "username": normal_user.username,
+        "password": "newpass123",  # NOSONAR
+    }
+    response = await client.post(API_REGISTER_ENDPOINT, json=register_data)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json()["message"] == ErrorCode.USERNAME_ALREADY_EXISTS_MESSAGE
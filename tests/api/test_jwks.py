@@ -0,0 +1,28 @@
+from fastapi import status
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.keys import KeyRing
+
+API_JWKS_ENDPOINT = "/.well-known/jwks.json"
+
+
+@pytest.mark.asyncio
+async def test_get_jwks(client: AsyncClient, es256_key_ring: KeyRing):
+    """Test the JWKS endpoint publishes only public asymmetric keys."""
+    response = await client.get(API_JWKS_ENDPOINT)
+    assert response.status_code == status.HTTP_200_OK
+    keys = response.json()["keys"]
+    assert len(keys) == 1
+    assert keys[0]["kid"] == "es256-1"
+    assert keys[0]["alg"] == "ES256"
+    assert "d" not in keys[0]
+
+
+@pytest.mark.asyncio
+async def test_get_jwks_without_asymmetric_keys(client: AsyncClient):
+    """Test the JWKS endpoint is empty with only the secret key."""
+    response = await client.get(API_JWKS_ENDPOINT)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"keys": []}
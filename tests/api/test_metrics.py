@@ -0,0 +1,21 @@
+from fastapi import status
+
+import pytest
+from httpx import AsyncClient
+
+API_METRICS_ENDPOINT = "/metrics"
+
+
+@pytest.mark.asyncio
+async def test_get_metrics(client: AsyncClient):
+    """Test requests are reported by route template."""
+    await client.get("/api/v1/users/123")
+    response = await client.get(API_METRICS_ENDPOINT)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain")
+    assert (
+        'http_request_duration_seconds_count{method="GET",'
+        'route="/api/v1/users/{user_id}",status="401"}' in response.text
+    )
+    assert "/api/v1/users/123" not in response.text
+    assert 'db_pool_connections{engine="primary",state="idle"}' in response.text
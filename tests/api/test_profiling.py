@@ -0,0 +1,132 @@
+from fastapi import status
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.profiling import stack_sampler, start_stack_sampler, stop_stack_sampler
+from app.errors.error_code import ErrorCode
+
+API_USERS_ENDPOINT = "/api/v1/users"
+API_STACKS_ENDPOINT = "/api/v1/profiling/stacks"
+
+
+@pytest.mark.asyncio
+async def test_profile_collapsed(client: AsyncClient, superuser_token_headers: dict):
+    """Test a superuser gets collapsed stacks instead of the response."""
+    response = await client.get(
+        API_USERS_ENDPOINT,
+        headers={**superuser_token_headers, "X-Profile": "collapsed"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain")
+    assert response.headers["x-profile-status"] == "200"
+    assert float(response.headers["x-profile-duration"]) > 0
+    for line in response.text.splitlines():
+        stack, weight = line.rsplit(" ", 1)
+        assert stack
+        assert int(weight) >= 0
+
+
+@pytest.mark.asyncio
+async def test_profile_speedscope(client: AsyncClient, superuser_token_headers: dict):
+    """Test the profile can be asked for as speedscope JSON."""
+    response = await client.get(
+        API_USERS_ENDPOINT,
+        headers={**superuser_token_headers, "X-Profile": "speedscope"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["$schema"] == "https://www.speedscope.app/file-format-schema.json"
+    assert data["profiles"][0]["name"] == f"GET {API_USERS_ENDPOINT}"
+
+
+@pytest.mark.asyncio
+async def test_profile_query_parameter_is_left_to_routes(client: AsyncClient):
+    """Test a profile query parameter neither profiles nor rejects a request."""
+    response = await client.get("/api/v1/healthcheck", params={"profile": "x"})
+    assert response.status_code == status.HTTP_200_OK
+    assert "x-profile-status" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_profile_normal_user(
+    client: AsyncClient, normal_user_token_headers: dict
+):
+    """Test only superusers can profile requests."""
+    response = await client.get(
+        API_USERS_ENDPOINT,
+        headers={**normal_user_token_headers, "X-Profile": "collapsed"},
+    )
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert response.json()["code"] == ErrorCode.NOT_SUPERUSER_CODE
+
+
+@pytest.mark.asyncio
+async def test_profile_unauthenticated(client: AsyncClient):
+    """Test profiling an anonymous request is rejected."""
+    response = await client.get(
+        "/api/v1/healthcheck", headers={"X-Profile": "collapsed"}
+    )
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_profile_unknown_format(
+    client: AsyncClient, superuser_token_headers: dict
+):
+    """Test an unknown profile format is rejected."""
+    response = await client.get(
+        API_USERS_ENDPOINT, headers={**superuser_token_headers, "X-Profile": "html"}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_unprofiled_request(client: AsyncClient, superuser_token_headers: dict):
+    """Test requests without the header get their normal response."""
+    response = await client.get(API_USERS_ENDPOINT, headers=superuser_token_headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert "x-profile-status" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_get_stacks(client: AsyncClient, superuser_token_headers: dict):
+    """Test a superuser reads and resets the continuously sampled stacks."""
+    start_stack_sampler()
+    try:
+        stack_sampler.table.add((("main", "app.py", 1),), 0.002)
+        response = await client.get(
+            API_STACKS_ENDPOINT, params={"reset": True}, headers=superuser_token_headers
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "main (app.py:1) " in response.text
+
+        response = await client.get(
+            API_STACKS_ENDPOINT,
+            params={"format": "speedscope"},
+            headers=superuser_token_headers,
+        )
+        assert response.status_code == status.HTTP_200_OK
+        frames = response.json()["shared"]["frames"]
+        assert {"name": "main", "file": "app.py", "line": 1} not in frames
+    finally:
+        stop_stack_sampler()
+        stack_sampler.table.clear()
+
+
+@pytest.mark.asyncio
+async def test_get_stacks_disabled(client: AsyncClient, superuser_token_headers: dict):
+    """Test reading stacks fails while the continuous profiler is stopped."""
+    response = await client.get(API_STACKS_ENDPOINT, headers=superuser_token_headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_get_stacks_normal_user(
+    client: AsyncClient, normal_user_token_headers: dict
+):
+    """Test only superusers can read the sampled stacks."""
+    response = await client.get(API_STACKS_ENDPOINT, headers=normal_user_token_headers)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert response.json()["code"] == ErrorCode.NOT_SUPERUSER_CODE
@@ -0,0 +1,29 @@
+from fastapi import status
+
+import pytest
+from httpx import AsyncClient
+
+from app.errors.error_code import ErrorCode
+
+API_STATS_ENDPOINT = "/api/v1/stats"
+
+
+@pytest.mark.asyncio
+async def test_get_stats(client: AsyncClient, superuser_token_headers: dict):
+    """Test getting runtime statistics."""
+    response = await client.get(API_STATS_ENDPOINT, headers=superuser_token_headers)
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert "utilization" in data["password_hasher"]
+    assert "timeouts" in data["db_pool"]["primary"]
+
+
+@pytest.mark.asyncio
+async def test_get_stats_normal_user(
+    client: AsyncClient, normal_user_token_headers: dict
+):
+    """Test getting runtime statistics as normal user."""
+    response = await client.get(API_STATS_ENDPOINT, headers=normal_user_token_headers)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    data = response.json()
+    assert data["code"] == ErrorCode.NOT_SUPERUSER_CODE
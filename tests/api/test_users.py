@@ -1,15 +1,28 @@
-from datetime import datetime
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import AsyncGenerator, List
 
 from fastapi import status
 
 import pytest
-from httpx import AsyncClient
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.deps import get_db
 from app.errors.error_code import ErrorCode
+from app.main import app
 from app.models.user import User
+from app.services.users import UserService, user_cache
+from app.utils.pagination import encode_cursor
 
 API_USERS_ENDPOINT = "/api/v1/users"
 API_ME_ENDPOINT = "/api/v1/users/me"
+AUTH_LOGIN_ENDPOINT = "/api/v1/auth/login"
 
 
 @pytest.mark.asyncio
@@ -49,6 +62,57 @@ async def test_get_user(
     assert data["username"] == normal_user.username
 
 
+@pytest.mark.asyncio
+async def test_get_user_query_budget(
+    client: AsyncClient,
+    superuser_token_headers: dict,
+    normal_user: User,
+    query_budget,
+):
+    """Test getting a user stays within its query budget and reports it."""
+    with query_budget(2):
+        response = await client.get(
+            f"{API_USERS_ENDPOINT}/{normal_user.id}", headers=superuser_token_headers
+        )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+
+
+@pytest.mark.asyncio
+async def test_session_closed_before_response_is_sent(
+    client: AsyncClient,
+    async_db: AsyncSession,
+    superuser_token_headers: dict,
+    normal_user: User,
+):
+    """Test the request's session is closed before the response is sent."""
+    events: List[str] = []
+
+    async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
+        yield async_db
+        await async_db.close()
+        events.append("session closed")
+
+    async def recording_app(scope, receive, send) -> None:
+        async def recording_send(message) -> None:
+            if message["type"] == "http.response.start":
+                events.append("response started")
+            await send(message)
+
+        await app(scope, receive, recording_send)
+
+    app.dependency_overrides[get_db] = override_get_db
+    async with AsyncClient(
+        transport=ASGITransport(app=recording_app), base_url=str(client.base_url)
+    ) as recording_client:
+        response = await recording_client.get(
+            f"{API_USERS_ENDPOINT}/{normal_user.id}", headers=superuser_token_headers
+        )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["username"] == normal_user.username
+    assert events == ["session closed", "response started"]
+
+
 @pytest.mark.asyncio
 async def test_get_nonexistent_user(
     client: AsyncClient, nonexistent_user_token_headers: dict, normal_user: User
@@ -101,6 +165,29 @@ async def test_create_user_existing_email(
         API_USERS_ENDPOINT, json=user_data, headers=superuser_token_headers
     )
     assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json()["code"] == ErrorCode.EMAIL_ALREADY_EXISTS_CODE
+
+
+@pytest.mark.asyncio
+async def test_create_user_check_then_insert(
+    client: AsyncClient, superuser_token_headers: dict, statements: list
+):
+    """Test creating a user checks availability, then INSERT ... RETURNING."""
+    user_data = {
+        "email": "newuser@example.com",
+        "username": "newuser",
+        "password": "newpass123",  # NOSONAR
+        "date_joined": datetime.utcnow().isoformat(),
+    }
+    await client.get(API_ME_ENDPOINT, headers=superuser_token_headers)
+    statements.clear()
+    response = await client.post(
+        API_USERS_ENDPOINT, json=user_data, headers=superuser_token_headers
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    assert len(statements) == 2
+    assert statements[0].startswith("SELECT users.email, users.username")
+    assert "RETURNING" in statements[1]
 
 
 @pytest.mark.asyncio
@@ -114,6 +201,334 @@ async def test_read_users(client: AsyncClient, superuser_token_headers: dict):
     assert len(data["items"]) > 0
 
 
+@pytest_asyncio.fixture
+async def many_users(async_db: AsyncSession, superuser: User) -> List[User]:
+    """Create users joined on alternating days, after the superuser."""
+    users = [
+        User(
+            email=f"user{i}@example.com",
+            username=f"user{i}",
+            password=User.UNUSUAL_PASSWORD,
+            date_joined=datetime(2024, 1, 1 + i % 2, 12, 0),
+        )
+        for i in range(5)
+    ]
+    async_db.add_all(users)
+    await async_db.commit()
+    return users
+
+
+async def read_all_pages(client: AsyncClient, headers: dict, **params) -> List[int]:
+    """Follow next_cursor from the first page and return the user ids."""
+    ids: List[int] = []
+    cursor = None
+    while True:
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get(API_USERS_ENDPOINT, headers=headers, params=params)
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        ids.extend(user["id"] for user in data["items"])
+        cursor = data["next_cursor"]
+        assert data["has_more"] is (cursor is not None)
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.asyncio
+async def test_read_users_cursor(
+    client: AsyncClient, superuser_token_headers: dict, many_users: List[User]
+):
+    """Test following cursors returns every user once, in order."""
+    ids = await read_all_pages(client, superuser_token_headers, limit=2)
+    assert ids == sorted(ids)
+    assert len(ids) == 6
+
+    ids = await read_all_pages(client, superuser_token_headers, limit=2, sort="-id")
+    assert ids == sorted(ids, reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_read_users_cursor_sort_key(
+    client: AsyncClient, superuser_token_headers: dict, many_users: List[User]
+):
+    """Test cursors over a non-unique sort key break ties by id."""
+    ids = await read_all_pages(
+        client, superuser_token_headers, limit=2, sort="date_joined", count="none"
+    )
+    by_day = [user.id for user in many_users if user.date_joined.day == 1]
+    by_day += [user.id for user in many_users if user.date_joined.day == 2]
+    # The superuser joined today, after all of them
+    assert ids[:5] == by_day
+    assert len(ids) == 6
+
+
+@pytest.mark.asyncio
+async def test_read_users_cursor_email(
+    client: AsyncClient,
+    superuser_token_headers: dict,
+    async_db: AsyncSession,
+    many_users: List[User],
+    statements: List[str],
+):
+    """Test emails sort in any case on lower(email) alone, as indexed."""
+    many_users[3].email = "User3@example.com"
+    await async_db.commit()
+    statements.clear()
+    ids = await read_all_pages(
+        client, superuser_token_headers, limit=2, sort="-email", count="none"
+    )
+    # admin@ sorts before user0@ to user4@
+    assert ids == [user.id for user in reversed(many_users)] + [ids[-1]]
+    pages = [s for s in statements if "ORDER BY lower(users.email) DESC" in s]
+    assert len(pages) == 3
+    assert all("users.id DESC" not in page for page in pages)
+
+
+@pytest.mark.asyncio
+async def test_read_users_offset(
+    client: AsyncClient, superuser_token_headers: dict, many_users: List[User]
+):
+    """Test offset pagination and the total are kept."""
+    response = await client.get(
+        API_USERS_ENDPOINT,
+        headers=superuser_token_headers,
+        params={"skip": 4, "limit": 2},
+    )
+    data = response.json()
+    assert [user["id"] for user in data["items"]] == [
+        many_users[3].id,
+        many_users[4].id,
+    ]
+    assert data["total"] == 6
+    assert data["has_more"] is False
+
+
+@pytest.mark.asyncio
+async def test_read_users_count_modes(
+    client: AsyncClient,
+    superuser_token_headers: dict,
+    many_users: List[User],
+    statements: List[str],
+):
+    """Test the total can be skipped and the exact count is cached."""
+    response = await client.get(
+        API_USERS_ENDPOINT, headers=superuser_token_headers, params={"count": "none"}
+    )
+    assert response.json()["total"] is None
+
+    for _ in range(2):
+        response = await client.get(
+            API_USERS_ENDPOINT,
+            headers=superuser_token_headers,
+            params={"count": "estimated"},
+        )
+        # SQLite has no planner estimate and falls back to the exact count
+        assert response.json()["total"] == 6
+    assert sum("count(" in statement for statement in statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_read_users_invalid_cursor(
+    client: AsyncClient, superuser_token_headers: dict, many_users: List[User]
+):
+    """Test malformed cursors and cursors of another sort are rejected."""
+    response = await client.get(
+        API_USERS_ENDPOINT,
+        headers=superuser_token_headers,
+        params={"limit": 2, "sort": "date_joined"},
+    )
+    cursor = response.json()["next_cursor"]
+    for params in (
+        {"cursor": "not-a-cursor"},
+        {"cursor": cursor},
+        {"cursor": cursor, "sort": "date_joined", "skip": 2},
+        # Sort values of the wrong type, crafted by the client
+        {"cursor": encode_cursor(["username", [1, 2], 1]), "sort": "username"},
+        {"cursor": encode_cursor(["id", "abc", 1])},
+        {"cursor": encode_cursor(["id", True, 1])},
+        {"cursor": encode_cursor(["date_joined", 1, 1]), "sort": "date_joined"},
+    ):
+        response = await client.get(
+            API_USERS_ENDPOINT, headers=superuser_token_headers, params=params
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_export_users_ndjson(
+    client: AsyncClient, superuser_token_headers: dict, many_users: List[User]
+):
+    """Test exporting users as NDJSON."""
+    response = await client.get(
+        f"{API_USERS_ENDPOINT}/export",
+        headers=superuser_token_headers,
+        params={"sort": "-id"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == sorted(
+        (row["id"] for row in rows), reverse=True
+    )
+    assert len(rows) == 6
+    assert rows[0]["email"] == many_users[-1].email
+    assert "password" not in rows[0]
+
+
+@pytest.mark.asyncio
+async def test_export_users_csv(
+    client: AsyncClient, superuser_token_headers: dict, many_users: List[User]
+):
+    """Test exporting users as CSV."""
+    response = await client.get(
+        f"{API_USERS_ENDPOINT}/export",
+        headers=superuser_token_headers,
+        params={"format": "csv"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 6
+    assert rows[1]["username"] == many_users[0].username
+    assert rows[1]["last_login"] == ""
+
+
+@pytest.mark.asyncio
+async def test_export_users_normal_user(
+    client: AsyncClient, normal_user_token_headers: dict
+):
+    """Test exporting users as normal user."""
+    response = await client.get(
+        f"{API_USERS_ENDPOINT}/export", headers=normal_user_token_headers
+    )
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.asyncio
+async def test_import_users_ndjson(
+    client: AsyncClient,
+    superuser_token_headers: dict,
+    normal_user: User,
+    statements: List[str],
+):
+    """Test importing users reports failed rows without aborting."""
+    rows = [
+        {"email": "new1@example.com", "username": "new1", "password": "newpass123"},
+        {"email": normal_user.email, "username": "new2", "password": "newpass123"},
+        {"email": "new3@example.com", "username": "new1", "password": "newpass123"},
+        {"email": "not-an-email", "username": "new4", "password": "newpass123"},
+        {"email": "new5@example.com", "username": "new5", "password": "newpass123"},
+    ]
+    body = "\n".join(json.dumps(row) for row in rows) + "\n{not json\n"
+    statements.clear()
+    response = await client.post(
+        f"{API_USERS_ENDPOINT}/import",
+        headers=superuser_token_headers,
+        content=body.encode(),
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["created"] == 2
+    assert data["failed"] == 4
+    assert [(error["line"], error["code"]) for error in data["errors"]] == [
+        (4, ErrorCode.VALIDATION_ERROR_CODE),
+        (6, ErrorCode.VALIDATION_ERROR_CODE),
+        (2, ErrorCode.EMAIL_ALREADY_EXISTS_CODE),
+        (3, ErrorCode.USERNAME_ALREADY_EXISTS_CODE),
+    ]
+    assert sum(s.startswith("INSERT INTO users") for s in statements) == 1
+
+    response = await client.post(
+        AUTH_LOGIN_ENDPOINT,
+        json={"email": "new5@example.com", "password": "newpass123"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.asyncio
+async def test_import_users_csv(client: AsyncClient, superuser_token_headers: dict):
+    """Test importing users from CSV."""
+    body = (
+        "email,username,password,first_name\r\n"
+        "new1@example.com,new1,newpass123,New\r\n"
+        "new2@example.com,new2,newpass123,\r\n"
+    )
+    response = await client.post(
+        f"{API_USERS_ENDPOINT}/import",
+        headers=superuser_token_headers,
+        params={"format": "csv"},
+        content=body.encode(),
+    )
+    assert response.json()["created"] == 2
+
+    response = await client.get(
+        f"{API_USERS_ENDPOINT}/export",
+        headers=superuser_token_headers,
+        params={"format": "csv"},
+    )
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [(row["username"], row["first_name"]) for row in rows[1:]] == [
+        ("new1", "New"),
+        ("new2", ""),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_import_users_copy_into_timestamp_columns(
+    client: AsyncClient, superuser_token_headers: dict, async_db: AsyncSession
+):
+    """Test COPY imports into the migrated schema's naive timestamp columns."""
+    if async_db.bind.dialect.name != "postgresql":
+        pytest.skip("COPY is only used on PostgreSQL")
+    # Migrations create timestamp without time zone columns
+    for column in ("date_joined", "last_login", "created_at", "updated_at"):
+        await async_db.execute(
+            text(f"ALTER TABLE users ALTER COLUMN {column} TYPE timestamp")
+        )
+    await async_db.commit()
+    rows = [
+        {
+            "email": "new1@example.com",
+            "username": "new1",
+            "password": "newpass123",  # NOSONAR
+            "date_joined": "2024-01-01T12:00:00+02:00",
+        },
+        {
+            "email": "new2@example.com",
+            "username": "new2",
+            "password": "newpass123",  # NOSONAR
+            "date_joined": "2024-01-01T12:00:00",
+        },
+        {"email": "new3@example.com", "username": "new3", "password": "newpass123"},
+    ]
+    response = await client.post(
+        f"{API_USERS_ENDPOINT}/import",
+        headers=superuser_token_headers,
+        content="\n".join(json.dumps(row) for row in rows).encode(),
+    )
+    assert response.json() == {"created": 3, "failed": 0, "errors": []}
+    result = await async_db.execute(
+        select(User.date_joined, User.created_at).where(
+            User.username.in_(["new1", "new2"])
+        )
+    )
+    for date_joined, created_at in result:
+        assert date_joined.date() == date(2024, 1, 1)
+        assert created_at.date() > date(2024, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_import_users_normal_user(
+    client: AsyncClient, normal_user_token_headers: dict
+):
+    """Test importing users as normal user."""
+    response = await client.post(
+        f"{API_USERS_ENDPOINT}/import", headers=normal_user_token_headers, content=b""
+    )
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
 @pytest.mark.asyncio
 async def test_read_user_by_id_not_found(
     client: AsyncClient, superuser_token_headers: dict
@@ -161,6 +576,94 @@ async def test_update_user_me(client: AsyncClient, normal_user_token_headers: di
     assert data["last_name"] == update_data["last_name"]
 
 
+@pytest.mark.asyncio
+async def test_update_user_me_single_statement(
+    client: AsyncClient, normal_user_token_headers: dict, statements: List[str]
+):
+    """Test updating a name is one UPDATE ... RETURNING with a cached user."""
+    await client.get(API_ME_ENDPOINT, headers=normal_user_token_headers)
+    statements.clear()
+    response = await client.patch(
+        API_ME_ENDPOINT, headers=normal_user_token_headers, json={"last_name": "New"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["last_name"] == "New"
+    assert len(statements) == 1
+    assert statements[0].startswith("UPDATE users")
+    assert "RETURNING" in statements[0]
+
+
+@pytest.mark.asyncio
+async def test_update_user_me_password(
+    client: AsyncClient,
+    normal_user: User,
+    normal_user_token_headers: dict,
+    statements: List[str],
+):
+    """Test changing the password reads the user once before hashing."""
+    await client.get(API_ME_ENDPOINT, headers=normal_user_token_headers)
+    statements.clear()
+    response = await client.patch(
+        API_ME_ENDPOINT,
+        headers=normal_user_token_headers,
+        json={"password": "newpass123"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert len(statements) == 2
+
+    response = await client.post(
+        AUTH_LOGIN_ENDPOINT,
+        json={"email": normal_user.email, "password": "newpass123"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.asyncio
+async def test_update_user_me_existing_email(
+    client: AsyncClient, superuser: User, normal_user_token_headers: dict
+):
+    """Test updating to a taken email is reported by the unique index."""
+    response = await client.patch(
+        API_ME_ENDPOINT,
+        headers=normal_user_token_headers,
+        json={"email": superuser.email},
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json()["code"] == ErrorCode.EMAIL_ALREADY_EXISTS_CODE
+
+    response = await client.get(API_ME_ENDPOINT, headers=normal_user_token_headers)
+    assert response.json()["email"] == "user@example.com"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("field", ["email", "is_active", "password"])
+async def test_update_user_me_null_is_ignored(
+    client: AsyncClient, normal_user: User, normal_user_token_headers: dict, field
+):
+    """Test a null field is left as it is instead of violating NOT NULL."""
+    response = await client.patch(
+        API_ME_ENDPOINT, headers=normal_user_token_headers, json={field: None}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["email"] == normal_user.email
+    assert response.json()["is_active"] is True
+
+    response = await client.post(
+        AUTH_LOGIN_ENDPOINT,
+        json={"email": normal_user.email, "password": "testpass123"},  # NOSONAR
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.asyncio
+async def test_insert_user_not_null_violation_is_raised(async_db: AsyncSession):
+    """Test integrity errors other than unique violations are not duplicates."""
+    with pytest.raises(IntegrityError):
+        await UserService(async_db).insert(
+            {"email": "new@example.com", "username": "new", "password": None}
+        )
+
+
 @pytest.mark.asyncio
 async def test_delete_user(
     client: AsyncClient, superuser_token_headers: dict, normal_user: User
@@ -170,3 +673,124 @@ async def test_delete_user(
         f"/api/v1/users/{normal_user.id}", headers=superuser_token_headers
     )
     assert response.status_code == status.HTTP_204_NO_CONTENT
+
+
+@pytest.mark.asyncio
+async def test_read_user_me_uses_user_cache(
+    client: AsyncClient, normal_user: User, normal_user_token_headers: dict
+):
+    """Test the current user is served from the identity cache."""
+    await client.get(API_ME_ENDPOINT, headers=normal_user_token_headers)
+    hits = user_cache.hits
+    response = await client.get(API_ME_ENDPOINT, headers=normal_user_token_headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["email"] == normal_user.email
+    assert user_cache.hits == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_update_user_me_invalidates_user_cache(
+    client: AsyncClient, normal_user: User, normal_user_token_headers: dict
+):
+    """Test updating the current user evicts it from the identity cache."""
+    await client.get(API_ME_ENDPOINT, headers=normal_user_token_headers)
+    assert user_cache.get(normal_user.id) is not None
+
+    await client.patch(
+        API_ME_ENDPOINT, headers=normal_user_token_headers, json={"first_name": "New"}
+    )
+    assert user_cache.get(normal_user.id) is None
+
+    response = await client.get(API_ME_ENDPOINT, headers=normal_user_token_headers)
+    assert response.json()["first_name"] == "New"
+
+
+@pytest.mark.asyncio
+async def test_update_users_batch(
+    client: AsyncClient,
+    superuser_token_headers: dict,
+    normal_user: User,
+    normal_user_token_headers: dict,
+    many_users: List[User],
+    statements: List[str],
+):
+    """Test deactivating users in one statement evicts them from the cache."""
+    await client.get(API_ME_ENDPOINT, headers=normal_user_token_headers)
+    assert user_cache.get(normal_user.id) is not None
+
+    statements.clear()
+    response = await client.patch(
+        f"{API_USERS_ENDPOINT}:batch",
+        headers=superuser_token_headers,
+        json={
+            "ids": [normal_user.id, many_users[0].id, 999],
+            "changes": {"is_active": False},
+        },
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["results"] == [
+        {"id": normal_user.id, "status": "updated"},
+        {"id": many_users[0].id, "status": "updated"},
+        {"id": 999, "status": "not_found"},
+    ]
+    assert sum(s.startswith("UPDATE users") for s in statements) == 1
+    assert user_cache.get(normal_user.id) is None
+
+    response = await client.get(API_ME_ENDPOINT, headers=normal_user_token_headers)
+    assert response.json()["code"] == ErrorCode.USER_IS_INACTIVE_CODE
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("changes", [{}, {"is_active": None}])
+async def test_update_users_batch_without_changes(
+    client: AsyncClient, superuser_token_headers: dict, normal_user: User, changes
+):
+    """Test a batch update without changes, or with only nulls, is rejected."""
+    response = await client.patch(
+        f"{API_USERS_ENDPOINT}:batch",
+        headers=superuser_token_headers,
+        json={"ids": [normal_user.id], "changes": changes},
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json()["code"] == ErrorCode.VALIDATION_ERROR_CODE
+
+
+@pytest.mark.asyncio
+async def test_delete_users_batch(
+    client: AsyncClient,
+    superuser_token_headers: dict,
+    many_users: List[User],
+    statements: List[str],
+):
+    """Test deleting users in one statement."""
+    ids = [user.id for user in many_users[:3]]
+    statements.clear()
+    response = await client.request(
+        "DELETE",
+        f"{API_USERS_ENDPOINT}:batch",
+        headers=superuser_token_headers,
+        json={"ids": [*ids, ids[0], 999]},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["results"] == [
+        *({"id": user_id, "status": "deleted"} for user_id in ids),
+        {"id": 999, "status": "not_found"},
+    ]
+    assert sum(s.startswith("DELETE FROM users") for s in statements) == 1
+
+    response = await client.get(API_USERS_ENDPOINT, headers=superuser_token_headers)
+    assert response.json()["total"] == 3
+
+
+@pytest.mark.asyncio
+async def test_delete_users_batch_normal_user(
+    client: AsyncClient, normal_user_token_headers: dict
+):
+    """Test deleting users in batch as normal user."""
+    response = await client.request(
+        "DELETE",
+        f"{API_USERS_ENDPOINT}:batch",
+        headers=normal_user_token_headers,
+        json={"ids": [1]},
+    )
+    assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -1,33 +1,128 @@
+import os
+from contextlib import contextmanager
 from datetime import datetime
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Callable, ContextManager, Generator, Iterator, List
 
+import pytest
 import pytest_asyncio
+from ecdsa import NIST256p
+from ecdsa import SigningKey as ECDSASigningKey
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
+from app import middleware
 from app.api.deps import get_db
+from app.core import rate_limit, security
+from app.core.config import settings
+from app.core.keys import KeyRing, SigningKey
+from app.core.rate_limit import MemoryRateLimitBackend, RateLimiter
 from app.core.security import create_token
 from app.db.base import Base
+from app.db.instrumentation import instrument_queries
 from app.main import app
 from app.models.user import User
+from app.services.users import user_cache, user_count_cache
 
-SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
+SQLALCHEMY_DATABASE_URL = os.getenv(
+    "TEST_DATABASE_URL", "sqlite+aiosqlite:///./test.db"
+)
 
-# Create async engine
+# Create async engine; connections are not pooled since each test runs its own
+# event loop, which asyncpg connections are bound to
 engine = create_async_engine(
     SQLALCHEMY_DATABASE_URL,
     echo=True,
     future=True,
+    poolclass=NullPool,
 )
+instrument_queries(engine)
 
 # Create async session factory
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
+@pytest.fixture
+def statements() -> Generator[List[str], None, None]:
+    """Record the SQL statements executed on the test engine."""
+    executed: List[str] = []
+
+    def before_cursor_execute(_conn, _cursor, statement, *_args) -> None:
+        executed.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    yield executed
+    event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def query_budget(statements: List[str]) -> Callable[[int], ContextManager[None]]:
+    """Fail a test if a block executes more SQL statements than allowed.
+
+    Usage: ``with query_budget(2): await client.get(...)``
+    """
+
+    @contextmanager
+    def budget(max_queries: int) -> Iterator[None]:
+        start = len(statements)
+        yield
+        executed = statements[start:]
+        assert len(executed) <= max_queries, (
+            f"{len(executed)} queries executed, budget is {max_queries}:\n"
+            + "\n".join(executed)
+        )
+
+    return budget
+
+
+class FakeTimer:
+    """Manually advanced clock."""
+
+    now = 1000.0
+
+    def __call__(self) -> float:
+        """Return the current fake time."""
+        return self.now
+
+
+@pytest.fixture
+def fake_timer() -> FakeTimer:
+    """Return a clock that only moves when a test sets or advances ``now``."""
+    return FakeTimer()
+
+
+@pytest.fixture(scope="session")
+def es256_pem() -> str:
+    """Return a PEM encoded ES256 private key."""
+    return ECDSASigningKey.generate(curve=NIST256p).to_pem().decode()
+
+
+@pytest.fixture
+def es256_key_ring(monkeypatch, es256_pem: str) -> KeyRing:
+    """Sign tokens with an ES256 key ring for the duration of a test."""
+    key_ring = KeyRing(
+        [
+            SigningKey.from_pem(
+                None,
+                settings.SECURITY_ALGORITHM,
+                settings.SECRET_KEY.get_secret_value(),
+            ),
+            SigningKey.from_pem("es256-1", "ES256", es256_pem),
+        ],
+        active_kid="es256-1",
+    )
+    monkeypatch.setattr(security, "key_ring", key_ring)
+    return key_ring
+
+
 @pytest_asyncio.fixture(scope="function")
 async def async_db() -> AsyncGenerator[AsyncSession, None]:
     """Create a fresh database for each test."""
+    # IDs are reused across tests, so cached users must not leak between them
+    user_cache.clear()
+    user_count_cache.clear()
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
@@ -42,8 +137,12 @@ async def async_db() -> AsyncGenerator[AsyncSession, None]:
 
 
 @pytest_asyncio.fixture
-async def client(async_db: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
+async def client(
+    monkeypatch, async_db: AsyncSession
+) -> AsyncGenerator[AsyncClient, None]:
     """Create a new FastAPI TestClient that uses the `db` fixture."""
+    login_rate_limiter = RateLimiter(MemoryRateLimitBackend())
+    monkeypatch.setattr(rate_limit, "login_rate_limiter", login_rate_limiter)
 
     async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
         try:
@@ -52,6 +151,8 @@ async def client(async_db: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
             await async_db.close()
 
     app.dependency_overrides[get_db] = override_get_db
+    # Profiled requests are authorized outside of the dependencies
+    monkeypatch.setattr(middleware, "AsyncSessionLocal", AsyncSessionLocal)
     transport = ASGITransport(app=app)
     async with AsyncClient(
         transport=transport, base_url="http://test"  ## NOSONAR
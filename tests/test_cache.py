@@ -0,0 +1,52 @@
+from app.utils.cache import TTLCache
+
+
+def test_get_and_set():
+    """Test storing and reading an entry."""
+    cache = TTLCache(maxsize=2, ttl=10)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_entry_expires(fake_timer):
+    """Test entries expire after the TTL."""
+    cache = TTLCache(maxsize=2, ttl=10, timer=fake_timer)
+    cache.set("a", 1)
+    fake_timer.now += 10
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_entry_ttl_is_capped(fake_timer):
+    """Test a per-entry TTL can shorten but not extend the cache TTL."""
+    cache = TTLCache(maxsize=2, ttl=10, timer=fake_timer)
+    cache.set("short", 1, ttl=1)
+    cache.set("long", 2, ttl=100)
+    fake_timer.now += 5
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+    fake_timer.now += 5
+    assert cache.get("long") is None
+
+
+def test_lru_eviction():
+    """Test the least recently used entry is evicted when full."""
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_disabled_cache():
+    """Test a cache with maxsize 0 stores nothing."""
+    cache = TTLCache(maxsize=0, ttl=10)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert not cache.stats()["enabled"]
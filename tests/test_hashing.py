@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from app.core.constants import HasherExecutor
+from app.core.hashing import PasswordHasher
+from app.errors.exception import ServiceUnavailableError
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify():
+    """Test hashing and verifying a password in the pool."""
+    hasher = PasswordHasher(HasherExecutor.THREAD, max_workers=2)
+    try:
+        hashed = await hasher.hash("testpass123")
+        assert hashed != "testpass123"
+        assert await hasher.verify("testpass123", hashed)
+        assert not await hasher.verify("wrongpass", hashed)
+    finally:
+        hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_inline_executor():
+    """Test inline executor hashes on the calling thread."""
+    hasher = PasswordHasher(HasherExecutor.INLINE)
+    hashed = await hasher.hash("testpass123")
+    assert await hasher.verify("testpass123", hashed)
+    assert hasher.stats()["completed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_queue_limit_rejects_calls():
+    """Test calls beyond the queue limit are rejected."""
+    hasher = PasswordHasher(HasherExecutor.THREAD, max_workers=1, max_queue_size=0)
+    try:
+        running = asyncio.ensure_future(hasher.hash("testpass123"))
+        await asyncio.sleep(0)
+        assert hasher.stats()["busy_workers"] == 1
+        assert hasher.stats()["utilization"] == 1.0
+
+        with pytest.raises(ServiceUnavailableError):
+            await hasher.hash("testpass123")
+
+        await running
+        stats = hasher.stats()
+        assert stats["rejected"] == 1
+        assert stats["busy_workers"] == 0
+    finally:
+        hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hash_many_bypasses_queue_limit():
+    """Test a batch larger than the queue is hashed, max_workers at a time."""
+    hasher = PasswordHasher(HasherExecutor.THREAD, max_workers=2, max_queue_size=0)
+    passwords = [f"testpass{i}" for i in range(5)]
+    try:
+        batch = asyncio.ensure_future(hasher.hash_many(passwords))
+        await asyncio.sleep(0.01)
+        assert hasher.stats()["busy_workers"] == 2
+        assert hasher.stats()["queued"] == 0
+
+        hashed = await batch
+        assert len(hashed) == 5
+        assert await hasher.verify("testpass3", hashed[3])
+        assert hasher.stats()["rejected"] == 0
+    finally:
+        hasher.shutdown()
@@ -0,0 +1,96 @@
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.instrumentation import (
+    QueryStats,
+    SlowQueryLog,
+    instrument_queries,
+    redact,
+    track_queries,
+)
+
+
+@pytest.mark.asyncio
+async def test_track_queries_counts_statements():
+    """Test statements are counted only inside track_queries."""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    instrument_queries(engine)
+    async with engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+        with track_queries() as stats:
+            await connection.execute(text("SELECT 1"))
+            await connection.execute(text("SELECT 2"))
+    await engine.dispose()
+
+    assert stats.count == 2
+    assert stats.duration > 0
+    assert stats.shapes == {"SELECT 1": 1, "SELECT 2": 1}
+    assert stats.server_timing().endswith('desc="2 queries"')
+
+
+def test_repeated_statement_warns_once():
+    """Test a statement repeated over the threshold logs one N+1 warning."""
+    warnings: List[str] = []
+    handler_id = logger.add(warnings.append, level="WARNING", format="{message}")
+    try:
+        stats = QueryStats(n_plus_one_threshold=3)
+        for _ in range(3):
+            stats.record("SELECT * FROM users WHERE id = ?", 0.001)
+        assert warnings == []
+        for _ in range(3):
+            stats.record("SELECT * FROM users WHERE id = ?", 0.001)
+    finally:
+        logger.remove(handler_id)
+
+    assert len(warnings) == 1
+    assert "Possible N+1 query" in warnings[0]
+
+
+def test_redact_keeps_shape_only():
+    """Test parameter values are replaced by their type names."""
+    assert redact(("secret@example.com", 42)) == ["str", "int"]
+    assert redact({"email": "secret@example.com"}) == {"email": "str"}
+    assert redact([("a", None), ("b", None)]) == [["str", "NoneType"]] * 2
+
+
+@pytest.mark.asyncio
+async def test_slow_queries_are_logged_and_explained(tmp_path: Path, fake_timer):
+    """Test slow statements are logged redacted and plans are rate limited."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'slow.db'}")
+    slow_query_log = SlowQueryLog(
+        engine, threshold=0, explain=True, explain_interval=60, timer=fake_timer
+    )
+    instrument_queries(engine, slow_query_log)
+    records: List[Dict[str, Any]] = []
+    handler_id = logger.add(
+        lambda message: records.append(message.record),
+        level="WARNING",
+        format="{message}",
+    )
+    try:
+        async with engine.connect() as connection:
+            for _ in range(2):
+                await connection.execute(
+                    text("SELECT :email AS email"), {"email": "secret@example.com"}
+                )
+                await slow_query_log.drain()
+            fake_timer.now += 60
+            await connection.execute(text("SELECT 1"))
+            await slow_query_log.drain()
+    finally:
+        logger.remove(handler_id)
+        await engine.dispose()
+
+    # The second statement falls within the interval of the first plan
+    assert slow_query_log.explained == 2
+    plans = [record for record in records if record["message"] == "Slow query plan"]
+    assert [plan["extra"]["extra"]["statement"] for plan in plans] == [
+        "SELECT ? AS email",
+        "SELECT 1",
+    ]
+    assert all("secret" not in str(record) for record in records)
@@ -0,0 +1,166 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Callable
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import User
+from app.services.last_login import LastLoginBuffer
+
+
+def session_factory(db: AsyncSession) -> Callable[[], AsyncSession]:
+    """Return a factory of sessions bound to the test database."""
+    return lambda: AsyncSession(db.bind, expire_on_commit=False)
+
+
+async def last_login(db: AsyncSession, user_id: int) -> datetime:
+    """Read a user's last login from the database, as naive UTC."""
+    value = await db.scalar(select(User.last_login).where(User.id == user_id))
+    # PostgreSQL returns aware datetimes, SQLite naive ones
+    return value.replace(tzinfo=None)
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_latest_login(
+    async_db: AsyncSession, normal_user, superuser
+):
+    """Test a flush writes the latest buffered login of every user."""
+    buffer = LastLoginBuffer(session_factory(async_db))
+    first = datetime(2024, 1, 1, 12, 0)
+    buffer.record(normal_user.id, first + timedelta(minutes=5))
+    buffer.record(normal_user.id, first)
+    buffer.record(superuser.id, first)
+    assert buffer.stats()["pending"] == 2
+
+    await buffer.flush()
+
+    assert await last_login(async_db, normal_user.id) == first + timedelta(minutes=5)
+    assert await last_login(async_db, superuser.id) == first
+    assert buffer.stats()["pending"] == 0
+    assert buffer.stats()["flushed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_stop_drains_buffer(async_db: AsyncSession, normal_user, statements):
+    """Test stopping the background flusher writes pending logins."""
+    buffer = LastLoginBuffer(session_factory(async_db), flush_interval=60)
+    buffer.start()
+    assert buffer.running
+    login = datetime(2024, 1, 1, 12, 0)
+    buffer.record(normal_user.id, login)
+
+    await buffer.stop()
+
+    assert not buffer.running
+    assert await last_login(async_db, normal_user.id) == login
+    assert sum(s.startswith("UPDATE users") for s in statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_size_triggers_flush(
+    async_db: AsyncSession, normal_user, superuser
+):
+    """Test reaching the batch size wakes the flusher before the interval."""
+    buffer = LastLoginBuffer(session_factory(async_db), flush_interval=60, batch_size=2)
+    buffer.start()
+    login = datetime(2024, 1, 1, 12, 0)
+    buffer.record(normal_user.id, login)
+    buffer.record(superuser.id, login)
+    for _ in range(100):
+        if buffer.stats()["flushed"] == 2:
+            break
+        await asyncio.sleep(0.01)
+
+    assert buffer.stats()["flushed"] == 2
+    await buffer.stop()
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_rows(normal_user):
+    """Test logins of a failed flush are buffered again."""
+
+    def broken_session() -> AsyncSession:
+        raise ConnectionError("database is down")
+
+    buffer = LastLoginBuffer(broken_session)
+    buffer.record(normal_user.id, datetime(2024, 1, 1, 12, 0))
+
+    await buffer.flush()
+
+    assert buffer.stats()["pending"] == 1
+    assert buffer.stats()["failed_flushes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_flushes_back_off(normal_user, superuser):
+    """Test the flusher waits longer after each failure, even when full."""
+    attempts = 0
+
+    def broken_session() -> AsyncSession:
+        nonlocal attempts
+        attempts += 1
+        raise ConnectionError("database is down")
+
+    buffer = LastLoginBuffer(
+        broken_session, flush_interval=0.01, batch_size=1, max_retry_delay=0.04
+    )
+    buffer.start()
+    login = datetime(2024, 1, 1, 12, 0)
+    buffer.record(normal_user.id, login)
+    await asyncio.sleep(0.2)
+    buffer.record(superuser.id, login)
+    await asyncio.sleep(0)
+
+    # Retries after 0.02s, then every 0.04s, instead of in a busy loop
+    assert 3 <= attempts <= 7
+    assert buffer.retry_delay == 0.04
+    stats = buffer.stats()
+    assert stats["pending"] == 2
+    assert stats["consecutive_failures"] == attempts
+    await buffer.stop()
+    assert buffer.stats()["failed_flushes"] == attempts
+
+
+@pytest.mark.asyncio
+async def test_postgresql_flush_is_one_update_from_values():
+    """Test PostgreSQL gets one UPDATE ... FROM (VALUES ...) per batch."""
+    executed = []
+
+    class PostgresSession:
+        """Session of a PostgreSQL engine recording executed statements."""
+
+        bind = SimpleNamespace(dialect=postgresql.dialect())
+
+        async def __aenter__(self) -> "PostgresSession":
+            return self
+
+        async def __aexit__(self, *_exc_info) -> None:
+            pass
+
+        async def execute(self, statement, *_args) -> None:
+            executed.append(statement)
+
+        async def commit(self) -> None:
+            pass
+
+    buffer = LastLoginBuffer(PostgresSession, batch_size=2)
+    for user_id in (1, 2, 3):
+        buffer.record(user_id, datetime(2024, 1, 1, 12, user_id))
+
+    await buffer.flush()
+
+    assert buffer.stats()["flushed"] == 3
+    sql = [
+        str(statement.compile(dialect=postgresql.dialect())) for statement in executed
+    ]
+    assert len(sql) == 2
+    assert all(
+        statement.startswith("UPDATE users SET last_login=last_logins.last_login")
+        and "FROM (VALUES" in statement
+        and "WHERE users.id = last_logins.id" in statement
+        for statement in sql
+    )
@@ -0,0 +1,71 @@
+import multiprocessing
+from pathlib import Path
+
+import pytest
+
+from app.core import metrics
+
+
+def pool_stats(checkouts: int, timeouts: int, waits: int, avg_ms: float) -> dict:
+    """Return pool statistics shaped like those of ``pool_stats``."""
+    return {
+        "checked_out": 1,
+        "idle": 2,
+        "overflow": 0,
+        "checkouts": checkouts,
+        "timeouts": timeouts,
+        "wait": {"count": waits, "avg_ms": avg_ms},
+    }
+
+
+def sample(name: str, labels: dict) -> float:
+    """Return a sample of the default registry, 0 when it is missing."""
+    return metrics.REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_pool_counters_add_what_the_pool_totals_grew_by():
+    """Test the pool's totals are added once, and a new pool counts from zero."""
+    labels = {"engine": "test-pool"}
+    checkouts = sample("db_pool_checkouts_total", labels)
+    wait = sample("db_pool_wait_seconds_total", labels)
+
+    metrics.record_pool_stats("test-pool", pool_stats(10, 1, 4, 250))
+    metrics.record_pool_stats("test-pool", pool_stats(15, 1, 4, 250))
+    assert sample("db_pool_checkouts_total", labels) == checkouts + 15
+    assert sample("db_pool_wait_seconds_total", labels) == wait + 1
+    assert metrics.REGISTRY.get_sample_value(
+        "db_pool_connections", {"engine": "test-pool", "state": "idle"}
+    ) == pytest.approx(2)
+
+    # The engine was disposed and its new pool started over
+    metrics.record_pool_stats("test-pool", pool_stats(3, 0, 0, 0))
+    assert sample("db_pool_checkouts_total", labels) == checkouts + 18
+
+
+def record_in_worker(mark_dead: bool) -> None:
+    """Record metrics as a worker process, exiting cleanly if mark_dead."""
+    metrics.request_duration.labels("GET", "/users", "200").observe(0.02)
+    metrics.requests_in_progress.labels("GET").inc(2)
+    if mark_dead:
+        metrics.mark_process_dead()
+
+
+def test_metrics_are_merged_across_processes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    """Test counters include exited workers while gauges only count live ones."""
+    # Read by prometheus_client when the spawned workers import it
+    monkeypatch.setenv(metrics.MULTIPROC_DIR_ENV, str(tmp_path))
+    context = multiprocessing.get_context("spawn")
+    for mark_dead in (False, True):
+        worker = context.Process(target=record_in_worker, args=(mark_dead,))
+        worker.start()
+        worker.join()
+        assert worker.exitcode == 0
+
+    rendered = metrics.render().decode()
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/users",'
+        'status="200"} 2.0'
+    ) in rendered
+    assert 'http_requests_in_progress{method="GET"} 2.0' in rendered
@@ -0,0 +1,264 @@
+import io
+import json
+import sys
+import threading
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, FastAPI
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from loguru import logger
+from starlette.types import Message, Receive, Scope, Send
+
+from app.core.constants import LogDropPolicy
+from app.middleware import LoggingMiddleware
+from app.utils import logging_config
+from app.utils.logging_config import QueuedJSONSink, setup_logging
+
+SCOPE = {
+    "type": "http",
+    "method": "GET",
+    "scheme": "http",
+    "server": ("test", 80),
+    "path": "/stream",
+    "query_string": b"",
+    "headers": [],
+    "client": ("127.0.0.1", 12345),
+}
+
+
+async def receive() -> Message:
+    """Return an empty request body."""
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def discard(_message: Message) -> None:
+    """Drop a response message."""
+
+
+def app_returning(status_code: int):
+    """Build an ASGI app answering every request with a status code."""
+
+    async def app(_scope: Scope, _receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": status_code})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    return app
+
+
+async def logged_requests(middleware: LoggingMiddleware, scope: Scope) -> List[Dict]:
+    """Serve a request through a middleware and return the records it logged."""
+    records: List[Dict[str, Any]] = []
+    handler_id = logger.add(lambda message: records.append(message.record))
+    try:
+        await middleware(dict(scope), receive, discard)
+    finally:
+        logger.remove(handler_id)
+    return [record for record in records if record["message"].startswith("Request")]
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_is_not_buffered():
+    """Test chunks reach the server as sent and the response is logged."""
+    sent: List[Message] = []
+    records: List[Dict[str, Any]] = []
+
+    async def streaming_app(_scope: Scope, _receive: Receive, send: Send) -> None:
+        logger.info("Handling")
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        for chunk in (b"first", b"second"):
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            # Each chunk is passed on before the app produces the next one
+            assert sent[-1]["body"] == chunk
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message: Message) -> None:
+        sent.append(message)
+
+    handler_id = logger.add(lambda message: records.append(message.record))
+    try:
+        await LoggingMiddleware(streaming_app, sample_rate=1)(
+            dict(SCOPE), receive, send
+        )
+    finally:
+        logger.remove(handler_id)
+
+    assert sent[0]["status"] == 200
+    assert (b"server-timing", b'db;dur=0.0;desc="0 queries"') in sent[0]["headers"]
+    handling, response = records[-2], records[-1]
+    assert handling["message"] == "Handling"
+    assert handling["extra"]["request_id"] == response["extra"]["request_id"]
+    assert response["message"] == "Request"
+    assert response["extra"]["extra"]["status_code"] == 200
+    assert response["extra"]["extra"]["response_size"] == len(b"firstsecond")
+
+
+@pytest.mark.asyncio
+async def test_failed_request_is_logged_and_reraised():
+    """Test an exception of the app is logged and propagated."""
+    records: List[Dict[str, Any]] = []
+
+    async def failing_app(_scope: Scope, _receive: Receive, _send: Send) -> None:
+        raise RuntimeError("boom")
+
+    handler_id = logger.add(lambda message: records.append(message.record))
+    try:
+        with pytest.raises(RuntimeError):
+            await LoggingMiddleware(failing_app, sample_rate=0)(
+                dict(SCOPE), receive, discard
+            )
+    finally:
+        logger.remove(handler_id)
+
+    assert records[-1]["message"] == "Request failed: boom"
+    assert "request_id" in records[-1]["extra"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("status_code", "slow_request_seconds", "logged"),
+    [(200, 10, 0), (404, 10, 1), (500, 10, 1), (200, 0, 1)],
+)
+async def test_only_errors_and_slow_requests_bypass_sampling(
+    status_code: int, slow_request_seconds: float, logged: int
+):
+    """Test unsampled requests are only logged when they fail or are slow."""
+    middleware = LoggingMiddleware(
+        app_returning(status_code),
+        sample_rate=0,
+        slow_request_seconds=slow_request_seconds,
+    )
+    assert len(await logged_requests(middleware, SCOPE)) == logged
+
+
+@pytest.mark.asyncio
+async def test_only_allowlisted_headers_are_logged():
+    """Test credentials in request headers do not reach the logs."""
+    scope = {
+        **SCOPE,
+        "headers": [
+            (b"user-agent", b"pytest"),
+            (b"authorization", b"Bearer secret"),
+            (b"cookie", b"session=secret"),
+        ],
+    }
+    middleware = LoggingMiddleware(
+        app_returning(200), headers=["User-Agent"], sample_rate=1
+    )
+    (record,) = await logged_requests(middleware, scope)
+    assert record["extra"]["extra"]["headers"] == {"user-agent": "pytest"}
+
+
+@pytest.mark.asyncio
+async def test_route_template_includes_router_prefix():
+    """Test requests are logged with the full template of their route."""
+    router = APIRouter()
+
+    @router.get("")
+    async def list_items() -> list:
+        return []
+
+    @router.get("/{item_id}")
+    async def read_item(item_id: int) -> dict:
+        return {"id": item_id}
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api/items")
+    middleware = LoggingMiddleware(app, sample_rate=1)
+    records: List[Dict[str, Any]] = []
+    handler_id = logger.add(lambda message: records.append(message.record))
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=middleware), base_url="http://test"
+        ) as client:
+            for path in ("/api/items", "/api/items/1", "/api/items/2"):
+                await client.get(path)
+    finally:
+        logger.remove(handler_id)
+
+    routes = [record["extra"]["extra"]["route"] for record in records]
+    assert routes == ["/api/items", "/api/items/{item_id}", "/api/items/{item_id}"]
+
+
+def read_lines(stream: io.BytesIO) -> List[Dict[str, Any]]:
+    """Return the JSON lines written to a stream."""
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_queued_json_sink_writes_json_lines():
+    """Test records are written as JSON with extra fields flattened."""
+    stream = io.BytesIO()
+    sink = QueuedJSONSink(stream)
+    handler_id = logger.add(sink, format="{message}")
+    try:
+        logger.bind(request_id="abc").info("Request", extra={"status_code": 200})
+    finally:
+        logger.remove(handler_id)
+        sink.stop()
+
+    (entry,) = read_lines(stream)
+    assert entry["message"] == "Request"
+    assert entry["level"] == "INFO"
+    assert entry["request_id"] == "abc"
+    assert entry["status_code"] == 200
+
+
+class BlockingStream(io.BytesIO):
+    """Stream whose writes wait until released."""
+
+    def __init__(self) -> None:
+        """Initialize BlockingStream."""
+        super().__init__()
+        self.writing = threading.Event()
+        self.release = threading.Event()
+
+    def write(self, data: bytes) -> int:
+        """Wait for the release, then write."""
+        self.writing.set()
+        self.release.wait(timeout=5)
+        return super().write(data)
+
+
+@pytest.mark.parametrize(
+    ("drop_policy", "kept"),
+    [(LogDropPolicy.DROP_NEW, "1"), (LogDropPolicy.DROP_OLDEST, "2")],
+)
+def test_queued_json_sink_drops_records_when_full(drop_policy: str, kept: str):
+    """Test a full queue drops records instead of blocking and reports it."""
+    stream = BlockingStream()
+    sink = QueuedJSONSink(stream, max_size=1, drop_policy=drop_policy)
+    handler_id = logger.add(sink, format="{message}")
+    try:
+        logger.info("0")
+        # The writer is stuck on the first record, one more fits the queue
+        assert stream.writing.wait(timeout=5)
+        logger.info("1")
+        logger.info("2")
+        assert sink.stats()["dropped"] == 1
+    finally:
+        logger.remove(handler_id)
+        stream.release.set()
+        sink.stop()
+
+    entries = read_lines(stream)
+    assert [entry["message"] for entry in entries[:2]] == ["0", kept]
+    assert entries[2]["message"] == ("Dropped 1 log records, the log queue was full")
+
+
+def test_setup_logging_replaces_previous_sink(monkeypatch):
+    """Test setting up logging again stops the previous writer thread."""
+    monkeypatch.setattr(sys, "stdout", SimpleNamespace(buffer=io.BytesIO()))
+    try:
+        setup_logging()
+        first = logging_config.log_sink
+        setup_logging()
+        second = logging_config.log_sink
+        assert second is not first
+        assert not first._thread.is_alive()
+        assert second._thread.is_alive()
+    finally:
+        logger.remove()
+        logging_config.log_sink.stop()
+        logger.add(sys.__stderr__)
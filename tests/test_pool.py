@@ -0,0 +1,106 @@
+from pathlib import Path
+
+import pytest
+from sqlalchemy import exc, text
+
+from app.core.constants import PrePing
+from app.db.pool import asyncpg_connect_args, create_engine, pool_stats
+
+
+def database_url(tmp_path: Path) -> str:
+    """Return the URL of a temporary SQLite database."""
+    return f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}"
+
+
+@pytest.mark.asyncio
+async def test_pool_stats_track_checkouts(tmp_path: Path):
+    """Test checkouts, in-use connections and waits are recorded."""
+    engine = create_engine(
+        database_url(tmp_path), pool_size=2, max_overflow=0, pre_ping=PrePing.NEVER
+    )
+    async with engine.connect() as first, engine.connect() as second:
+        await first.execute(text("SELECT 1"))
+        await second.execute(text("SELECT 1"))
+        stats = pool_stats(engine)
+        assert stats["checked_out"] == 2
+        assert stats["idle"] == 0
+
+    stats = pool_stats(engine)
+    assert stats["checked_out"] == 0
+    assert stats["idle"] == 2
+    assert stats["checkouts"] == stats["checkins"] == 2
+    assert stats["peak_checked_out"] == 2
+    assert stats["wait"]["count"] == 2
+    assert sum(stats["wait"]["buckets_ms"].values()) == 2
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_pool_timeout_is_counted(tmp_path: Path):
+    """Test a checkout that finds no free connection counts as a timeout."""
+    engine = create_engine(
+        database_url(tmp_path),
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.01,
+        pre_ping=PrePing.NEVER,
+    )
+    async with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            async with engine.connect():
+                pass
+    assert pool_stats(engine)["timeouts"] == 1
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_stats_survive_dispose(tmp_path: Path):
+    """Test the pool created by dispose keeps reporting to the same metrics."""
+    engine = create_engine(database_url(tmp_path), pre_ping=PrePing.NEVER)
+    async with engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+    await engine.dispose()
+    async with engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+    assert pool_stats(engine)["checkouts"] == 2
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("pre_ping", "idle_seconds", "pings"),
+    [
+        (PrePing.IDLE, 0, 2),
+        (PrePing.IDLE, 3600, 0),
+        (PrePing.NEVER, 0, 0),
+    ],
+)
+async def test_idle_pre_ping(
+    tmp_path: Path, pre_ping: str, idle_seconds: float, pings: int
+):
+    """Test only connections idle for longer than the threshold are pinged."""
+    engine = create_engine(
+        database_url(tmp_path),
+        pool_size=1,
+        pre_ping=pre_ping,
+        pre_ping_idle_seconds=idle_seconds,
+    )
+    for _ in range(3):
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+    # A fresh connection is never pinged, reused ones only once idle enough
+    assert pool_stats(engine)["pings"] == pings
+    await engine.dispose()
+
+
+def test_asyncpg_connect_args():
+    """Test prepared statements are cached unless PgBouncer mode is on."""
+    assert asyncpg_connect_args(500, pgbouncer=False) == {
+        "prepared_statement_cache_size": 500
+    }
+
+    args = asyncpg_connect_args(500, pgbouncer=True)
+    assert args["prepared_statement_cache_size"] == 0
+    assert args["statement_cache_size"] == 0
+    name_func = args["prepared_statement_name_func"]
+    assert name_func() != name_func()
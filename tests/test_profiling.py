@@ -0,0 +1,136 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core.profiling import dump_stacks, stack_sampler
+from app.utils.profiling import (
+    AWAIT_FRAME,
+    StackTable,
+    TaskSampler,
+    ThreadSampler,
+)
+
+
+def spin(seconds: float) -> None:
+    """Keep the thread busy without releasing the GIL on purpose."""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+async def busy_then_waiting() -> None:
+    """Block the event loop, then wait."""
+    spin(0.05)
+    await asyncio.sleep(0.05)
+
+
+@pytest.mark.asyncio
+async def test_task_sampler_records_running_and_awaiting_stacks():
+    """Test both time on the loop and time suspended in awaits are sampled."""
+    sampler = TaskSampler(asyncio.current_task(), interval=0.001)
+    sampler.start()
+    await busy_then_waiting()
+    sampler.stop()
+
+    stacks = sampler.table.snapshot()
+    functions = {stack: [name for name, _path, _line in stack] for stack in stacks}
+    running = [stack for stack, names in functions.items() if names[-1] == "spin"]
+    waiting = [stack for stack in stacks if stack[-1] == AWAIT_FRAME]
+    assert running
+    assert any("busy_then_waiting" in functions[stack] for stack in waiting)
+    # Stacks start at the task's coroutine, not in the event loop
+    assert all(
+        functions[stack][0] == "test_task_sampler_records_running_and_awaiting_stacks"
+        for stack in stacks
+    )
+    assert sum(stacks.values()) == pytest.approx(0.1, rel=0.5)
+
+
+def test_stack_table_is_bounded():
+    """Test time in stacks beyond the limit goes to a single other stack."""
+    table = StackTable(max_stacks=1)
+    first = (("main", "app.py", 1),)
+    table.add(first, 0.001)
+    table.add((("other", "app.py", 5),), 0.002)
+    table.add(first, 0.001)
+    assert table.snapshot() == {first: 0.002, StackTable.OTHER: 0.002}
+    assert table.overflowed == 1
+
+
+def test_collapsed_and_speedscope_output():
+    """Test the table renders as collapsed stacks and a speedscope profile."""
+    table = StackTable()
+    table.add((("main", "app.py", 1), ("handler", "app.py", 10)), 0.003)
+    table.add((("main", "app.py", 1),), 0.001)
+
+    assert table.collapsed() == (
+        "main (app.py:1);handler (app.py:10) 3000\nmain (app.py:1) 1000\n"
+    )
+    profile = table.speedscope("GET /")
+    frames = profile["shared"]["frames"]
+    (sampled,) = profile["profiles"]
+    assert [
+        [frames[index]["name"] for index in sample] for sample in sampled["samples"]
+    ] == [["main", "handler"], ["main"]]
+    assert sampled["weights"] == [0.003, 0.001]
+    assert sampled["endValue"] == pytest.approx(0.004)
+
+
+@pytest.mark.asyncio
+async def test_thread_sampler_records_busy_threads():
+    """Test the loop and worker threads are sampled while busy, not idle."""
+    sampler = ThreadSampler(interval=0.001)
+    sampler.start()
+    idle = threading.Event()
+    waiting = threading.Thread(target=idle.wait, name="idle-worker")
+    waiting.start()
+    worker = threading.Thread(target=spin, args=(0.05,), name="busy-worker")
+    worker.start()
+    spin(0.05)
+    await asyncio.sleep(0.05)
+    worker.join()
+    idle.set()
+    waiting.join()
+    sampler.stop()
+
+    roots = {stack[0][0] for stack in sampler.table.snapshot()}
+    loop_stacks = [
+        stack for stack in sampler.table.snapshot() if stack[0] == sampler.LOOP_FRAME
+    ]
+    assert "<thread busy-worker>" in roots
+    assert "<thread idle-worker>" not in roots
+    assert any(stack[-1][0] == "spin" for stack in loop_stacks)
+    # The loop waiting in its selector during the sleep is not recorded
+    assert not any(stack[-1][0].endswith("select") for stack in loop_stacks)
+    stats = sampler.stats()
+    assert stats["samples"] > 0
+    assert stats["stacks"] == len(sampler.table)
+    assert 0 < stats["overhead"] < 1
+
+
+@pytest.mark.asyncio
+async def test_thread_sampler_loop_base_is_idle():
+    """Test a loop showing only the frames below its tasks counts as idle."""
+    sampler = ThreadSampler(interval=60)
+    sampler.start()
+    sampler.stop()
+
+    assert sampler.loop_base
+    assert sampler.idle(sampler.loop_thread_id, sampler.loop_base)
+    assert sampler.idle(sampler.loop_thread_id, sampler.loop_base[:1])
+    callback = (*sampler.loop_base, ("data_received", "protocol.py", 1))
+    assert not sampler.idle(sampler.loop_thread_id, callback)
+
+
+def test_dump_stacks(tmp_path):
+    """Test the sampled stacks are dumped as collapsed stacks to a new file."""
+    stack_sampler.table.add((("main", "app.py", 1),), 0.002)
+    try:
+        path = dump_stacks(tmp_path / "profiles")
+    finally:
+        stack_sampler.table.clear()
+    assert path.parent == tmp_path / "profiles"
+    assert path.name.startswith("stacks-")
+    assert path.read_text() == "main (app.py:1) 2000\n"
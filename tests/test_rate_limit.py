@@ -0,0 +1,40 @@
+import pytest
+
+from app.core.rate_limit import MemoryRateLimitBackend, RateLimiter
+from app.errors.exception import RateLimitExceededError
+
+
+@pytest.mark.asyncio
+async def test_limit_allows_burst_then_rejects(fake_timer):
+    """Test a key may burst up to the limit, then has to wait."""
+    backend = MemoryRateLimitBackend(timer=fake_timer)
+    for _ in range(3):
+        assert await backend.hit("key", limit=3, window=60) == 0
+    assert await backend.hit("key", limit=3, window=60) == pytest.approx(20)
+    assert await backend.hit("other", limit=3, window=60) == 0
+
+    fake_timer.now += 20
+    assert await backend.hit("key", limit=3, window=60) == 0
+    assert await backend.hit("key", limit=3, window=60) > 0
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_key_is_evicted():
+    """Test keys beyond the capacity of a shard are evicted."""
+    backend = MemoryRateLimitBackend(max_keys=1, shards=1)
+    await backend.hit("first", limit=1, window=60)
+    await backend.hit("second", limit=1, window=60)
+    assert backend.stats()["keys"] == 1
+    assert backend.stats()["evictions"] == 1
+    assert await backend.hit("first", limit=1, window=60) == 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_sets_retry_after():
+    """Test rejected requests carry a Retry-After header."""
+    limiter = RateLimiter(MemoryRateLimitBackend())
+    await limiter.check("key", limit=1, window=30)
+    with pytest.raises(RateLimitExceededError) as exc_info:
+        await limiter.check("key", limit=1, window=30)
+    assert exc_info.value.headers == {"Retry-After": "30"}
+    assert limiter.stats()["rejected"] == 1
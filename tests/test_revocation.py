@@ -0,0 +1,129 @@
+import asyncio
+from typing import Dict, List, Optional
+
+import pytest
+
+from app.core.revocation import (
+    LocalRevocationBackend,
+    RedisRevocationBackend,
+    RevocationStore,
+)
+
+
+def test_revoked_until_expiry(fake_timer):
+    """Test a revoked id is dropped once its token has expired."""
+    store = RevocationStore(timer=fake_timer)
+    store.add("jti-1", 1010)
+    store.add("jti-2", 1020)
+    assert store.is_revoked("jti-1")
+    assert not store.is_revoked("jti-3")
+    assert not store.is_revoked(None)
+
+    fake_timer.now = 1010
+    assert not store.is_revoked("jti-1")
+    assert store.is_revoked("jti-2")
+    assert store.stats()["size"] == 1
+
+
+def test_expired_token_is_not_stored(fake_timer):
+    """Test revoking an already expired token keeps the set empty."""
+    store = RevocationStore(timer=fake_timer)
+    store.add("jti-1", 999)
+    assert store.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_revocation_is_shared_between_stores():
+    """Test revocations propagate through a shared backend."""
+    backend = LocalRevocationBackend()
+    first = RevocationStore(backend)
+    await first.start()
+    await first.revoke("jti-1", 4102444800)
+
+    second = RevocationStore(backend)
+    await second.start()
+    assert second.is_revoked("jti-1")
+
+    await second.revoke("jti-2", 4102444800)
+    assert first.is_revoked("jti-2")
+    await first.stop()
+
+
+class FakePubSub:
+    """Subscription that delivers messages, then fails once dropped."""
+
+    def __init__(self, messages: List[str], dropped: Optional[asyncio.Event]) -> None:
+        """Initialize FakePubSub."""
+        self.messages = messages
+        self.dropped = dropped
+
+    async def subscribe(self, _channel: str) -> None:
+        """Subscribe to a channel."""
+
+    async def listen(self):
+        """Yield the messages, then fail when dropped or wait forever."""
+        for data in self.messages:
+            yield {"type": "message", "data": data}
+        await (self.dropped or asyncio.Event()).wait()
+        raise ConnectionError("Connection reset by peer")
+
+    async def aclose(self) -> None:
+        """Close the subscription."""
+
+
+class FakeRedis:
+    """Redis client handing out prepared subscriptions."""
+
+    def __init__(self, subscriptions: List[FakePubSub]) -> None:
+        """Initialize FakeRedis."""
+        self.subscriptions = subscriptions
+        self.stored: Dict[str, str] = {}
+
+    def pubsub(self) -> FakePubSub:
+        """Return the next subscription."""
+        return self.subscriptions.pop(0)
+
+    async def scan_iter(self, match: str):
+        """Yield the stored keys."""
+        for key in list(self.stored):
+            if key.startswith(match.rstrip("*")):
+                yield key
+
+    async def get(self, key: str) -> Optional[str]:
+        """Return a stored value."""
+        return self.stored.get(key)
+
+    async def aclose(self) -> None:
+        """Close the client."""
+
+
+@pytest.mark.asyncio
+async def test_redis_subscription_is_restored(monkeypatch):
+    """Test a dropped subscription is reopened and missed revocations loaded."""
+    pytest.importorskip("redis")
+    monkeypatch.setattr(RedisRevocationBackend, "RECONNECT_MIN_SECONDS", 0)
+    dropped = asyncio.Event()
+    fake_redis = FakeRedis(
+        [
+            FakePubSub(["jti-1 4102444800"], dropped),
+            FakePubSub(["jti-3 4102444800"], None),
+        ]
+    )
+    backend = RedisRevocationBackend("redis://localhost:6379/0")
+    backend._redis = fake_redis
+    backend._pubsub = fake_redis.pubsub()
+    store = RevocationStore(backend)
+    await store.start()
+    for _ in range(10):
+        await asyncio.sleep(0)
+    assert store.is_revoked("jti-1")
+
+    # Revoked while the subscription is down
+    fake_redis.stored["revoked-token:jti-2"] = "4102444800"
+    dropped.set()
+    for _ in range(10):
+        await asyncio.sleep(0)
+    assert store.is_revoked("jti-2")
+    assert store.is_revoked("jti-3")
+
+    await store.stop()
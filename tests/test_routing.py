@@ -0,0 +1,175 @@
+from pathlib import Path
+from typing import AsyncGenerator, Dict
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+
+from app.core.constants import ReplicaSelection
+from app.db.base import Base
+from app.db.routing import (
+    READ_YOUR_WRITES_KEY,
+    RedisStickyBackend,
+    ReplicaRouter,
+    RoutingSession,
+)
+from app.models.user import User
+from app.services.users import UserService
+
+
+@pytest_asyncio.fixture
+async def databases(tmp_path: Path) -> AsyncGenerator[Dict[str, AsyncEngine], None]:
+    """Create a primary and two replicas, each holding one distinct user."""
+    engines = {}
+    for name in ("primary", "replica1", "replica2"):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / name}.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine) as session:
+            session.add(
+                User(
+                    id=1,
+                    email=f"{name}@example.com",
+                    username=name,
+                    password=User.UNUSUAL_PASSWORD,
+                )
+            )
+            await session.commit()
+        engines[name] = engine
+    yield engines
+    for engine in engines.values():
+        await engine.dispose()
+
+
+def routing_session(engine: AsyncEngine, router: ReplicaRouter) -> AsyncSession:
+    """Return a session on the primary engine routed by router."""
+    return AsyncSession(
+        engine,
+        sync_session_class=RoutingSession,
+        router=router,
+        expire_on_commit=False,
+    )
+
+
+async def read_from(session: AsyncSession) -> str:
+    """Return the name of the database a replica read was served by."""
+    user = await UserService(session).get_by_id(1)
+    username = user.username
+    # Drop the user so the next read is not served from the identity map
+    session.expunge(user)
+    return username
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replicas_round_robin(databases: Dict[str, AsyncEngine]):
+    """Test reads alternate between replicas and primary reads stay put."""
+    router = ReplicaRouter([databases["replica1"], databases["replica2"]])
+    async with routing_session(databases["primary"], router) as session:
+        assert [await read_from(session) for _ in range(3)] == [
+            "replica1",
+            "replica2",
+            "replica1",
+        ]
+        user = await UserService(session).get_by_id(1, replica=False)
+        assert user.username == "primary"
+    assert router.stats()["replica_reads"] == 3
+
+
+@pytest.mark.asyncio
+async def test_least_connections(databases: Dict[str, AsyncEngine]):
+    """Test reads avoid the replica with connections in use."""
+    router = ReplicaRouter(
+        [databases["replica1"], databases["replica2"]],
+        selection=ReplicaSelection.LEAST_CONNECTIONS,
+    )
+    async with databases["replica1"].connect():
+        async with routing_session(databases["primary"], router) as session:
+            assert await read_from(session) == "replica2"
+
+
+@pytest.mark.asyncio
+async def test_read_your_writes(databases: Dict[str, AsyncEngine], fake_timer):
+    """Test a writer reads from the primary until the sticky window ends."""
+    router = ReplicaRouter([databases["replica1"]], sticky_seconds=5, timer=fake_timer)
+    async with routing_session(databases["primary"], router) as session:
+        session.info[READ_YOUR_WRITES_KEY] = 1
+        assert await read_from(session) == "replica1"
+        await UserService(session).update_many([1], {"first_name": "New"})
+        # The same session reads from the primary after writing
+        assert await read_from(session) == "primary"
+
+    async with routing_session(databases["primary"], router) as session:
+        session.info[READ_YOUR_WRITES_KEY] = 1
+        assert await read_from(session) == "primary"
+    async with routing_session(databases["primary"], router) as session:
+        session.info[READ_YOUR_WRITES_KEY] = 2
+        assert await read_from(session) == "replica1"
+
+    fake_timer.now += 5
+    async with routing_session(databases["primary"], router) as session:
+        session.info[READ_YOUR_WRITES_KEY] = 1
+        assert await read_from(session) == "replica1"
+    assert router.stats()["sticky_reads"] == 1
+
+
+class FakeRedis:
+    """Redis client keeping keys and their expiry, failing if broken."""
+
+    def __init__(self) -> None:
+        """Initialize FakeRedis."""
+        # Key -> milliseconds until it expires; expiry is not simulated
+        self.expiries: Dict[str, int] = {}
+        self.broken = False
+
+    async def set(self, key: str, _value: int, px: int) -> None:
+        """Store a key expiring in px milliseconds."""
+        if self.broken:
+            raise ConnectionError("Redis is down")
+        self.expiries[key] = px
+
+    async def exists(self, key: str) -> int:
+        """Return 1 if key is stored."""
+        if self.broken:
+            raise ConnectionError("Redis is down")
+        return int(key in self.expiries)
+
+
+def redis_router(replica: AsyncEngine, fake_redis: FakeRedis) -> ReplicaRouter:
+    """Return the router of a worker tracking writers in fake_redis."""
+    backend = RedisStickyBackend("redis://localhost:6379/0", sticky_seconds=5)
+    backend._redis = fake_redis
+    return ReplicaRouter([replica], sticky_backend=backend)
+
+
+@pytest.mark.asyncio
+async def test_read_your_writes_across_workers(databases: Dict[str, AsyncEngine]):
+    """Test a write seen by one worker keeps reads on the primary in another."""
+    pytest.importorskip("redis")
+    fake_redis = FakeRedis()
+    writer = redis_router(databases["replica1"], fake_redis)
+    reader = redis_router(databases["replica1"], fake_redis)
+    async with routing_session(databases["primary"], writer) as session:
+        session.info[READ_YOUR_WRITES_KEY] = 1
+        await UserService(session).update_many([1], {"first_name": "New"})
+    assert fake_redis.expiries == {"read-your-writes:1": 5000}
+
+    async with routing_session(databases["primary"], reader) as session:
+        session.info[READ_YOUR_WRITES_KEY] = 1
+        assert await read_from(session) == "primary"
+    async with routing_session(databases["primary"], reader) as session:
+        session.info[READ_YOUR_WRITES_KEY] = 2
+        assert await read_from(session) == "replica1"
+
+    # Without Redis, reads cannot know whether they are sticky
+    fake_redis.broken = True
+    async with routing_session(databases["primary"], reader) as session:
+        session.info[READ_YOUR_WRITES_KEY] = 2
+        assert await read_from(session) == "primary"
+    assert reader.stats()["sticky"]["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_without_router(databases: Dict[str, AsyncEngine]):
+    """Test every read goes to the primary without a router."""
+    async with routing_session(databases["primary"], None) as session:
+        assert await read_from(session) == "primary"
@@ -3,8 +3,10 @@ from datetime import timedelta
 import pytest
 from jose import JWTError, jwt
 
+from app.core import security
 from app.core.config import settings
-from app.core.security import create_token, verify_token
+from app.core.keys import KeyRing, SigningKey
+from app.core.security import create_token, revoke_token, token_cache, verify_token
 from app.errors.exception import InvalidTokenError, TokenExpiredError
 
 
@@ -78,3 +80,88 @@ def test_verify_token_wrong_type():
     token = create_token("test-subject", "refresh")
     with pytest.raises(InvalidTokenError):
         verify_token(token, "access")
+
+
+def test_verify_token_is_cached(monkeypatch):
+    """Test a verified token is served from the cache."""
+    token = create_token(456)
+    assert verify_token(token) == 456
+
+    def mock_decode(*args, **kwargs):
+        raise AssertionError("Token should not be decoded again")
+
+    monkeypatch.setattr(jwt, "decode", mock_decode)
+    hits = token_cache.hits
+    assert verify_token(token) == 456
+    assert token_cache.hits == hits + 1
+
+
+def test_verify_cached_token_wrong_type():
+    """Test a cached token is still checked for its type."""
+    token = create_token(789, "refresh")
+    assert verify_token(token, "refresh") == 789
+    with pytest.raises(InvalidTokenError):
+        verify_token(token, "access")
+
+
+def test_expired_token_is_not_cached():
+    """Test expired tokens are never cached."""
+    token = create_token(123, expires_delta=timedelta(days=-1))
+    with pytest.raises(TokenExpiredError):
+        verify_token(token)
+    with pytest.raises(TokenExpiredError):
+        verify_token(token)
+
+
+def test_create_token_with_key_ring(es256_key_ring: KeyRing):
+    """Test tokens are signed with the active key of the ring."""
+    token = create_token(123)
+    header = jwt.get_unverified_header(token)
+    assert header["kid"] == "es256-1"
+    assert header["alg"] == "ES256"
+    assert verify_token(token) == 123
+
+
+def test_verify_token_with_retired_key(monkeypatch, es256_key_ring: KeyRing):
+    """Test a retired public key still verifies its tokens."""
+    token = create_token(123)
+    active = es256_key_ring.get("es256-1")
+    retired = SigningKey("es256-1", "ES256", active.key.public_key())
+    key_ring = KeyRing([es256_key_ring.get(None), retired], active_kid=None)
+    monkeypatch.setattr(security, "key_ring", key_ring)
+    assert verify_token(token) == 123
+    assert jwt.get_unverified_header(create_token(123)).get("kid") is None
+
+
+def test_verify_token_unknown_kid(monkeypatch, es256_key_ring: KeyRing):
+    """Test tokens signed with an unknown key are rejected."""
+    token = create_token(123)
+    key_ring = KeyRing([es256_key_ring.get(None)], active_kid=None)
+    monkeypatch.setattr(security, "key_ring", key_ring)
+    with pytest.raises(InvalidTokenError):
+        verify_token(token)
+
+
+def test_key_ring_requires_private_active_key(es256_pem: str):
+    """Test a public key cannot be the active signing key."""
+    private = SigningKey.from_pem("es256-1", "ES256", es256_pem)
+    public = SigningKey("es256-1", "ES256", private.key.public_key())
+    with pytest.raises(ValueError):
+        KeyRing([public], active_kid="es256-1")
+
+
+def test_create_token_has_jti():
+    """Test every token gets a unique token ID."""
+    first = jwt.get_unverified_claims(create_token(123))
+    second = jwt.get_unverified_claims(create_token(123))
+    assert first["jti"] != second["jti"]
+
+
+@pytest.mark.asyncio
+async def test_revoke_token():
+    """Test a revoked token is rejected even when cached."""
+    token = create_token(123)
+    assert verify_token(token) == 123
+    assert await revoke_token(token) == 123
+    with pytest.raises(InvalidTokenError):
+        verify_token(token)